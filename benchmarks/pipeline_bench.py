@@ -0,0 +1,285 @@
+"""End-to-end benchmark of the constitution pipeline against the fake model backend.
+
+Boots the researcher, judge, content builder and orchestrator servers with
+MODEL_BACKEND=fake (and every cache disabled), drives `/api/chat_stream` at a
+fixed concurrency and writes latency, time-to-first-byte, throughput and a
+per-stage breakdown as JSON. With zero fake latency, everything measured is
+orchestration and A2A overhead.
+
+    python benchmarks/pipeline_bench.py --requests 50 --concurrency 8 --output bench.json
+    python benchmarks/pipeline_bench.py --baseline bench.json   # compare against an earlier run
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# (service directory, port offset from --base-port)
+SERVICES = [("researcher", 1), ("judge", 2), ("content_builder", 3), ("orchestrator", 0)]
+
+# A fixed workload, so runs on different commits are comparable
+USE_CASES = [
+    "A triage chatbot for hospital emergency departments",
+    "An AI tutor for primary school mathematics",
+    "A credit scoring model for small business loans",
+    "A content moderation assistant for a social network",
+    "A resume screening tool for a recruiting agency",
+    "An autonomous customer support agent for a telecom provider",
+    "A legal research assistant for public defenders",
+    "A fraud detection system for online payments",
+]
+
+
+# --- Servers ---
+def service_env(args: argparse.Namespace) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update(
+        {
+            "MODEL_BACKEND": "fake",
+            "FAKE_LLM_LATENCY_MS": str(args.latency_ms),
+            "FAKE_LLM_TOKENS_PER_SECOND": str(args.tokens_per_second),
+            "FAST_START": "true",
+            "GOOGLE_CLOUD_PROJECT": env.get("GOOGLE_CLOUD_PROJECT", "benchmark"),
+            "SESSION_STORE": "memory",
+            "RESEARCH_CACHE_ENABLED": "false",
+            "RESEARCH_SIMILARITY_MODE": "off",
+            "JUDGE_VERDICT_MEMO_ENABLED": "false",
+            "AGENT_CARD_SNAPSHOT": "",
+        }
+    )
+    for name, offset in SERVICES:
+        if name != "orchestrator":
+            env[f"{name.upper()}_AGENT_CARD_URL"] = f"http://127.0.0.1:{args.base_port + offset}/.well-known/agent.json"
+    return env
+
+
+def start_servers(args: argparse.Namespace, log) -> List[subprocess.Popen]:
+    env = service_env(args)
+    processes = []
+    for name, offset in SERVICES:
+        port = args.base_port + offset
+        processes.append(
+            subprocess.Popen(
+                [args.python, "-m", "uvicorn", "app.server:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+                cwd=os.path.join(REPO_ROOT, name),
+                env={**env, "APP_URL": f"http://127.0.0.1:{port}", "PYTHONPATH": "."},
+                stdout=log,
+                stderr=log,
+            )
+        )
+    return processes
+
+
+async def wait_ready(args: argparse.Namespace, processes: List[subprocess.Popen]) -> float:
+    """Polls every server's /startup endpoint; returns seconds until all were ready."""
+    started = time.perf_counter()
+    pending = {args.base_port + offset for _, offset in SERVICES}
+    async with httpx.AsyncClient(timeout=2.0) as client:
+        while pending:
+            if any(p.poll() is not None for p in processes):
+                raise RuntimeError("A server exited during startup; see the server log")
+            if time.perf_counter() - started > args.startup_timeout:
+                raise RuntimeError(f"Servers on ports {sorted(pending)} not ready after {args.startup_timeout}s")
+            for port in list(pending):
+                try:
+                    response = await client.get(f"http://127.0.0.1:{port}/startup")
+                    if response.status_code == 200 and response.json().get("ready"):
+                        pending.discard(port)
+                except httpx.HTTPError:
+                    pass
+            await asyncio.sleep(0.2)
+    return time.perf_counter() - started
+
+
+def stop_servers(processes: List[subprocess.Popen]) -> None:
+    for p in processes:
+        p.terminate()
+    for p in processes:
+        try:
+            p.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            p.kill()
+
+
+# --- Load ---
+async def run_one(client: httpx.AsyncClient, url: str, index: int) -> dict:
+    """One pipeline run; stage times and token counts come from its `stage_end` events."""
+    payload = {
+        "message": f"Draft a binding AI Constitution for this use case: {USE_CASES[index % len(USE_CASES)]}",
+        "user_id": "bench_user",
+        "session_id": f"bench-{os.getpid()}-{index}",
+    }
+    started = time.perf_counter()
+    ttfb = None
+    stages: Dict[str, float] = {}
+    tokens = 0
+    iterations = 0
+    ok = False
+    async with client.stream("POST", url, json=payload) as response:
+        response.raise_for_status()
+        async for raw in response.aiter_lines():
+            if ttfb is None:
+                ttfb = time.perf_counter() - started
+            if not raw.strip():
+                continue
+            line = json.loads(raw)
+            if line.get("type") == "result":
+                text = line.get("text", "")
+                ok = bool(text) and not text.startswith("Error")
+            elif line.get("type") == "stage_end":
+                stage = line["stage"]
+                stages[stage] = stages.get(stage, 0.0) + line["elapsed_ms"] / 1000
+                iterations = max(iterations, line.get("iteration", 0))
+                usage = line.get("tokens") or {}
+                tokens += usage.get("prompt_tokens", 0) + usage.get("output_tokens", 0)
+    return {
+        "latency": time.perf_counter() - started,
+        "ttfb": ttfb or 0.0,
+        "stages": stages,
+        "tokens": tokens,
+        "iterations": iterations,
+        "ok": ok,
+    }
+
+
+async def drive(args: argparse.Namespace) -> dict:
+    url = f"http://127.0.0.1:{args.base_port}/api/chat_stream"
+    semaphore = asyncio.Semaphore(args.concurrency)
+    errors: List[str] = []
+
+    async with httpx.AsyncClient(timeout=httpx.Timeout(args.request_timeout)) as client:
+
+        async def bounded(index: int) -> Optional[dict]:
+            async with semaphore:
+                try:
+                    return await run_one(client, url, index)
+                except Exception as e:
+                    errors.append(f"{type(e).__name__}: {e}")
+                    return None
+
+        await asyncio.gather(*(bounded(-i - 1) for i in range(args.warmup)))
+        errors.clear()
+        started = time.perf_counter()
+        results = await asyncio.gather(*(bounded(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - started
+
+    runs = [r for r in results if r is not None]
+    return {"runs": runs, "errors": errors, "elapsed": elapsed}
+
+
+# --- Report ---
+def percentiles(values: List[float]) -> dict:
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def pick(pct: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))], 4)
+
+    return {"p50": pick(50), "p95": pick(95), "p99": pick(99), "mean": round(sum(ordered) / len(ordered), 4)}
+
+
+def git_revision() -> dict:
+    def git(*cmd: str) -> str:
+        try:
+            return subprocess.run(["git", *cmd], cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ""
+
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def build_report(args: argparse.Namespace, measured: dict, startup_seconds: float) -> dict:
+    runs = measured["runs"]
+    stage_names = sorted({s for r in runs for s in r["stages"]})
+    return {
+        "git": git_revision(),
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "fake_latency_ms": args.latency_ms,
+            "fake_tokens_per_second": args.tokens_per_second,
+        },
+        "startup_seconds": round(startup_seconds, 3),
+        "completed": len(runs),
+        "failed": args.requests - len(runs) + sum(1 for r in runs if not r["ok"]),
+        "errors": measured["errors"][:10],
+        "throughput_rps": round(len(runs) / measured["elapsed"], 3) if measured["elapsed"] else 0.0,
+        "latency_seconds": percentiles([r["latency"] for r in runs]),
+        "ttfb_seconds": percentiles([r["ttfb"] for r in runs]),
+        "stages_seconds": {s: percentiles([r["stages"].get(s, 0.0) for r in runs]) for s in stage_names},
+        "loop_iterations": percentiles([float(r["iterations"]) for r in runs]),
+        "tokens_per_run": percentiles([float(r["tokens"]) for r in runs]),
+    }
+
+
+def compare(report: dict, baseline: dict) -> dict:
+    """Relative change of the headline metrics against an earlier report (positive = slower/higher)."""
+
+    def delta(new: Optional[float], old: Optional[float]) -> Optional[float]:
+        if new is None or not old:
+            return None
+        return round((new - old) / old * 100, 1)
+
+    out = {"baseline_commit": baseline.get("git", {}).get("commit")}
+    for metric in ("latency_seconds", "ttfb_seconds"):
+        for pct in ("p50", "p95", "p99"):
+            out[f"{metric}.{pct}_pct"] = delta(report[metric].get(pct), baseline.get(metric, {}).get(pct))
+    out["throughput_rps_pct"] = delta(report["throughput_rps"], baseline.get("throughput_rps"))
+    for stage, values in report["stages_seconds"].items():
+        out[f"stages_seconds.{stage}.p50_pct"] = delta(values.get("p50"), baseline.get("stages_seconds", {}).get(stage, {}).get("p50"))
+    return out
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50, help="Measured pipeline runs.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Runs in flight at once.")
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured runs before the measurement.")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Fake model time to first token.")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Fake model output rate (0 = instant).")
+    parser.add_argument("--base-port", type=int, default=18000, help="Orchestrator port; agents use the next three.")
+    parser.add_argument("--python", default=sys.executable, help="Interpreter the servers run under.")
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    parser.add_argument("--request-timeout", type=float, default=300.0)
+    parser.add_argument("--output", help="Write the JSON report here as well as to stdout.")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare against.")
+    parser.add_argument("--server-log", default=os.devnull, help="File that receives the servers' output.")
+    return parser.parse_args()
+
+
+async def main() -> None:
+    args = parse_args()
+    with open(args.server_log, "w") as log:
+        processes = start_servers(args, log)
+        try:
+            startup_seconds = await wait_ready(args, processes)
+            measured = await drive(args)
+        finally:
+            stop_servers(processes)
+
+    report = build_report(args, measured, startup_seconds)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["comparison"] = compare(report, json.load(f))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
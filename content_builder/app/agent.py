@@ -1,21 +1,37 @@
+import asyncio
+import json
 import os
-from typing import List
-import google.auth
-from google.adk.agents import Agent
+from typing import AsyncGenerator, Dict, List, Optional
+from google.adk.agents import Agent, BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
 from google.adk.apps.app import App
+from google.adk.events import Event
+from google.genai import types as genai_types
 from pydantic import BaseModel, Field
 
+from app.startup import FAST_START, discover_project
+from app.model_backend import resolve_model
+from app.structured import extract_json_object, generate_structured
+
 # --- Configuration ---
-try:
-    _, project_id = google.auth.default()
-    os.environ.setdefault("GOOGLE_CLOUD_PROJECT", project_id)
-except Exception:
-    pass
+# Fast-start defers this (it can block on the metadata server) to the warmup thread
+if not FAST_START:
+    discover_project()
 
-os.environ.setdefault("GOOGLE_CLOUD_LOCATION", "us-central1")
+# Passed to the model client rather than set process-wide, which co-located services share
+LOCATION = os.environ.get("BUILDER_LOCATION") or os.environ.get("GOOGLE_CLOUD_LOCATION") or "us-central1"
 os.environ.setdefault("GOOGLE_GENAI_USE_VERTEXAI", "True")
 
 MODEL = "gemini-2.5-pro"
+# Cheaper model that drafts first; its answer is re-run on MODEL only when it does not hold up
+FAST_MODEL = os.environ.get("BUILDER_FAST_MODEL", "")
+
+# "single" drafts the whole constitution in one call; "parallel" outlines first and
+# then drafts every article concurrently
+BUILDER_MODE = os.environ.get("BUILDER_MODE", "single").lower()
+# Number of articles for the outline to produce (0 lets the model decide)
+ARTICLE_COUNT = int(os.environ.get("BUILDER_ARTICLE_COUNT", "0"))
+DRAFT_CONCURRENCY = int(os.environ.get("BUILDER_DRAFT_CONCURRENCY", "4"))
 
 # --- Data Models (The Final Artifact) ---
 
@@ -32,10 +48,25 @@ class AIConstitution(BaseModel):
     # GEO Optimization: These are short, logic-based summaries for AI indexing
     citable_axioms: List[str] = Field(..., description="Machine-readable logical statements (e.g., 'IF user_age < 13 THEN deny_access').")
 
+# --- Cascade Checks ---
+def review_constitution(schema: type, prompt: str, answer: dict) -> Optional[str]:
+    """Why a fast-model constitution is incomplete, or None."""
+    if schema is not AIConstitution:
+        return None
+    constitution = AIConstitution.model_validate(answer)
+    if not constitution.articles:
+        return "no articles"
+    empty = [a.title for a in constitution.articles if not a.content.strip()]
+    if empty:
+        return f"empty articles: {empty}"
+    if not constitution.citable_axioms:
+        return "no citable axioms"
+    return None
+
 # --- Content Builder Agent ---
 content_builder = Agent(
     name="content_builder",
-    model=MODEL,
+    model=resolve_model(MODEL, fast=FAST_MODEL, location=LOCATION, check=review_constitution),
     description="Constitutional Drafter. Turns approved principles into a formal document.",
     
     instruction="""
@@ -60,4 +91,177 @@ content_builder = Agent(
     output_schema=AIConstitution
 )
 
-app = App(root_agent=content_builder, name="content_builder")
\ No newline at end of file
+# --- Parallel Drafter ---
+class ArticleOutline(BaseModel):
+    title: str = Field(..., description="The article title (e.g., 'Article I: Rights of the System').")
+    principle_names: List[str] = Field(..., description="Names of the approved principles this article codifies.")
+
+class ConstitutionOutline(BaseModel):
+    """The plan for the constitution, drafted before any article is written."""
+    title: str = Field(..., description="The official title of the constitution.")
+    preamble: str = Field(..., description="The opening statement establishing purpose and scope.")
+    articles: List[ArticleOutline] = Field(..., description="The articles, in order.")
+
+class ArticleDraft(BaseModel):
+    article: ConstitutionArticle
+    citable_axioms: List[str] = Field(..., description="IF-THEN statements for this article only.")
+
+OUTLINE_INSTRUCTION = """
+You are the Constitutional Drafter planning a formal AI Constitution.
+You will receive the principles approved by the Judge, the mandatory constraints and the tone guidance.
+Write the title and preamble in high-formal legalese, and group the principles into Articles
+(Article I, Article II...). Every approved principle must be assigned to exactly one article.
+Do not write the article bodies yet.
+"""
+
+ARTICLE_INSTRUCTION = """
+You are the Constitutional Drafter writing ONE article of a formal AI Constitution.
+Write the article body in high-formal legalese, codifying exactly the principles given to you.
+OBEY all mandatory constraints. In `citable_axioms`, convert this article into short IF-THEN
+logic statements that other AI systems can easily parse.
+"""
+
+class ParallelDrafter(BaseAgent):
+    """Outlines the constitution, then drafts each article concurrently.
+
+    Falls back to the single-call drafter when the Judge's feedback cannot be
+    found in the message.
+    """
+
+    article_count: int = 0
+    concurrency: int = 4
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        text = ""
+        if ctx.user_content and ctx.user_content.parts:
+            text = "".join(p.text or "" for p in ctx.user_content.parts)
+
+        feedback = extract_json_object(text, "verdicts")
+        if not feedback:
+            async for event in self.sub_agents[0].run_async(ctx):
+                yield event
+            return
+        feedback = feedback[0]
+        findings = extract_json_object(text, "proposed_principles")
+        definitions = {
+            p.get("name", "").strip().lower(): p.get("definition", "")
+            for p in (findings[0].get("proposed_principles", []) if findings else [])
+            if isinstance(p, dict)
+        }
+
+        # Approved principles, with the Judge's amendments applied
+        principles: Dict[str, str] = {}
+        for verdict in feedback.get("verdicts", []):
+            if verdict.get("status") not in ("approved", "amended"):
+                continue
+            name = verdict.get("principle_name", "")
+            if verdict.get("status") == "amended" and verdict.get("amendment_text"):
+                principles[name] = verdict["amendment_text"]
+            else:
+                principles[name] = definitions.get(name.strip().lower(), name)
+
+        constraints = feedback.get("mandatory_constraints", [])
+        guidance = feedback.get("interpretive_guidance", "")
+        context = (
+            f"Approved principles: {principles}\n"
+            f"Mandatory constraints: {constraints}\n"
+            f"Tone guidance: {guidance}"
+        )
+        count_rule = (
+            f"Produce exactly {self.article_count} articles."
+            if self.article_count
+            else "Choose a sensible number of articles."
+        )
+
+        llm = self.sub_agents[0].canonical_model
+        outline = await generate_structured(
+            llm, OUTLINE_INSTRUCTION, f"{context}\n{count_rule}", ConstitutionOutline
+        )
+
+        # Anything the outline forgot still has to land in the document
+        assigned = {n.strip().lower() for a in outline.articles for n in a.principle_names}
+        missing = [n for n in principles if n.strip().lower() not in assigned]
+        if missing and outline.articles:
+            outline.articles[-1].principle_names.extend(missing)
+        elif missing:
+            outline.articles.append(ArticleOutline(title="Article I: General Provisions", principle_names=missing))
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        lookup = {n.strip().lower(): (n, t) for n, t in principles.items()}
+
+        async def draft(article: ArticleOutline) -> ArticleDraft:
+            assigned_principles = dict(
+                lookup[n.strip().lower()] for n in article.principle_names if n.strip().lower() in lookup
+            )
+            prompt = (
+                f"Constitution: {outline.title}\n"
+                f"Preamble: {outline.preamble}\n"
+                f"Article to write: {article.title}\n"
+                f"Principles for this article: {assigned_principles}\n"
+                f"Mandatory constraints: {constraints}\n"
+                f"Tone guidance: {guidance}"
+            )
+            async with semaphore:
+                result = await generate_structured(llm, ARTICLE_INSTRUCTION, prompt, ArticleDraft)
+            result.article.title = article.title
+            return result
+
+        # Articles are released in order as soon as they (and all earlier ones) are
+        # done; the partial events concatenate to a valid AIConstitution JSON prefix.
+        tasks = [asyncio.create_task(draft(a)) for a in outline.articles]
+        yield self._partial(ctx, json.dumps({"title": outline.title, "preamble": outline.preamble})[:-1] + ', "articles": [')
+        drafts: List[ArticleDraft] = []
+        try:
+            for i, task in enumerate(tasks):
+                drafts.append(await task)
+                yield self._partial(ctx, ("," if i else "") + drafts[-1].article.model_dump_json())
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        axioms: List[str] = []
+        for d in drafts:
+            for axiom in d.citable_axioms:
+                if axiom not in axioms:
+                    axioms.append(axiom)
+        yield self._partial(ctx, '], "citable_axioms": ' + json.dumps(axioms) + "}")
+
+        constitution = AIConstitution(
+            title=outline.title,
+            preamble=outline.preamble,
+            articles=[d.article for d in drafts],
+            citable_axioms=axioms,
+        )
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            branch=ctx.branch,
+            content=genai_types.Content(
+                role="model",
+                parts=[genai_types.Part.from_text(text=constitution.model_dump_json())],
+            ),
+        )
+
+    def _partial(self, ctx: InvocationContext, text: str) -> Event:
+        return Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            branch=ctx.branch,
+            partial=True,
+            content=genai_types.Content(role="model", parts=[genai_types.Part.from_text(text=text)]),
+        )
+
+if BUILDER_MODE == "parallel":
+    root_agent = ParallelDrafter(
+        name="parallel_drafter",
+        description="Outlines the constitution and drafts its articles concurrently.",
+        sub_agents=[content_builder],
+        article_count=ARTICLE_COUNT,
+        concurrency=DRAFT_CONCURRENCY,
+    )
+else:
+    root_agent = content_builder
+
+app = App(root_agent=root_agent, name="content_builder")
\ No newline at end of file
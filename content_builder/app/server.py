@@ -15,50 +15,75 @@ logging.getLogger("google.adk.runners").setLevel(logging.ERROR)
 # Suppress Google Auth warnings
 warnings.filterwarnings("ignore", message=".*Your application has authenticated using end user credentials.*")
 
+from app.startup import FAST_START, discover_project, startup, warm_model_clients
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.adk.artifacts.in_memory_artifact_service import InMemoryArtifactService
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
+from google.adk.sessions.base_session_service import GetSessionConfig
 from google.genai import types as genai_types
-from opentelemetry import trace
-from opentelemetry.sdk.trace import TracerProvider, export
-from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+from opentelemetry import propagate
 
 # A2A Imports
 from a2a.server.apps.jsonrpc.fastapi_app import A2AFastAPIApplication
 from a2a.server.request_handlers.default_request_handler import DefaultRequestHandler
-from a2a.server.tasks.inmemory_task_store import InMemoryTaskStore
 from a2a.types import AgentCard
 from a2a.server.agent_execution.agent_executor import AgentExecutor
 from a2a.server.events.event_queue import EventQueue
 from a2a.server.agent_execution.context import RequestContext
-from a2a.types import Message, TextPart
+from a2a.server.tasks.task_updater import TaskUpdater
+from a2a.types import Message, Part, TextPart
+from a2a.utils import new_task
+
+startup.mark("framework_imports")
 
+from app.model_backend import cascade_stats
 from app.agent import app as adk_app
+from app.session_store import create_session_service
+from app.task_store import BoundedTaskStore
+from app.telemetry import UsageReportingQueue, metrics, setup_tracing, span, track_usage
+startup.mark("app_modules")
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Telemetry
-provider = TracerProvider()
-processor = export.SimpleSpanProcessor(ConsoleSpanExporter())
-trace.set_tracer_provider(provider)
+tracer_provider = setup_tracing("content_builder")
 
 # Runner Setup
 runner = Runner(
     app=adk_app,
     artifact_service=InMemoryArtifactService(),
-    session_service=InMemorySessionService(),
+    session_service=create_session_service(),
 )
+startup.mark("runner")
+
+# Lookups that only need a session's state, not its event history
+STATE_ONLY = GetSessionConfig(num_recent_events=1)
+
+# Forward the constitution to the orchestrator chunk by chunk as it is generated
+STREAMING = os.environ.get("BUILDER_STREAMING", "true").lower() == "true"
 
 # --- Custom Executor ---
 class AdkToA2aExecutor(AgentExecutor):
-    def __init__(self, runner, app_name):
+    def __init__(self, runner, app_name, streaming: bool = False):
         self.runner = runner
         self.app_name = app_name
+        self.streaming = streaming
 
     async def execute(self, context: RequestContext, event_queue: EventQueue) -> None:
+        # Server side of the A2A hop, joined to the caller's trace; the runner's
+        # agent and model spans nest under it
+        headers = context.call_context.state.get("headers", {}) if context.call_context else {}
+        with span("a2a_execute", current=True, parent=propagate.extract(headers), agent=self.app_name), track_usage() as usage:
+            # Replies carry the tokens spent on them (see UsageReportingQueue)
+            await self._execute(context, UsageReportingQueue(event_queue, usage))
+
+    async def _execute(self, context: RequestContext, event_queue: EventQueue) -> None:
+        await startup.wait_ready()
         # 1. Extract User/Session
         user_id = "default_user"
         if context.call_context:
@@ -97,7 +122,7 @@ class AdkToA2aExecutor(AgentExecutor):
         # 3. Get/Create Session
         try:
             session = await self.runner.session_service.get_session(
-                session_id=session_id, app_name=self.app_name, user_id=user_id
+                session_id=session_id, app_name=self.app_name, user_id=user_id, config=STATE_ONLY
             )
         except Exception:
             session = None
@@ -108,41 +133,103 @@ class AdkToA2aExecutor(AgentExecutor):
             )
 
         # 4. Run Agent & Handle Structured Output
+        if self.streaming:
+            await self._stream(context, event_queue, user_id, session.id, adk_msg)
+            return
+
         async for event in self.runner.run_async(
             user_id=user_id, session_id=session.id, new_message=adk_msg
         ):
-             if event.content and event.content.parts:
-                 text_content = ""
-                 for p in event.content.parts:
-                     # Case A: Text
-                     if p.text: 
-                         text_content += p.text
-                     
-                     # Case B: Structured Output (Function Call)
-                     # Serialize the Constitution object to JSON string
-                     if p.function_call:
-                         try:
-                             args_dict = dict(p.function_call.args)
-                             text_content += json.dumps(args_dict)
-                         except Exception as e:
-                             logger.error(f"[{self.app_name}] Failed to serialize function args: {e}")
-                             text_content += str(p.function_call.args)
-                 
-                 if text_content:
-                    a2a_msg = Message(
-                        messageId=str(uuid.uuid4()),
-                        role="agent",
-                        parts=[TextPart(text=text_content)]
+             text_content = self._event_text(event)
+             if text_content:
+                a2a_msg = Message(
+                    messageId=str(uuid.uuid4()),
+                    role="agent",
+                    parts=[TextPart(text=text_content)]
+                )
+                await event_queue.enqueue_event(a2a_msg)
+
+    async def _stream(self, context: RequestContext, event_queue: EventQueue, user_id, session_id, adk_msg) -> None:
+        """Publishes partial model output as artifact chunks on an A2A task.
+
+        Chunks are sent with `last_chunk=False`; the complete constitution follows
+        as a replacement of the same artifact with `last_chunk=True`, so clients
+        that ignore chunks still receive the full document.
+        """
+        task = context.current_task
+        if not task:
+            task = new_task(context.message)
+            await event_queue.enqueue_event(task)
+        updater = TaskUpdater(event_queue, task.id, task.context_id)
+        await updater.start_work()
+
+        artifact_id = str(uuid.uuid4())
+        streamed = ""
+        final_text = ""
+        try:
+            async for event in self.runner.run_async(
+                user_id=user_id,
+                session_id=session_id,
+                new_message=adk_msg,
+                run_config=RunConfig(streaming_mode=StreamingMode.SSE),
+            ):
+                text_content = self._event_text(event)
+                if not text_content:
+                    continue
+                if event.partial:
+                    await updater.add_artifact(
+                        [Part(root=TextPart(text=text_content))],
+                        artifact_id=artifact_id,
+                        name="constitution",
+                        append=bool(streamed),
+                        last_chunk=False,
                     )
-                    await event_queue.enqueue_event(a2a_msg)
+                    streamed += text_content
+                else:
+                    final_text = text_content
+
+            await updater.add_artifact(
+                [Part(root=TextPart(text=final_text or streamed))],
+                artifact_id=artifact_id,
+                name="constitution",
+                append=False,
+                last_chunk=True,
+            )
+            await updater.complete()
+        except Exception as e:
+            # Otherwise the task would be left in the working state
+            await updater.failed(updater.new_agent_message([Part(root=TextPart(text=f"Content builder failed: {e}"))]))
+            raise
+
+    def _event_text(self, event) -> str:
+        text_content = ""
+        if not event.content or not event.content.parts:
+            return text_content
+        for p in event.content.parts:
+            # Case A: Text (thoughts are never forwarded)
+            if p.text and not p.thought:
+                text_content += p.text
+
+            # Case B: Structured Output (Function Call)
+            # Serialize the Constitution object to JSON string
+            if p.function_call:
+                try:
+                    args_dict = dict(p.function_call.args)
+                    text_content += json.dumps(args_dict)
+                except Exception as e:
+                    logger.error(f"[{self.app_name}] Failed to serialize function args: {e}")
+                    text_content += str(p.function_call.args)
+        return text_content
 
     async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
         pass
 
 # --- A2A Setup ---
 PORT = 8003
-task_store = InMemoryTaskStore()
-executor = AdkToA2aExecutor(runner, adk_app.name)
+# Public base URL advertised in the agent card (run_locally.sh sets it)
+APP_URL = os.environ.get("APP_URL", f"http://localhost:{PORT}")
+task_store = BoundedTaskStore.from_env()
+executor = AdkToA2aExecutor(runner, adk_app.name, streaming=STREAMING)
 request_handler = DefaultRequestHandler(agent_executor=executor, task_store=task_store)
 
 agent_card_data = {
@@ -150,8 +237,8 @@ agent_card_data = {
     "description": "Drafts formal AI Constitutions based on approved principles.", 
     "version": "0.2.0",
     "protocolVersion": "0.1.0",
-    "url": f"http://localhost:{PORT}/a2a/{adk_app.name}",
-    "capabilities": {},
+    "url": f"{APP_URL}/a2a/{adk_app.name}",
+    "capabilities": {"streaming": STREAMING},
     "security": [],
     "defaultInputModes": ["text"],
     "defaultOutputModes": ["text"],
@@ -162,7 +249,18 @@ agent_card = AgentCard(**agent_card_data)
 a2a_app = A2AFastAPIApplication(agent_card=agent_card, http_handler=request_handler)
 
 # --- FastAPI App ---
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if FAST_START:
+        startup.start_warmup({
+            "credentials": discover_project,
+            "model_clients": lambda: warm_model_clients(adk_app.root_agent),
+        })
+    yield
+    # Flush spans still queued in the batch processor
+    tracer_provider.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -180,7 +278,25 @@ a2a_app.add_routes_to_app(
 
 @app.get("/")
 def root():
-    return {"status": "ok", "service": "content_builder", "agent": adk_app.name, "a2a_card": f"http://localhost:{PORT}/.well-known/agent.json"}
+    return {"status": "ok", "service": "content_builder", "agent": adk_app.name, "a2a_card": f"{APP_URL}/.well-known/agent.json"}
+
+@app.get("/models/stats")
+def model_stats():
+    return cascade_stats.stats()
+
+@app.get("/tasks/stats")
+def task_stats():
+    return task_store.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics() -> str:
+    return metrics.render()
+
+@app.get("/startup")
+def startup_report():
+    return startup.stats()
+
+startup.mark("app_ready")
 
 if __name__ == "__main__":
     import uvicorn
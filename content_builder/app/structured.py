@@ -0,0 +1,48 @@
+import json
+from typing import Optional, Tuple, Type, TypeVar
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types as genai_types
+from pydantic import BaseModel
+
+T = TypeVar("T", bound=BaseModel)
+
+
+def extract_json_object(text: str, required_key: str) -> Optional[Tuple[dict, int, int]]:
+    """Finds the last JSON object in `text` that contains `required_key`.
+
+    Returns the parsed object together with its start/end offsets so the caller
+    can splice a rewritten object back into the message.
+    """
+    decoder = json.JSONDecoder()
+    found = None
+    idx = text.find("{")
+    while idx != -1:
+        try:
+            obj, end = decoder.raw_decode(text, idx)
+        except ValueError:
+            idx = text.find("{", idx + 1)
+            continue
+        if isinstance(obj, dict) and required_key in obj:
+            found = (obj, idx, end)
+        idx = text.find("{", end)
+    return found
+
+
+async def generate_structured(llm: BaseLlm, instruction: str, prompt: str, schema: Type[T]) -> T:
+    """Runs a single structured-output model call outside the agent loop."""
+    request = LlmRequest(
+        model=llm.model,
+        contents=[genai_types.Content(role="user", parts=[genai_types.Part.from_text(text=prompt)])],
+        config=genai_types.GenerateContentConfig(system_instruction=instruction),
+    )
+    request.set_output_schema(schema)
+
+    text = ""
+    async for response in llm.generate_content_async(request, stream=False):
+        if response.error_message:
+            raise RuntimeError(f"Model call failed: {response.error_message}")
+        if response.content and response.content.parts:
+            text += "".join(p.text for p in response.content.parts if p.text and not p.thought)
+    return schema.model_validate_json(text)
@@ -0,0 +1,45 @@
+import asyncio
+
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types as genai_types
+
+from app.model_backend import LocatedGemini, RecordReplayLlm
+from app.telemetry import track_usage
+
+
+def _request(text: str) -> LlmRequest:
+    return LlmRequest(contents=[genai_types.Content(role="user", parts=[genai_types.Part.from_text(text=text)])])
+
+
+def _collect(llm, request: LlmRequest) -> list:
+    async def run():
+        return [response async for response in llm.generate_content_async(request)]
+
+    return asyncio.run(run())
+
+
+def test_record_counts_each_call_once_and_replays_it(tmp_path, monkeypatch):
+    clients = []
+
+    async def fake_generate(self, llm_request, stream=False):
+        clients.append(id(self))
+        yield LlmResponse(
+            content=genai_types.Content(role="model", parts=[genai_types.Part.from_text(text="recorded")]),
+            usage_metadata=genai_types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=5, candidates_token_count=10
+            ),
+        )
+
+    monkeypatch.setattr(LocatedGemini, "generate_content_async", fake_generate)
+    recorder = RecordReplayLlm(model="gemini-test", mode="record", directory=str(tmp_path))
+    with track_usage() as usage:
+        _collect(recorder, _request("first"))
+        _collect(recorder, _request("second"))
+    assert usage.as_dict() == {"calls": 2, "prompt_tokens": 10, "output_tokens": 20}
+    # One client for the recorder, not one per request
+    assert len(set(clients)) == 1
+
+    player = RecordReplayLlm(model="gemini-test", mode="replay", directory=str(tmp_path))
+    replayed = _collect(player, _request("first"))
+    assert replayed[0].content.parts[0].text == "recorded"
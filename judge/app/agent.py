@@ -1,24 +1,55 @@
+import asyncio
 import os
-from typing import Literal, List
-import google.auth
-from google.adk.agents import Agent
+import re
+from typing import AsyncGenerator, Literal, List, Optional
+from google.adk.agents import Agent, BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
 from google.adk.apps.app import App
+from google.adk.events import Event
+from google.genai import types as genai_types
 from pydantic import BaseModel, Field
 
+from app.startup import FAST_START, discover_project
+from app.model_backend import resolve_model
+from app.structured import extract_json_object, generate_structured
+
 # --- Configuration ---
-try:
-    _, project_id = google.auth.default()
-    os.environ.setdefault("GOOGLE_CLOUD_PROJECT", project_id)
-except Exception:
-    pass
+# Fast-start defers this (it can block on the metadata server) to the warmup thread
+if not FAST_START:
+    discover_project()
 
-os.environ.setdefault("GOOGLE_CLOUD_LOCATION", "us-central1")
+# Passed to the model client rather than set process-wide, which co-located services share
+LOCATION = os.environ.get("JUDGE_LOCATION") or os.environ.get("GOOGLE_CLOUD_LOCATION") or "us-central1"
 os.environ.setdefault("GOOGLE_GENAI_USE_VERTEXAI", "True")
 
 MODEL = "gemini-2.5-pro"
+# Cheaper model that rules first; its answer is re-run on MODEL only when it does not hold up
+FAST_MODEL = os.environ.get("JUDGE_FAST_MODEL", "")
+
+# "single" judges all principles in one call; "fanout" judges each principle concurrently
+JUDGE_MODE = os.environ.get("JUDGE_MODE", "single").lower()
+FANOUT_CONCURRENCY = int(os.environ.get("JUDGE_FANOUT_CONCURRENCY", "4"))
+# Approved or amended principles needed for an overall "pass" in fan-out mode
+MIN_APPROVED_PRINCIPLES = int(os.environ.get("JUDGE_MIN_APPROVED", "1"))
+# Retries of a failed per-principle call; a call that keeps failing fails the whole ruling
+FANOUT_RETRIES = int(os.environ.get("JUDGE_FANOUT_RETRIES", "2"))
 
 # --- Data Models (The Contract) ---
 
+# Input: mirrors the Researcher's output contract.
+class GovernancePrinciple(BaseModel):
+    name: str = Field(..., description="Name of the principle.")
+    source: str = Field(..., description="The real-world framework this comes from.")
+    definition: str = Field(..., description="A concise definition of the rule.")
+
+class ResearchFindings(BaseModel):
+    context_summary: str = Field(..., description="Brief summary of the AI use case.")
+    applicable_frameworks: List[str] = Field(default_factory=list)
+    proposed_principles: List[GovernancePrinciple] = Field(...)
+    known_risks: List[str] = Field(default_factory=list)
+
+# Output
+
 class PrincipleVerdict(BaseModel):
     """The decision for a single proposed principle."""
     principle_name: str = Field(..., description="The name of the principle being evaluated.")
@@ -45,10 +76,43 @@ class JudgeFeedback(BaseModel):
         ..., description="Instructions for the Builder on the tone (e.g., 'Use strict, formal legalese')."
     )
 
+# --- Cascade Checks ---
+def _terms(text: str) -> set:
+    return set(re.findall(r"[a-z]{5,}", text.lower()))
+
+def review_ruling(schema: type, prompt: str, answer: dict) -> Optional[str]:
+    """Why a fast-model ruling disagrees with the findings it was given, or None."""
+    if schema is not JudgeFeedback:
+        return None
+    located = extract_json_object(prompt, "proposed_principles")
+    try:
+        findings = ResearchFindings.model_validate(located[0]) if located else None
+    except ValueError:
+        findings = None
+    if not findings:
+        return None
+
+    feedback = JudgeFeedback.model_validate(answer)
+    verdicts = {v.principle_name.strip().lower(): v for v in feedback.verdicts}
+    missing = [p.name for p in findings.proposed_principles if p.name.strip().lower() not in verdicts]
+    if missing:
+        return f"no verdict for {missing}"
+    if feedback.overall_status == "pass" and all(v.status == "rejected" for v in feedback.verdicts):
+        return "pass without an approved principle"
+    # A principle that covers a known risk should not be thrown out lightly
+    for principle in findings.proposed_principles:
+        if verdicts[principle.name.strip().lower()].status != "rejected":
+            continue
+        terms = _terms(f"{principle.name} {principle.definition}")
+        for risk in findings.known_risks:
+            if len(terms & _terms(risk)) >= 2:
+                return f"rejected '{principle.name}', which addresses the known risk '{risk}'"
+    return None
+
 # --- Judge Agent ---
 judge = Agent(
     name="judge",
-    model=MODEL,
+    model=resolve_model(MODEL, fast=FAST_MODEL, location=LOCATION, check=review_ruling),
     description="Supreme Court Justice of AI Governance. Evaluates principles for enforceability.",
     
     instruction="""
@@ -75,4 +139,150 @@ judge = Agent(
     disallow_transfer_to_peers=True,
 )
 
-app = App(root_agent=judge, name="judge")
\ No newline at end of file
+# --- Fan-out Judge ---
+class PrincipleRuling(BaseModel):
+    """The judge's ruling on one principle in fan-out mode."""
+    verdict: PrincipleVerdict
+    mandatory_constraints: List[str] = Field(
+        ..., description="Hard 'Red Lines' the Builder must follow because of this principle. May be empty."
+    )
+
+PRINCIPLE_INSTRUCTION = """
+You are the Supreme Court Justice of AI Governance.
+You will receive ONE proposed principle, together with the AI use case it is meant for,
+the known risks and the applicable frameworks identified by the Researcher.
+
+Evaluate the principle for Relevance, Enforceability and Safety:
+- If it is good but vague, mark it "amended" and rewrite it in `amendment_text`.
+- If it is dangerous or irrelevant, mark it "rejected".
+- Otherwise mark it "approved".
+List any hard rules the Builder must not break because of this principle in `mandatory_constraints`.
+"""
+
+class RulingGuidance(BaseModel):
+    """The judge's guidance for the Builder in fan-out mode."""
+    interpretive_guidance: str = Field(
+        ..., description="Instructions for the Builder on the tone (e.g., 'Use strict, formal legalese')."
+    )
+
+GUIDANCE_INSTRUCTION = """
+You are the Supreme Court Justice of AI Governance.
+You will receive an AI use case, the known risks and the applicable frameworks identified by the Researcher.
+The proposed principles are being ruled on separately.
+
+Write the `interpretive_guidance` for the Builder who drafts the constitution for this use case:
+the tone and register it must be written in, and how strictly its principles must be read.
+"""
+
+# Event metadata in which the fan-out judge reports each principle's constraints
+PRINCIPLE_CONSTRAINTS_KEY = "principle_constraints"
+
+class FanOutJudge(BaseAgent):
+    """Rules on every proposed principle in its own concurrent model call.
+
+    Verdicts are aggregated deterministically: they keep the researcher's order,
+    constraints of non-rejected principles are de-duplicated in that order, and `overall_status` is "pass"
+    once at least `min_approved` principles are approved or amended. The builder's
+    `interpretive_guidance` comes from one more call, made alongside the rulings.
+
+    A failed call is retried up to `retries` times; if it still fails the whole
+    ruling fails, rather than rejecting a principle nobody evaluated.
+    """
+
+    concurrency: int = 4
+    min_approved: int = 1
+    retries: int = 2
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        text = ""
+        if ctx.user_content and ctx.user_content.parts:
+            text = "".join(p.text or "" for p in ctx.user_content.parts)
+
+        located = extract_json_object(text, "proposed_principles")
+        findings = None
+        if located:
+            try:
+                findings = ResearchFindings.model_validate(located[0])
+            except ValueError:
+                findings = None
+
+        # Nothing to fan out over; let the single-call judge handle free-form input
+        if not findings or not findings.proposed_principles:
+            async for event in self.sub_agents[0].run_async(ctx):
+                yield event
+            return
+
+        llm = self.sub_agents[0].canonical_model
+        semaphore = asyncio.Semaphore(self.concurrency)
+        context = (
+            f"Use case: {findings.context_summary}\n"
+            f"Known risks: {findings.known_risks}\n"
+            f"Applicable frameworks: {findings.applicable_frameworks}\n"
+        )
+
+        async def rule(principle: GovernancePrinciple) -> PrincipleRuling:
+            prompt = f"{context}Principle to evaluate: {principle.model_dump_json()}"
+            async with semaphore:
+                ruling = await self._generate(llm, PRINCIPLE_INSTRUCTION, prompt, PrincipleRuling, f"'{principle.name}'")
+            ruling.verdict.principle_name = principle.name
+            return ruling
+
+        guidance, *rulings = await asyncio.gather(
+            self._generate(llm, GUIDANCE_INSTRUCTION, context, RulingGuidance, "guidance"),
+            *(rule(p) for p in findings.proposed_principles),
+        )
+
+        constraints: List[str] = []
+        for ruling in rulings:
+            if ruling.verdict.status == "rejected":
+                continue
+            for constraint in ruling.mandatory_constraints:
+                if constraint not in constraints:
+                    constraints.append(constraint)
+        approved = sum(1 for r in rulings if r.verdict.status in ("approved", "amended"))
+
+        feedback = JudgeFeedback(
+            overall_status="pass" if approved >= self.min_approved else "fail",
+            verdicts=[r.verdict for r in rulings],
+            mandatory_constraints=constraints,
+            interpretive_guidance=guidance.interpretive_guidance,
+        )
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            branch=ctx.branch,
+            content=genai_types.Content(
+                role="model",
+                parts=[genai_types.Part.from_text(text=feedback.model_dump_json(exclude_none=True))],
+            ),
+            # Lets the verdict memo store each principle with its own constraints
+            custom_metadata={
+                PRINCIPLE_CONSTRAINTS_KEY: {r.verdict.principle_name: r.mandatory_constraints for r in rulings}
+            },
+        )
+
+    async def _generate(self, llm, instruction: str, prompt: str, schema: type, label: str):
+        for attempt in range(self.retries + 1):
+            try:
+                return await generate_structured(llm, instruction, prompt, schema)
+            except Exception as e:
+                if attempt == self.retries:
+                    raise RuntimeError(f"Evaluation of {label} failed after {attempt + 1} attempts: {e}") from e
+                print(f"[{self.name}] Evaluation of {label} failed ({e}), retrying")
+                await asyncio.sleep(0.5 * 2 ** attempt)
+
+if JUDGE_MODE == "fanout":
+    root_agent = FanOutJudge(
+        name="fanout_judge",
+        description="Judges each proposed principle concurrently and merges the verdicts.",
+        sub_agents=[judge],
+        concurrency=FANOUT_CONCURRENCY,
+        min_approved=MIN_APPROVED_PRINCIPLES,
+        retries=FANOUT_RETRIES,
+    )
+else:
+    root_agent = judge
+
+app = App(root_agent=root_agent, name="judge")
\ No newline at end of file
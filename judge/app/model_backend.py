@@ -0,0 +1,475 @@
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional, Tuple, Union
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.google_llm import Gemini
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.tools.set_model_response_tool import SetModelResponseTool
+from google.genai import Client
+from google.genai import types as genai_types
+from pydantic import BaseModel, Field, create_model
+
+from app.telemetry import record_usage, span
+
+logger = logging.getLogger(__name__)
+
+# "gemini" calls the real model; "fake" synthesizes schema-valid answers offline;
+# "record" calls Gemini and saves every response; "replay" serves saved responses.
+MODEL_BACKEND = os.environ.get("MODEL_BACKEND", "gemini").lower()
+
+_SET_MODEL_RESPONSE = "set_model_response"
+
+# Fast-tier answers that rate their own confidence lower than this are re-run on the strong model
+CASCADE_MIN_CONFIDENCE = float(os.environ.get("CASCADE_MIN_CONFIDENCE", "0.7"))
+
+
+async def _timed(
+    llm: BaseLlm, responses: AsyncGenerator[LlmResponse, None]
+) -> AsyncGenerator[LlmResponse, None]:
+    """Records a `model_call` span/histogram around one model call."""
+    with span("model_call", model=llm.model, backend=MODEL_BACKEND) as call_span:
+        async for response in responses:
+            if response.usage_metadata and not response.partial:
+                call_span.set_attribute("output_tokens", response.usage_metadata.candidates_token_count or 0)
+                record_usage(response.usage_metadata)
+            yield response
+
+
+class LocatedGemini(Gemini):
+    """Gemini whose Vertex AI client is pinned to `location`.
+
+    Services co-located in one process each keep their own region instead of
+    sharing whichever GOOGLE_CLOUD_LOCATION was set first.
+    """
+
+    location: Optional[str] = None
+
+    @functools.cached_property
+    def api_client(self) -> Client:
+        vertexai = os.environ.get("GOOGLE_GENAI_USE_VERTEXAI", "").lower() in ("true", "1")
+        if not (self.location and vertexai):
+            return super().api_client
+        return Client(
+            vertexai=True,
+            location=self.location,
+            http_options=genai_types.HttpOptions(headers=self._tracking_headers, retry_options=self.retry_options),
+        )
+
+
+class TracedGemini(LocatedGemini):
+    """LocatedGemini with every call timed by `_timed`."""
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        async for response in _timed(self, super().generate_content_async(llm_request, stream)):
+            yield response
+
+
+# --- Schema Synthesis ---
+def _resolve(schema: Dict[str, Any], defs: Dict[str, Any]) -> Dict[str, Any]:
+    while "$ref" in schema:
+        schema = defs[schema["$ref"].split("/")[-1]]
+    return schema
+
+
+def synthesize(schema: Dict[str, Any], defs: Dict[str, Any], label: str, seed: str, array_items: int) -> Any:
+    """Builds a deterministic value that satisfies a (pydantic-generated) JSON schema."""
+    schema = _resolve(schema, defs)
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "const" in schema:
+        return schema["const"]
+    for key in ("anyOf", "oneOf", "allOf"):
+        if key in schema:
+            options = [s for s in schema[key] if _resolve(s, defs).get("type") != "null"]
+            return synthesize(options[0] if options else schema[key][0], defs, label, seed, array_items)
+
+    kind = schema.get("type", "string")
+    if kind == "object":
+        required = schema.get("required", list(schema.get("properties", {})))
+        return {
+            name: synthesize(prop, defs, name, seed, array_items)
+            for name, prop in schema.get("properties", {}).items()
+            if name in required
+        }
+    if kind == "array":
+        count = max(array_items, schema.get("minItems", 0))
+        return [synthesize(schema.get("items", {}), defs, f"{label} {i + 1}", seed, array_items) for i in range(count)]
+    if kind == "integer":
+        return schema.get("minimum", 1)
+    if kind == "number":
+        return schema.get("maximum", schema.get("minimum", 1.0))
+    if kind == "boolean":
+        return True
+    if kind == "null":
+        return None
+    return f"{label.replace('_', ' ').capitalize()} ({seed})"
+
+
+def _request_text(llm_request: LlmRequest) -> str:
+    parts = [p for c in llm_request.contents or [] for p in c.parts or []]
+    return "".join(p.text for p in parts if p.text)
+
+
+def _output_schema(llm_request: LlmRequest) -> Optional[type]:
+    """The expected output model: native response_schema or ADK's set_model_response tool."""
+    tool = llm_request.tools_dict.get(_SET_MODEL_RESPONSE)
+    if tool is not None:
+        return tool.output_schema
+    schema = llm_request.config.response_schema if llm_request.config else None
+    return schema if isinstance(schema, type) and issubclass(schema, BaseModel) else None
+
+
+def _already_answered(llm_request: LlmRequest) -> bool:
+    """True if the last turn is the response to a set_model_response call (other tools' responses don't count)."""
+    last = llm_request.contents[-1] if llm_request.contents else None
+    return bool(last and any(
+        p.function_response and p.function_response.name == _SET_MODEL_RESPONSE for p in last.parts or []
+    ))
+
+
+# --- Fake Backend ---
+class FakeLlm(BaseLlm):
+    """Offline stand-in for Gemini that answers with schema-valid synthetic objects.
+
+    Responses are deterministic for a given prompt. `latency_ms` is the time to
+    first token and `tokens_per_second` paces the rest (0 means instant), so
+    pipeline timings can be shaped without a network.
+    """
+
+    latency_ms: float = 0.0
+    tokens_per_second: float = 0.0
+    array_items: int = 3
+
+    @classmethod
+    def from_env(cls, model: str) -> "FakeLlm":
+        return cls(
+            model=model,
+            latency_ms=float(os.environ.get("FAKE_LLM_LATENCY_MS", "0")),
+            tokens_per_second=float(os.environ.get("FAKE_LLM_TOKENS_PER_SECOND", "0")),
+            array_items=int(os.environ.get("FAKE_LLM_ARRAY_ITEMS", "3")),
+        )
+
+    def _answer(self, llm_request: LlmRequest) -> Union[str, Dict[str, Any]]:
+        text = _request_text(llm_request)
+        seed = hashlib.sha256(text.encode("utf-8")).hexdigest()[:6]
+        schema_model = _output_schema(llm_request)
+        if schema_model is None:
+            return f"Fake response ({seed})."
+        json_schema = schema_model.model_json_schema()
+        value = synthesize(json_schema, json_schema.get("$defs", {}), schema_model.__name__, seed, self.array_items)
+        return schema_model.model_validate(value).model_dump(mode="json", exclude_none=True)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        async for response in _timed(self, self._generate(llm_request, stream)):
+            yield response
+
+    async def _generate(self, llm_request: LlmRequest, stream: bool) -> AsyncGenerator[LlmResponse, None]:
+        answer = self._answer(llm_request)
+        if isinstance(answer, dict) and _SET_MODEL_RESPONSE in llm_request.tools_dict and not _already_answered(llm_request):
+            # Mirror Gemini: the structured answer arrives as a set_model_response call
+            await asyncio.sleep(self.latency_ms / 1000)
+            yield LlmResponse(
+                content=genai_types.Content(
+                    role="model",
+                    parts=[genai_types.Part(function_call=genai_types.FunctionCall(name=_SET_MODEL_RESPONSE, args=answer))],
+                ),
+                usage_metadata=self._usage(llm_request, json.dumps(answer)),
+            )
+            return
+
+        text = answer if isinstance(answer, str) else json.dumps(answer)
+        await asyncio.sleep(self.latency_ms / 1000)
+        if stream:
+            chunk_size = 64
+            for start in range(0, len(text), chunk_size):
+                chunk = text[start : start + chunk_size]
+                await self._pace(chunk)
+                yield LlmResponse(content=genai_types.Content(role="model", parts=[genai_types.Part.from_text(text=chunk)]), partial=True)
+        else:
+            await self._pace(text)
+        yield LlmResponse(
+            content=genai_types.Content(role="model", parts=[genai_types.Part.from_text(text=text)]),
+            usage_metadata=self._usage(llm_request, text),
+        )
+
+    async def _pace(self, text: str) -> None:
+        if self.tokens_per_second > 0:
+            await asyncio.sleep(max(1, len(text) // 4) / self.tokens_per_second)
+
+    @staticmethod
+    def _usage(llm_request: LlmRequest, output: str) -> genai_types.GenerateContentResponseUsageMetadata:
+        prompt_tokens = len(_request_text(llm_request)) // 4
+        output_tokens = len(output) // 4
+        return genai_types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=output_tokens,
+            total_token_count=prompt_tokens + output_tokens,
+        )
+
+
+# --- Record / Replay ---
+def request_key(llm_request: LlmRequest) -> str:
+    """Stable hash of everything that shapes the model's answer."""
+    config = llm_request.config
+    schema = _output_schema(llm_request)
+    payload = json.dumps(
+        {
+            "model": llm_request.model,
+            "system": str(config.system_instruction) if config and config.system_instruction else "",
+            "contents": [c.model_dump(mode="json", exclude_none=True) for c in llm_request.contents or []],
+            "schema": schema.__name__ if schema else None,
+            "tools": sorted(llm_request.tools_dict),
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RecordReplayLlm(BaseLlm):
+    """Records Gemini responses to `directory` or plays them back from it.
+
+    Each request is stored as `<sha256 of the request>.json`. A replay miss falls
+    back to the fake backend, so a partially recorded run still completes.
+    """
+
+    mode: str = "replay"
+    directory: str = "recordings"
+    location: Optional[str] = None
+
+    @functools.cached_property
+    def gemini(self) -> LocatedGemini:
+        # Untimed: generate_content_async already times the whole call
+        return LocatedGemini(model=self.model, location=self.location)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        async for response in _timed(self, self._generate(llm_request, stream)):
+            yield response
+
+    async def _generate(self, llm_request: LlmRequest, stream: bool) -> AsyncGenerator[LlmResponse, None]:
+        path = os.path.join(self.directory, f"{request_key(llm_request)}.json")
+
+        if self.mode == "replay":
+            try:
+                with open(path, encoding="utf-8") as f:
+                    recorded = json.load(f)
+            except FileNotFoundError:
+                logger.warning(f"[ModelBackend] No recording for request {os.path.basename(path)}, using fake backend")
+                async for response in FakeLlm.from_env(self.model)._generate(llm_request, stream):
+                    yield response
+                return
+            for item in recorded:
+                yield LlmResponse.model_validate(item)
+            return
+
+        recorded: List[Dict[str, Any]] = []
+        async for response in self.gemini.generate_content_async(llm_request, stream):
+            if not response.partial:
+                recorded.append(response.model_dump(mode="json", exclude_none=True))
+            yield response
+        os.makedirs(self.directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(recorded, f)
+
+
+# --- Cascade ---
+# Returns why a structured answer cannot be trusted, or None: check(schema, prompt, answer)
+AnswerCheck = Callable[[type, str, Dict[str, Any]], Optional[str]]
+
+
+@functools.lru_cache(maxsize=None)
+def _with_confidence(schema: type) -> type:
+    """`schema` plus a `confidence` self-rating, asked of the fast tier only."""
+    return create_model(
+        schema.__name__,
+        __base__=schema,
+        confidence=(float, Field(..., ge=0.0, le=1.0, description="Your confidence (0-1) that this answer is complete and correct.")),
+    )
+
+
+class CascadeStats:
+    """Calls and tokens per model tier, and why answers were escalated."""
+
+    def __init__(self) -> None:
+        self._tiers: Dict[str, Dict[str, int]] = {}
+        self._escalations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, tier: str, model: str, responses: List[LlmResponse]) -> None:
+        usage = next((r.usage_metadata for r in reversed(responses) if r.usage_metadata and not r.partial), None)
+        with self._lock:
+            totals = self._tiers.setdefault(
+                tier, {"model": model, "calls": 0, "accepted": 0, "prompt_tokens": 0, "output_tokens": 0}
+            )
+            totals["calls"] += 1
+            if usage is not None:
+                totals["prompt_tokens"] += usage.prompt_token_count or 0
+                totals["output_tokens"] += usage.candidates_token_count or 0
+
+    def accepted(self, tier: str) -> None:
+        with self._lock:
+            self._tiers[tier]["accepted"] += 1
+
+    def escalated(self, reason: str) -> None:
+        with self._lock:
+            self._escalations[reason] = self._escalations.get(reason, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"min_confidence": CASCADE_MIN_CONFIDENCE, "tiers": dict(self._tiers), "escalations": dict(self._escalations)}
+
+
+cascade_stats = CascadeStats()
+
+
+class CascadeLlm(BaseLlm):
+    """Answers structured requests with `fast` first and re-runs them on `strong` when needed.
+
+    The fast answer is escalated if the call fails, the output does not match the
+    schema, its `confidence` self-rating is below `min_confidence`, or `check`
+    reports a disagreement (e.g. a verdict that contradicts the known risks).
+    Accepted fast answers arrive in one piece, without the confidence field
+    (which is added to native response schemas and to the set_model_response
+    tool alike); tool calls are passed through, and the turn after a tool
+    response is reviewed like any other. Requests without an output schema go
+    straight to `strong`. `model` is the strong model's name.
+    """
+
+    fast: BaseLlm
+    strong: BaseLlm
+    min_confidence: float = CASCADE_MIN_CONFIDENCE
+    check: Optional[AnswerCheck] = None
+
+    @property
+    def api_client(self) -> Any:
+        # Lets warm_model_clients build both tiers' clients
+        getattr(self.fast, "api_client", None)
+        return getattr(self.strong, "api_client", None)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        schema = _output_schema(llm_request)
+        if schema is not None and _already_answered(llm_request):
+            # The structured answer was already given through set_model_response; this turn only wraps up
+            async for response in self.fast.generate_content_async(llm_request.model_copy(update={"model": self.fast.model}), stream):
+                yield response
+            return
+        if schema is not None:
+            responses = [r async for r in self.fast.generate_content_async(self._fast_request(llm_request, schema), stream=False)]
+            cascade_stats.record("fast", self.fast.model, responses)
+            answer, reason = self._review(llm_request, schema, responses)
+            if answer is not None:
+                cascade_stats.accepted("fast")
+                yield answer
+                return
+            cascade_stats.escalated(reason.split(":")[0])
+            logger.info(f"[ModelBackend] Escalating to {self.strong.model}: {reason}")
+
+        responses = []
+        async for response in self.strong.generate_content_async(llm_request, stream):
+            responses.append(response)
+            yield response
+        cascade_stats.record("strong", self.strong.model, responses)
+        cascade_stats.accepted("strong")
+
+    def _fast_request(self, llm_request: LlmRequest, schema: type) -> LlmRequest:
+        update: Dict[str, Any] = {"model": self.fast.model}
+        if llm_request.config is None:
+            return llm_request.model_copy(update=update)
+        if _SET_MODEL_RESPONSE not in llm_request.tools_dict:
+            update["config"] = llm_request.config.model_copy(update={"response_schema": _with_confidence(schema)})
+            return llm_request.model_copy(update=update)
+
+        # Structured answers given through the set_model_response tool rate their confidence too
+        tool = SetModelResponseTool(_with_confidence(schema))
+        declaration = tool._get_declaration()
+        config = llm_request.config.model_copy(deep=True)
+        for config_tool in config.tools or []:
+            if getattr(config_tool, "function_declarations", None):
+                config_tool.function_declarations = [
+                    declaration if d.name == _SET_MODEL_RESPONSE else d for d in config_tool.function_declarations
+                ]
+        update["config"] = config
+        update["tools_dict"] = {**llm_request.tools_dict, _SET_MODEL_RESPONSE: tool}
+        return llm_request.model_copy(update=update)
+
+    def _review(
+        self, llm_request: LlmRequest, schema: type, responses: List[LlmResponse]
+    ) -> Tuple[Optional[LlmResponse], Optional[str]]:
+        """The fast answer as the caller should see it, or the reason to escalate."""
+        final = [r for r in responses if not r.partial]
+        if not final or any(r.error_message for r in final):
+            return None, "error: " + next((r.error_message for r in final if r.error_message), "no response")
+        last = final[-1]
+        parts = last.content.parts if last.content and last.content.parts else []
+        call = next((p.function_call for p in parts if p.function_call), None)
+        if call and call.name != _SET_MODEL_RESPONSE:
+            # A tool call on the way to the answer; the answer itself is reviewed in a later turn
+            return last, None
+        try:
+            value = dict(call.args) if call else json.loads("".join(p.text for p in parts if p.text and not p.thought))
+        except (TypeError, ValueError):
+            return None, "invalid: not JSON"
+        if not isinstance(value, dict):
+            return None, "invalid: not an object"
+        confidence = value.pop("confidence", None)
+        try:
+            schema.model_validate(value)
+        except ValueError as e:
+            return None, f"invalid: {str(e).splitlines()[0]}"
+        if isinstance(confidence, (int, float)) and confidence < self.min_confidence:
+            return None, f"low_confidence: {confidence}"
+        disagreement = self.check(schema, _request_text(llm_request), value) if self.check else None
+        if disagreement:
+            return None, f"disagreement: {disagreement}"
+        if call:
+            # The tool that runs the call is the agent's own, which has no confidence field
+            parts = [
+                p.model_copy(update={"function_call": call.model_copy(update={"args": value})}) if p.function_call is call else p
+                for p in parts
+            ]
+            return last.model_copy(update={"content": last.content.model_copy(update={"parts": parts})}), None
+        return last.model_copy(update={
+            "content": genai_types.Content(role="model", parts=[genai_types.Part.from_text(text=json.dumps(value))])
+        }), None
+
+
+# --- Resolution ---
+def _backend(name: str, location: Optional[str]) -> BaseLlm:
+    if MODEL_BACKEND == "fake":
+        return FakeLlm.from_env(name)
+    if MODEL_BACKEND in ("record", "replay"):
+        return RecordReplayLlm(
+            model=name,
+            mode=MODEL_BACKEND,
+            directory=os.environ.get("MODEL_RECORDINGS_DIR", "recordings"),
+            location=location,
+        )
+    return TracedGemini(model=name, location=location)
+
+
+def resolve_model(
+    name: str, fast: str = "", check: Optional[AnswerCheck] = None, location: Optional[str] = None
+) -> Union[str, BaseLlm]:
+    """The `model=` value for an agent under the configured MODEL_BACKEND.
+
+    With a `fast` model name, structured answers go through a `CascadeLlm`
+    that escalates to `name` only when needed. `location` is the Vertex AI
+    region of the agent's model calls.
+    """
+    if not fast:
+        return _backend(name, location)
+    return CascadeLlm(model=name, fast=_backend(fast, location), strong=_backend(name, location), check=check)
@@ -15,50 +15,77 @@ logging.getLogger("google.adk.runners").setLevel(logging.ERROR)
 # Suppress Google Auth warnings
 warnings.filterwarnings("ignore", message=".*Your application has authenticated using end user credentials.*")
 
+from app.startup import FAST_START, discover_project, startup, warm_model_clients
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.adk.artifacts.in_memory_artifact_service import InMemoryArtifactService
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
+from google.adk.sessions.base_session_service import GetSessionConfig
 from google.genai import types as genai_types
-from opentelemetry import trace
-from opentelemetry.sdk.trace import TracerProvider, export
-from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+from opentelemetry import propagate
 
 # A2A Imports
 from a2a.server.apps.jsonrpc.fastapi_app import A2AFastAPIApplication
 from a2a.server.request_handlers.default_request_handler import DefaultRequestHandler
-from a2a.server.tasks.inmemory_task_store import InMemoryTaskStore
 from a2a.types import AgentCard
 from a2a.server.agent_execution.agent_executor import AgentExecutor
 from a2a.server.events.event_queue import EventQueue
 from a2a.server.agent_execution.context import RequestContext
-from a2a.types import Message, TextPart
+from a2a.server.tasks.task_updater import TaskUpdater
+from a2a.types import Message, Part, TextPart
+from a2a.utils import new_task
+
+startup.mark("framework_imports")
 
-from app.agent import app as adk_app
+from app.model_backend import MODEL_BACKEND, cascade_stats
+from app.agent import FAST_MODEL, GUIDANCE_INSTRUCTION, JUDGE_MODE, MODEL, PRINCIPLE_CONSTRAINTS_KEY, PRINCIPLE_INSTRUCTION, JudgeFeedback, app as adk_app, judge
+from app.verdicts import MemoizedReview, VerdictStore, instruction_version
+from app.session_store import create_session_service
+from app.task_store import BoundedTaskStore
+from app.telemetry import UsageReportingQueue, metrics, setup_tracing, span, track_usage
+startup.mark("app_modules")
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Telemetry
-provider = TracerProvider()
-processor = export.SimpleSpanProcessor(ConsoleSpanExporter())
-trace.set_tracer_provider(provider)
+tracer_provider = setup_tracing("judge")
 
 # Runner Setup
 runner = Runner(
     app=adk_app,
     artifact_service=InMemoryArtifactService(),
-    session_service=InMemorySessionService(),
+    session_service=create_session_service(),
 )
+startup.mark("runner")
+
+# Lookups that only need a session's state, not its event history
+STATE_ONLY = GetSessionConfig(num_recent_events=1)
+
+# Forward the ruling chunk by chunk to streaming clients (the orchestrator drafts speculatively from it)
+STREAMING = os.environ.get("JUDGE_STREAMING", "true").lower() == "true"
 
 # --- Custom Executor ---
 class AdkToA2aExecutor(AgentExecutor):
-    def __init__(self, runner, app_name):
+    def __init__(self, runner, app_name, verdict_store: VerdictStore | None = None, streaming: bool = False):
         self.runner = runner
         self.app_name = app_name
+        self.verdict_store = verdict_store
+        self.streaming = streaming
 
     async def execute(self, context: RequestContext, event_queue: EventQueue) -> None:
+        # Server side of the A2A hop, joined to the caller's trace; the runner's
+        # agent and model spans nest under it
+        headers = context.call_context.state.get("headers", {}) if context.call_context else {}
+        with span("a2a_execute", current=True, parent=propagate.extract(headers), agent=self.app_name), track_usage() as usage:
+            # Replies carry the tokens spent on them (see UsageReportingQueue)
+            await self._execute(context, UsageReportingQueue(event_queue, usage))
+
+    async def _execute(self, context: RequestContext, event_queue: EventQueue) -> None:
+        await startup.wait_ready()
         # 1. Extract User/Session
         user_id = "default_user"
         if context.call_context:
@@ -88,6 +115,15 @@ class AdkToA2aExecutor(AgentExecutor):
                     except Exception as e:
                         logger.error(f"[{self.app_name}] Error extracting text: {e}")
         
+        # Only unseen or changed principles go to the model; the rest come from the verdict store
+        review = MemoizedReview.from_message(user_text, self.verdict_store) if self.verdict_store else None
+        if review:
+            logger.info(f"[{self.app_name}] {len(review.cached)} memoized verdicts, {len(review.pending)} principles to judge")
+            if not review.pending:
+                await self._enqueue_text(event_queue, review.resolve(None).model_dump_json(exclude_none=True))
+                return
+            user_text = review.model_text()
+
         adk_msg = genai_types.Content(
             role="user", parts=[genai_types.Part.from_text(text=user_text)]
         )
@@ -97,7 +133,7 @@ class AdkToA2aExecutor(AgentExecutor):
         # 3. Get/Create Session
         try:
             session = await self.runner.session_service.get_session(
-                session_id=session_id, app_name=self.app_name, user_id=user_id
+                session_id=session_id, app_name=self.app_name, user_id=user_id, config=STATE_ONLY
             )
         except Exception:
             session = None
@@ -108,41 +144,107 @@ class AdkToA2aExecutor(AgentExecutor):
             )
 
         # 4. Run Agent & Handle Structured Output
-        async for event in self.runner.run_async(
-            user_id=user_id, session_id=session.id, new_message=adk_msg
-        ):
-             if event.content and event.content.parts:
-                 text_content = ""
-                 for p in event.content.parts:
-                     # Case A: Normal Text
-                     if p.text: 
-                         text_content += p.text
+        # Memoized verdicts are only merged into the complete answer, so the
+        # model's partial output is not forwarded when some have to be spliced in
+        merging = review is not None and bool(review.cached)
+        updater = await self._start_task(context, event_queue) if self.streaming and not merging else None
+        artifact_id = str(uuid.uuid4())
+        streamed = False
+        try:
+            async for event in self.runner.run_async(
+                user_id=user_id,
+                session_id=session.id,
+                new_message=adk_msg,
+                run_config=RunConfig(streaming_mode=StreamingMode.SSE) if updater else None,
+            ):
+                 if event.content and event.content.parts:
+                     text_content = ""
+                     for p in event.content.parts:
+                         # Case A: Normal Text
+                         if p.text: 
+                             text_content += p.text
                      
-                     # Case B: Structured Output (Function Call)
-                     # This serializes the Pydantic object into a JSON string
-                     if p.function_call:
-                         try:
-                             args_dict = dict(p.function_call.args)
-                             text_content += json.dumps(args_dict)
-                         except Exception as e:
-                             logger.error(f"[{self.app_name}] Failed to serialize function args: {e}")
-                             text_content += str(p.function_call.args)
+                         # Case B: Structured Output (Function Call)
+                         # This serializes the Pydantic object into a JSON string
+                         if p.function_call:
+                             try:
+                                 args_dict = dict(p.function_call.args)
+                                 text_content += json.dumps(args_dict)
+                             except Exception as e:
+                                 logger.error(f"[{self.app_name}] Failed to serialize function args: {e}")
+                                 text_content += str(p.function_call.args)
                  
-                 if text_content:
-                    a2a_msg = Message(
-                        messageId=str(uuid.uuid4()),
-                        role="agent",
-                        parts=[TextPart(text=text_content)]
-                    )
-                    await event_queue.enqueue_event(a2a_msg)
+                     if text_content and event.partial:
+                        if updater:
+                            await updater.add_artifact(
+                                [Part(root=TextPart(text=text_content))],
+                                artifact_id=artifact_id,
+                                name="verdicts",
+                                append=streamed,
+                                last_chunk=False,
+                            )
+                            streamed = True
+                     elif text_content:
+                        if review:
+                            try:
+                                fresh = JudgeFeedback.model_validate_json(text_content)
+                            except ValueError:
+                                fresh = None
+                            if fresh:
+                                owned = (event.custom_metadata or {}).get(PRINCIPLE_CONSTRAINTS_KEY)
+                            text_content = review.resolve(fresh, owned).model_dump_json(exclude_none=True)
+                        if updater:
+                            # The complete ruling replaces the streamed chunks
+                            await updater.add_artifact(
+                                [Part(root=TextPart(text=text_content))],
+                                artifact_id=artifact_id,
+                                name="verdicts",
+                                append=False,
+                                last_chunk=True,
+                            )
+                        else:
+                            await self._enqueue_text(event_queue, text_content)
+            if updater:
+                await updater.complete()
+        except Exception as e:
+            # Otherwise the streamed task would be left in the working state
+            if updater:
+                await updater.failed(updater.new_agent_message([Part(root=TextPart(text=f"Judge failed: {e}"))]))
+            raise
+
+    async def _start_task(self, context: RequestContext, event_queue: EventQueue) -> TaskUpdater:
+        """Opens an A2A task whose artifact receives the ruling chunk by chunk."""
+        task = context.current_task
+        if not task:
+            task = new_task(context.message)
+            await event_queue.enqueue_event(task)
+        updater = TaskUpdater(event_queue, task.id, task.context_id)
+        await updater.start_work()
+        return updater
+
+    async def _enqueue_text(self, event_queue: EventQueue, text: str) -> None:
+        a2a_msg = Message(
+            messageId=str(uuid.uuid4()),
+            role="agent",
+            parts=[TextPart(text=text)]
+        )
+        await event_queue.enqueue_event(a2a_msg)
 
     async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
         pass
 
 # --- A2A Setup ---
 PORT = 8002
-task_store = InMemoryTaskStore()
-executor = AdkToA2aExecutor(runner, adk_app.name)
+# Public base URL advertised in the agent card (run_locally.sh sets it)
+APP_URL = os.environ.get("APP_URL", f"http://localhost:{PORT}")
+task_store = BoundedTaskStore.from_env()
+verdict_store = None
+if os.environ.get("JUDGE_VERDICT_MEMO_ENABLED", "true").lower() == "true":
+    # Verdicts of another model, backend (fake/replay runs) or prompt must not be served
+    model_version = f"{MODEL_BACKEND}:{FAST_MODEL}>{MODEL}" if FAST_MODEL else f"{MODEL_BACKEND}:{MODEL}"
+    instruction = judge.instruction + (PRINCIPLE_INSTRUCTION + GUIDANCE_INSTRUCTION if JUDGE_MODE == "fanout" else "")
+    verdict_store = VerdictStore.from_env(version=instruction_version(f"{model_version}:{JUDGE_MODE}", instruction))
+executor = AdkToA2aExecutor(runner, adk_app.name, verdict_store=verdict_store, streaming=STREAMING)
 request_handler = DefaultRequestHandler(agent_executor=executor, task_store=task_store)
 
 agent_card_data = {
@@ -150,8 +252,8 @@ agent_card_data = {
     "description": "Evaluates governance principles and issues binding verdicts.", 
     "version": "0.2.0",
     "protocolVersion": "0.1.0",
-    "url": f"http://localhost:{PORT}/a2a/{adk_app.name}",
-    "capabilities": {},
+    "url": f"{APP_URL}/a2a/{adk_app.name}",
+    "capabilities": {"streaming": STREAMING},
     "security": [],
     "defaultInputModes": ["text"],
     "defaultOutputModes": ["text"],
@@ -162,7 +264,18 @@ agent_card = AgentCard(**agent_card_data)
 a2a_app = A2AFastAPIApplication(agent_card=agent_card, http_handler=request_handler)
 
 # --- FastAPI App ---
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if FAST_START:
+        startup.start_warmup({
+            "credentials": discover_project,
+            "model_clients": lambda: warm_model_clients(adk_app.root_agent),
+        })
+    yield
+    # Flush spans still queued in the batch processor
+    tracer_provider.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -180,7 +293,31 @@ a2a_app.add_routes_to_app(
 
 @app.get("/")
 def root():
-    return {"status": "ok", "service": "judge", "agent": adk_app.name, "a2a_card": f"http://localhost:{PORT}/.well-known/agent.json"}
+    return {"status": "ok", "service": "judge", "agent": adk_app.name, "a2a_card": f"{APP_URL}/.well-known/agent.json"}
+
+@app.get("/verdicts/stats")
+def verdict_stats():
+    if not verdict_store:
+        return {"enabled": False}
+    return {"enabled": True, **verdict_store.stats()}
+
+@app.get("/models/stats")
+def model_stats():
+    return cascade_stats.stats()
+
+@app.get("/tasks/stats")
+def task_stats():
+    return task_store.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics() -> str:
+    return metrics.render()
+
+@app.get("/startup")
+def startup_report():
+    return startup.stats()
+
+startup.mark("app_ready")
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,265 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.agent import MIN_APPROVED_PRINCIPLES, GovernancePrinciple, JudgeFeedback, PrincipleVerdict, ResearchFindings
+from app.structured import extract_json_object
+
+logger = logging.getLogger(__name__)
+
+_USE_CASE_PATTERN = re.compile(r"use case:\s*(.+)", re.IGNORECASE)
+
+# Part of every key; bump when what a row stores changes (2: constraints per principle)
+_FORMAT_VERSION = 2
+
+
+# --- Message Parsing ---
+def use_case_context(text: str, findings: ResearchFindings) -> str:
+    """The user's use case if the message carries it, else the researcher's summary."""
+    match = _USE_CASE_PATTERN.search(text)
+    context = match.group(1).split("For context:")[0] if match else findings.context_summary
+    return re.sub(r"\s+", " ", context).strip().lower()
+
+
+def instruction_version(model: str, instruction: str) -> str:
+    """Short fingerprint of the model + prompt, so prompt edits invalidate old verdicts."""
+    return hashlib.sha256(f"{model}\n{instruction}".encode("utf-8")).hexdigest()[:16]
+
+
+def principle_key(principle: GovernancePrinciple, context: str, version: str = "") -> str:
+    payload = json.dumps(
+        [_FORMAT_VERSION, version, principle.name.strip(), principle.source.strip(), principle.definition.strip(), context]
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# --- Verdict Store ---
+class VerdictStore:
+    """SQLite-backed memo of PrincipleVerdicts keyed by principle + use-case hash.
+
+    Each row also remembers the constraints that principle brought into the
+    ruling and the guidance issued alongside it, so a fully cached submission
+    can be answered without the model.
+    Keys include `version` (model, backend and prompt), so a model or prompt
+    change starts from an empty memo; rows older than `ttl_seconds` are ignored
+    and purged on the next write (0 keeps them forever).
+    """
+
+    def __init__(self, path: str = "judge_verdicts.sqlite3", version: str = "", ttl_seconds: float = 7 * 24 * 3600):
+        self.path = path
+        self.version = version
+        self.ttl_seconds = ttl_seconds
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS verdicts (
+                key TEXT PRIMARY KEY,
+                verdict TEXT NOT NULL,
+                constraints TEXT NOT NULL,
+                guidance TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls, version: str) -> "VerdictStore":
+        return cls(
+            path=os.environ.get("JUDGE_VERDICT_DB", "judge_verdicts.sqlite3"),
+            version=version,
+            ttl_seconds=float(os.environ.get("JUDGE_VERDICT_TTL_SECONDS", str(7 * 24 * 3600))),
+        )
+
+    def _cutoff(self) -> float:
+        return time.time() - self.ttl_seconds if self.ttl_seconds > 0 else 0.0
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Tuple[PrincipleVerdict, List[str], str]]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        placeholders = ",".join("?" for _ in keys)
+        rows = self._conn.execute(
+            f"SELECT key, verdict, constraints, guidance FROM verdicts WHERE key IN ({placeholders}) AND updated_at >= ?",
+            [*keys, self._cutoff()],
+        ).fetchall()
+        found = {
+            key: (PrincipleVerdict.model_validate_json(verdict), json.loads(constraints), guidance)
+            for key, verdict, constraints, guidance in rows
+        }
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, entries: Dict[str, Tuple[PrincipleVerdict, List[str]]], guidance: str) -> None:
+        """Stores each key's verdict with the constraints that belong to that principle."""
+        now = time.time()
+        if self.ttl_seconds > 0:
+            self._conn.execute("DELETE FROM verdicts WHERE updated_at < ?", (self._cutoff(),))
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO verdicts (key, verdict, constraints, guidance, updated_at) VALUES (?, ?, ?, ?, ?)",
+            [
+                (key, verdict.model_dump_json(exclude_none=True), json.dumps(constraints), guidance, now)
+                for key, (verdict, constraints) in entries.items()
+            ],
+        )
+        self._conn.commit()
+
+    def stats(self) -> dict:
+        (entries,) = self._conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "version": self.version,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "path": self.path,
+        }
+
+
+# --- Merging ---
+def _terms(text: str) -> set:
+    return set(re.findall(r"[a-z]{5,}", text.lower()))
+
+
+def attribute_constraints(principle: GovernancePrinciple, verdict: PrincipleVerdict, constraints: List[str]) -> List[str]:
+    """The constraints of a whole ruling that share at least two terms with `principle`.
+
+    A single-call ruling lists its constraints for all principles at once; only
+    the ones that evidently stem from this principle are memoized with it.
+    """
+    if verdict.status == "rejected":
+        return []
+    terms = _terms(f"{principle.name} {principle.definition} {verdict.amendment_text or ''}")
+    return [c for c in constraints if len(terms & _terms(c)) >= 2]
+
+
+def _dedupe(items: Iterable[str]) -> List[str]:
+    seen = set()
+    result = []
+    for item in items:
+        if item not in seen:
+            seen.add(item)
+            result.append(item)
+    return result
+
+
+def merge_feedback(
+    principles: List[GovernancePrinciple],
+    cached: Dict[str, Tuple[PrincipleVerdict, List[str], str]],
+    keys: List[str],
+    fresh: Optional[JudgeFeedback],
+    min_approved: int = MIN_APPROVED_PRINCIPLES,
+) -> JudgeFeedback:
+    """Combines memoized verdicts with the model's ruling on the remaining principles.
+
+    Verdicts are returned in the order the researcher proposed the principles.
+    Constraints of memoized principles are only taken from ones not rejected.
+    The ruling passes once at least `min_approved` merged verdicts are approved
+    or amended; a fresh "fail" from the model is never turned into a pass.
+    """
+    fresh_by_name = {v.principle_name.strip().lower(): v for v in fresh.verdicts} if fresh else {}
+
+    verdicts = []
+    for principle, key in zip(principles, keys):
+        if key in cached:
+            verdicts.append(cached[key][0])
+        elif principle.name.strip().lower() in fresh_by_name:
+            verdicts.append(fresh_by_name.pop(principle.name.strip().lower()))
+    # Keep anything the model ruled on under a name we could not match
+    verdicts.extend(fresh_by_name.values())
+
+    cached_entries = [cached[key] for key in keys if key in cached]
+    constraints = _dedupe(
+        [c for verdict, entry_constraints, _ in cached_entries if verdict.status != "rejected" for c in entry_constraints]
+        + (fresh.mandatory_constraints if fresh else [])
+    )
+
+    if fresh:
+        guidance = fresh.interpretive_guidance
+    else:
+        guidance = cached_entries[-1][2] if cached_entries else ""
+
+    approved = sum(1 for v in verdicts if v.status in ("approved", "amended"))
+    if fresh and fresh.overall_status == "fail":
+        overall_status = "fail"
+    else:
+        overall_status = "pass" if approved >= min_approved else "fail"
+
+    return JudgeFeedback(
+        overall_status=overall_status,
+        verdicts=verdicts,
+        mandatory_constraints=constraints,
+        interpretive_guidance=guidance,
+    )
+
+
+class MemoizedReview:
+    """A judge submission split into memoized principles and ones the model must rule on."""
+
+    def __init__(self, text: str, findings: ResearchFindings, start: int, end: int, store: VerdictStore):
+        self.text = text
+        self.findings = findings
+        self.start = start
+        self.end = end
+        self.store = store
+        context = use_case_context(text, findings)
+        self.principles = findings.proposed_principles
+        self.keys = [principle_key(p, context, store.version) for p in self.principles]
+        self.cached = store.get_many(self.keys)
+        self.pending = [p for p, k in zip(self.principles, self.keys) if k not in self.cached]
+
+    @classmethod
+    def from_message(cls, text: str, store: VerdictStore) -> Optional["MemoizedReview"]:
+        located = extract_json_object(text, "proposed_principles")
+        if not located:
+            return None
+        obj, start, end = located
+        try:
+            findings = ResearchFindings.model_validate(obj)
+        except ValueError as e:
+            logger.warning(f"[VerdictStore] Could not parse research findings: {e}")
+            return None
+        return cls(text, findings, start, end, store)
+
+    def model_text(self) -> str:
+        """The original message with only the unseen or changed principles left in."""
+        reduced = self.findings.model_copy(update={"proposed_principles": self.pending})
+        return self.text[: self.start] + reduced.model_dump_json() + self.text[self.end :]
+
+    def resolve(
+        self, fresh: Optional[JudgeFeedback], principle_constraints: Optional[Dict[str, List[str]]] = None
+    ) -> JudgeFeedback:
+        """Records the model's new verdicts and merges them with the memoized ones.
+
+        `principle_constraints` maps principle names to their own constraints
+        (fan-out mode knows them); otherwise they are attributed by shared terms.
+        """
+        if fresh:
+            pending_keys = [k for k in self.keys if k not in self.cached]
+            by_name = {v.principle_name.strip().lower(): v for v in fresh.verdicts}
+            owned = {name.strip().lower(): c for name, c in (principle_constraints or {}).items()}
+            entries = {}
+            for principle, key in zip(self.pending, pending_keys):
+                name = principle.name.strip().lower()
+                verdict = by_name.get(name)
+                if verdict is None:
+                    continue
+                if principle_constraints is not None:
+                    constraints = [] if verdict.status == "rejected" else owned.get(name, [])
+                else:
+                    constraints = attribute_constraints(principle, verdict, fresh.mandatory_constraints)
+                entries[key] = (verdict, constraints)
+            self.store.put_many(entries, fresh.interpretive_guidance)
+        return merge_feedback(self.principles, self.cached, self.keys, fresh)
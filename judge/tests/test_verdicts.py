@@ -0,0 +1,85 @@
+from app.agent import GovernancePrinciple, JudgeFeedback, PrincipleVerdict, ResearchFindings
+from app.verdicts import MemoizedReview, VerdictStore, attribute_constraints, merge_feedback
+
+PRINCIPLES = [
+    GovernancePrinciple(name="Human Oversight", source="EU AI Act", definition="Operators review flight plans."),
+    GovernancePrinciple(name="Data Minimisation", source="GDPR", definition="Collect only delivery addresses."),
+]
+
+
+def _verdict(name: str, status: str) -> PrincipleVerdict:
+    return PrincipleVerdict(principle_name=name, status=status, reasoning="Because.")
+
+
+def _message(principles) -> str:
+    findings = ResearchFindings(context_summary="Drone delivery", proposed_principles=principles)
+    return f"Use case: drone delivery\n{findings.model_dump_json()}"
+
+
+def test_merge_skips_constraints_of_rejected_principles():
+    cached = {
+        "a": (_verdict("Human Oversight", "approved"), ["Keep a human pilot on call"], "Formal."),
+        "b": (_verdict("Data Minimisation", "rejected"), ["Delete all addresses daily"], "Formal."),
+    }
+    merged = merge_feedback(PRINCIPLES, cached, ["a", "b"], None)
+    assert merged.mandatory_constraints == ["Keep a human pilot on call"]
+    assert merged.overall_status == "pass"
+
+
+def test_merge_never_upgrades_a_fresh_fail():
+    fresh = JudgeFeedback(
+        overall_status="fail",
+        verdicts=[_verdict("Data Minimisation", "approved")],
+        mandatory_constraints=[],
+        interpretive_guidance="",
+    )
+    cached = {"a": (_verdict("Human Oversight", "approved"), [], "Formal.")}
+    merged = merge_feedback(PRINCIPLES, cached, ["a", "b"], fresh, min_approved=1)
+    assert merged.overall_status == "fail"
+    assert [v.principle_name for v in merged.verdicts] == ["Human Oversight", "Data Minimisation"]
+
+
+def test_attribution_keeps_only_the_principles_own_constraints():
+    constraints = ["Operators must review every flight plan", "Purge delivery addresses after thirty days"]
+    assert attribute_constraints(PRINCIPLES[0], _verdict("Human Oversight", "approved"), constraints) == [
+        "Operators must review every flight plan"
+    ]
+    assert attribute_constraints(PRINCIPLES[0], _verdict("Human Oversight", "rejected"), constraints) == []
+
+
+def test_memoized_ruling_does_not_leak_constraints_of_rejected_principles():
+    store = VerdictStore(":memory:", version="test")
+    review = MemoizedReview.from_message(_message(PRINCIPLES), store)
+    assert len(review.pending) == 2
+    fresh = JudgeFeedback(
+        overall_status="pass",
+        verdicts=[_verdict("Human Oversight", "approved"), _verdict("Data Minimisation", "rejected")],
+        mandatory_constraints=["Keep a human pilot on call", "Delete all addresses daily"],
+        interpretive_guidance="Formal.",
+    )
+    review.resolve(fresh, {
+        "Human Oversight": ["Keep a human pilot on call"],
+        "Data Minimisation": ["Delete all addresses daily"],
+    })
+
+    # The same principles again come entirely from the memo
+    again = MemoizedReview.from_message(_message(PRINCIPLES), store)
+    assert not again.pending
+    merged = again.resolve(None)
+    assert merged.mandatory_constraints == ["Keep a human pilot on call"]
+    assert merged.interpretive_guidance == "Formal."
+    assert store.stats()["hits"] == 2
+
+
+def test_expired_verdicts_are_ruled_on_again():
+    store = VerdictStore(":memory:", version="test", ttl_seconds=60)
+    review = MemoizedReview.from_message(_message(PRINCIPLES[:1]), store)
+    store.put_many({review.keys[0]: (_verdict("Human Oversight", "approved"), [])}, "Formal.")
+    store._conn.execute("UPDATE verdicts SET updated_at = 0")
+    assert MemoizedReview.from_message(_message(PRINCIPLES[:1]), store).pending == PRINCIPLES[:1]
+
+
+def test_keys_depend_on_the_store_version():
+    first = MemoizedReview.from_message(_message(PRINCIPLES), VerdictStore(":memory:", version="a"))
+    second = MemoizedReview.from_message(_message(PRINCIPLES), VerdictStore(":memory:", version="b"))
+    assert first.keys != second.keys
@@ -1,133 +1,168 @@
 import os
 import json
 import warnings
-from typing import AsyncGenerator, Any
-import google.auth
-from google.adk.agents import BaseAgent, LoopAgent, SequentialAgent
+from typing import Any, Callable, Optional
+from google.adk.agents import SequentialAgent
 
 # Suppress experimental warnings
 warnings.filterwarnings("ignore", message=".*\[EXPERIMENTAL\].*", category=UserWarning)
 
 from google.adk.apps.app import App
-from google.adk.events import Event, EventActions
-from google.adk.agents.invocation_context import InvocationContext
-from google.adk.agents.remote_a2a_agent import RemoteA2aAgent
 from google.adk.agents.callback_context import CallbackContext
+from a2a.client.client import ClientConfig as A2AClientConfig
+from a2a.client.client_factory import ClientFactory as A2AClientFactory
+from a2a.types import TransportProtocol as A2ATransport
+
+from app.startup import FAST_START, discover_project
+from app.card_cache import agent_card_cache
+from app.event_index import session_index
+from app.budget import BudgetedLoop
+from app.compaction import ContextCompactor
+from app.delta_research import DeltaResearchPlanner, merge_feedback, merge_findings
+from app.remote_agent import PipelineRemoteAgent
+from app.speculation import SPECULATIVE_DRAFTING, SpeculativePipeline
+from app.transport import stage_client
 
 # --- Configuration ---
-try:
-    _, project_id = google.auth.default()
-    os.environ.setdefault("GOOGLE_CLOUD_PROJECT", project_id)
-except Exception:
-    pass
+# Fast-start defers this (it can block on the metadata server) to the warmup thread
+if not FAST_START:
+    discover_project()
 
-os.environ.setdefault("GOOGLE_CLOUD_LOCATION", "us-central1")
 os.environ.setdefault("GOOGLE_GENAI_USE_VERTEXAI", "True")
 
+# "full" reruns the researcher from scratch on every loop iteration; "delta" only
+# asks it to replace the principles the judge rejected.
+RETRY_MODE = os.environ.get("GOVERNANCE_RETRY_MODE", "full").lower()
+# Send the judge and the builder compacted JSON instead of the raw session history
+COMPACTION = os.environ.get("CONTEXT_COMPACTION", "true").lower() == "true"
+# Speculative drafts are checked against the compacted ruling, so they need compaction
+SPECULATIVE = SPECULATIVE_DRAFTING and COMPACTION
+if SPECULATIVE_DRAFTING and not COMPACTION:
+    print("[Orchestrator] SPECULATIVE_DRAFTING needs CONTEXT_COMPACTION=true. Drafting after the loop.")
+
 # --- Callbacks ---
-def create_save_output_callback(key: str):
-    """Creates a callback to save the agent's final response to session state."""
+def create_save_output_callback(key: str, merge: Optional[Callable[[Any, Any, Any], Any]] = None):
+    """Creates a callback to save the agent's final response to session state.
+
+    If `merge` is given, loop retries (a pending `researcher_input` brief) combine
+    the new output with the previous value instead of overwriting it.
+    """
+    def save(ctx: CallbackContext, value: Any) -> None:
+        if merge and ctx.state.get("researcher_input"):
+            value = merge(ctx.state.get(key), value, ctx.state)
+        ctx.state[key] = value
+
     def callback(callback_context: CallbackContext, **kwargs) -> None:
         ctx = callback_context
-        # Find the last event from this agent that has content
-        for event in reversed(ctx.session.events):
-            if event.author == ctx.agent_name and event.content and event.content.parts:
-                text = event.content.parts[0].text
-                if text:
-                    # Try to parse as JSON if it looks like it (for judge_feedback)
-                    # This handles the JSON string returned by the remote agent
-                    if text.strip().startswith("{"):
-                        try:
-                            # Parse JSON string into a Dictionary
-                            data = json.loads(text)
-                            ctx.state[key] = data
-                            print(f"[{ctx.agent_name}] Successfully parsed JSON output.")
-                        except json.JSONDecodeError:
-                            print(f"[{ctx.agent_name}] Warning: Output looked like JSON but failed parse.")
-                            ctx.state[key] = text
-                    else:
-                        ctx.state[key] = text
-                    
-                    print(f"[{ctx.agent_name}] Saved output to state['{key}']")
-                    return
+        # The agent's last text-bearing event, straight from the session index
+        text = session_index.last_text(ctx.session, ctx.agent_name)
+        if not text:
+            return
+        # Try to parse as JSON if it looks like it (for judge_feedback)
+        # This handles the JSON string returned by the remote agent
+        if text.strip().startswith("{"):
+            try:
+                # Parse JSON string into a Dictionary
+                data = json.loads(text)
+                save(ctx, data)
+                print(f"[{ctx.agent_name}] Successfully parsed JSON output.")
+            except json.JSONDecodeError:
+                print(f"[{ctx.agent_name}] Warning: Output looked like JSON but failed parse.")
+                save(ctx, text)
+        else:
+            save(ctx, text)
+
+        print(f"[{ctx.agent_name}] Saved output to state['{key}']")
     return callback
 
 # --- Remote Agents ---
+# "split" talks to the researcher/judge/builder services over HTTP; "colocated"
+# loads them into this process and calls their A2A handlers directly.
+DEPLOYMENT_MODE = os.environ.get("DEPLOYMENT_MODE", "split").lower()
+
+def remote_connection(name: str, card_url: str, streaming: bool = False) -> dict:
+    """Agent card + client factory kwargs for a PipelineRemoteAgent."""
+    if DEPLOYMENT_MODE == "colocated":
+        from app.colocated import colocated_connection
+        return colocated_connection(name, streaming=streaming)
+    agent_card_cache.track(card_url)
+    return {
+        "agent_card": card_url,
+        # Every stage shares one pooled, retrying transport (see app.transport)
+        "a2a_client_factory": A2AClientFactory(
+            config=A2AClientConfig(
+                httpx_client=stage_client(name),
+                streaming=streaming,
+                polling=False,
+                supported_transports=[A2ATransport.jsonrpc],
+            )
+        ),
+    }
+
 # Update descriptions to match the new Constitution use case
 researcher_url = os.environ.get("RESEARCHER_AGENT_CARD_URL", "http://localhost:8001/.well-known/agent.json")
-researcher = RemoteA2aAgent(
+delta_mode = RETRY_MODE == "delta"
+researcher = PipelineRemoteAgent(
     name="researcher",
-    agent_card=researcher_url,
+    **remote_connection("researcher", researcher_url),
     description="AI Governance Specialist. Returns structured legal principles and risk frameworks.",
-    after_agent_callback=create_save_output_callback("research_findings")
+    input_key="researcher_input" if delta_mode else None,
+    after_agent_callback=create_save_output_callback(
+        "research_findings", merge=merge_findings if delta_mode else None
+    )
 )
 
 judge_url = os.environ.get("JUDGE_AGENT_CARD_URL", "http://localhost:8002/.well-known/agent.json")
-judge = RemoteA2aAgent(
+judge = PipelineRemoteAgent(
     name="judge",
-    agent_card=judge_url,
+    # The streamed ruling is what speculative drafting starts from
+    **remote_connection("judge", judge_url, streaming=SPECULATIVE),
     description="Supreme Court Justice. Evaluates principles and issues binding verdicts.",
-    after_agent_callback=create_save_output_callback("judge_feedback")
+    input_key="judge_input" if COMPACTION else None,
+    after_agent_callback=create_save_output_callback(
+        "judge_feedback", merge=merge_feedback if delta_mode else None
+    )
 )
 
 content_builder_url = os.environ.get("CONTENT_BUILDER_AGENT_CARD_URL", "http://localhost:8003/.well-known/agent.json")
-content_builder = RemoteA2aAgent(
+# Streaming client so the constitution arrives chunk by chunk (if the builder's card allows it)
+content_builder = PipelineRemoteAgent(
     name="content_builder",
-    agent_card=content_builder_url,
+    **remote_connection("content_builder", content_builder_url, streaming=True),
     description="Constitutional Drafter. Transforms approved principles into a formal document.",
+    input_key="builder_input" if COMPACTION else None,
     after_agent_callback=create_save_output_callback("content_output")
 )
 
 # --- Local Orchestration Agents ---
 
-class EscalationChecker(BaseAgent):
-    """Checks the judge's feedback and breaks the loop if 'overall_status' is 'pass'."""
-
-    async def _run_async_impl(
-        self, ctx: InvocationContext
-    ) -> AsyncGenerator[Event, None]:
-        feedback = ctx.session.state.get("judge_feedback")
-
-        print(f"[EscalationChecker] Checking Feedback: {feedback}")
-
-        should_escalate = False
-
-        # Case A: Feedback is a Dictionary (Parsed JSON)
-        if isinstance(feedback, dict):
-            # CHECK FOR 'overall_status' (The new field name)
-            if feedback.get("overall_status") == "pass":
-                should_escalate = True
-            # Fallback for legacy code support
-            elif feedback.get("status") == "pass":
-                should_escalate = True
-
-        # Case B: Feedback is a String (Failed parse or raw text)
-        elif isinstance(feedback, str):
-            if '"overall_status": "pass"' in feedback or '"status": "pass"' in feedback:
-                 should_escalate = True
-
-        if should_escalate:
-            print("[EscalationChecker] Judge approved. Moving to Content Builder.")
-            yield Event(author=self.name, actions=EventActions(escalate=True))
-        else:
-            print("[EscalationChecker] Judge rejected (or no feedback). Loop continues.")
-            yield Event(author=self.name)
-
-escalation_checker = EscalationChecker(name="escalation_checker")
+delta_planner = DeltaResearchPlanner(name="delta_research_planner")
+judge_compactor = ContextCompactor(name="judge_context", target="judge", output_key="judge_input")
+builder_compactor = ContextCompactor(name="builder_context", target="builder", output_key="builder_input")
 
 # --- Orchestration ---
 
-research_loop = LoopAgent(
+loop_stages = [researcher, judge_compactor, judge] if COMPACTION else [researcher, judge]
+if delta_mode:
+    loop_stages.insert(0, delta_planner)
+
+research_loop = BudgetedLoop(
     name="governance_loop",
-    description="Iteratively researches governance principles and judges them until approved.",
-    sub_agents=[researcher, judge, escalation_checker],
-    max_iterations=3,
+    description="Researches governance principles and judges them until approved or out of budget.",
+    sub_agents=loop_stages,
 )
 
-root_agent = SequentialAgent(
-    name="constitution_pipeline",
-    description="A pipeline that researches AI governance and drafts a constitution.",
-    sub_agents=[research_loop, content_builder],
-)
+if SPECULATIVE:
+    root_agent = SpeculativePipeline(
+        name="constitution_pipeline",
+        description="A pipeline that researches AI governance and drafts a constitution, drafting while the judge rules.",
+        sub_agents=[research_loop, builder_compactor, content_builder],
+    )
+else:
+    root_agent = SequentialAgent(
+        name="constitution_pipeline",
+        description="A pipeline that researches AI governance and drafts a constitution.",
+        sub_agents=[research_loop, builder_compactor, content_builder] if COMPACTION else [research_loop, content_builder],
+    )
 
 app = App(root_agent=root_agent, name="orchestrator_app")
\ No newline at end of file
@@ -0,0 +1,166 @@
+import math
+import os
+import time
+from typing import Any, AsyncGenerator, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+
+from app.telemetry import span
+
+# Defaults for requests that do not set their own budget (0 = unlimited)
+TIME_BUDGET_SECONDS = float(os.environ.get("LOOP_TIME_BUDGET_SECONDS", "0"))
+TOKEN_BUDGET = int(os.environ.get("LOOP_TOKEN_BUDGET", "0"))
+MAX_ITERATIONS = int(os.environ.get("LOOP_MAX_ITERATIONS", "3"))
+# Approved or amended principles needed to draft from a failed ruling once the budget runs out
+MIN_APPROVED = int(os.environ.get("LOOP_MIN_APPROVED", "1"))
+
+
+# --- Helpers ---
+def judge_passed(feedback: Any) -> bool:
+    """True if the judge's feedback (parsed or raw) carries an overall pass."""
+    if isinstance(feedback, dict):
+        # "status" is the field name of older judge versions
+        return feedback.get("overall_status") == "pass" or feedback.get("status") == "pass"
+    if isinstance(feedback, str):
+        return '"overall_status": "pass"' in feedback or '"status": "pass"' in feedback
+    return False
+
+
+def approved_count(feedback: Any) -> int:
+    if not isinstance(feedback, dict):
+        return 0
+    return sum(
+        1 for v in feedback.get("verdicts", [])
+        if isinstance(v, dict) and v.get("status") in ("approved", "amended")
+    )
+
+
+def _remaining(budget: float, spent: float) -> float:
+    return budget - spent if budget > 0 else math.inf
+
+
+# --- Controller ---
+class BudgetedLoop(BaseAgent):
+    """Runs research → judging rounds until the judge passes or the request's budget says stop.
+
+    A request's wall-clock and token budgets are read from `state['time_budget_seconds']`
+    and `state['token_budget']` (falling back to the fields). Tokens are summed from
+    the remote stages' `stage_end` events. After each failed round the controller
+    retries only if the remaining budget covers another round as expensive as the
+    costliest one so far. Otherwise it accepts a partial pass and drafts from the
+    round with the most approved principles, or stops the pipeline if fewer than
+    `min_approved` survived. After `max_iterations` rounds it drafts from the best
+    round, like a plain LoopAgent would from the last one.
+
+    Every decision is reported as a partial `loop_decision` stage event with the
+    round's and the request's spend.
+    """
+
+    max_iterations: int = MAX_ITERATIONS
+    time_budget_seconds: float = TIME_BUDGET_SECONDS
+    token_budget: int = TOKEN_BUDGET
+    min_approved: int = MIN_APPROVED
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        state = ctx.session.state
+        time_budget = float(state.get("time_budget_seconds") or self.time_budget_seconds)
+        token_budget = int(state.get("token_budget") or self.token_budget)
+
+        started = time.perf_counter()
+        tokens_spent = 0
+        costliest_seconds, costliest_tokens = 0.0, 0
+        best: Optional[dict] = None
+
+        for iteration in range(1, self.max_iterations + 1):
+            round_started = time.perf_counter()
+            round_tokens = 0
+            with span("loop_iteration") as iteration_span:
+                iteration_span.set_attribute("iteration", iteration)
+                for stage in self.sub_agents:
+                    async for event in stage.run_async(ctx):
+                        stage_event = (event.custom_metadata or {}).get("stage_event") or {}
+                        usage = stage_event.get("tokens") if stage_event.get("type") == "stage_end" else None
+                        if usage:
+                            round_tokens += usage.get("prompt_tokens", 0) + usage.get("output_tokens", 0)
+                        yield event
+                    if ctx.end_invocation:
+                        return
+
+            round_seconds = time.perf_counter() - round_started
+            tokens_spent += round_tokens
+            costliest_seconds = max(costliest_seconds, round_seconds)
+            costliest_tokens = max(costliest_tokens, round_tokens)
+
+            feedback = state.get("judge_feedback")
+            approved = approved_count(feedback)
+            if best is None or approved > best["approved"]:
+                best = {
+                    "iteration": iteration,
+                    "approved": approved,
+                    "research_findings": state.get("research_findings"),
+                    "judge_feedback": feedback,
+                }
+
+            elapsed = time.perf_counter() - started
+            if judge_passed(feedback):
+                decision = "pass"
+            elif iteration >= self.max_iterations:
+                decision = "max_iterations"
+            elif (
+                _remaining(time_budget, elapsed) < costliest_seconds
+                or _remaining(token_budget, tokens_spent) < costliest_tokens
+            ):
+                decision = "partial_pass" if best["approved"] >= self.min_approved else "stop"
+            else:
+                decision = "retry"
+
+            print(
+                f"[{self.name}] Round {iteration}: {round_seconds:.2f}s, {round_tokens} tokens, "
+                f"{approved} approved -> {decision} (spent {elapsed:.2f}s / {tokens_spent} tokens)"
+            )
+            yield Event(
+                author=self.name,
+                invocation_id=ctx.invocation_id,
+                branch=ctx.branch,
+                partial=True,
+                custom_metadata={"stage_event": {
+                    "type": "loop_decision",
+                    "stage": self.name,
+                    "decision": decision,
+                    "approved": approved,
+                    "round_ms": round(round_seconds * 1000, 1),
+                    "round_tokens": round_tokens,
+                    "elapsed_ms": round(elapsed * 1000, 1),
+                    "tokens_spent": tokens_spent,
+                }},
+            )
+
+            if decision == "retry":
+                continue
+            if decision == "stop":
+                message = (
+                    f"Stopped after {iteration} round(s): the budget cannot cover another round "
+                    f"and the judge approved fewer than {self.min_approved} principle(s)."
+                )
+                yield Event(
+                    author=self.name,
+                    error_code="BUDGET_EXHAUSTED",
+                    error_message=message,
+                    actions=EventActions(state_delta={"content_output": ""}),
+                )
+                ctx.end_invocation = True
+                return
+            if decision != "pass" and best["iteration"] != iteration:
+                # Draft from the round that got the furthest
+                yield Event(
+                    author=self.name,
+                    actions=EventActions(state_delta={
+                        "research_findings": best["research_findings"],
+                        "judge_feedback": best["judge_feedback"],
+                    }),
+                )
+            return
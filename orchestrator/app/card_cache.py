@@ -0,0 +1,176 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from typing import Dict, Optional
+
+import httpx
+from a2a.types import AgentCard
+
+from app.transport import stage_client
+
+logger = logging.getLogger(__name__)
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class _CachedCard:
+    __slots__ = ("card", "etag", "fingerprint", "expires_at")
+
+    def __init__(self, card: AgentCard, etag: Optional[str], fingerprint: str, expires_at: float):
+        self.card = card
+        self.etag = etag
+        self.fingerprint = fingerprint
+        self.expires_at = expires_at
+
+
+class AgentCardCache:
+    """Agent cards keyed by URL, revalidated with ETag/max-age off the request path.
+
+    `get` answers from memory whenever a card is known, even if it is stale, and
+    leaves revalidation to `refresh_forever`, so a request only ever waits on the
+    network the very first time a URL is seen with no snapshot on disk. Cards are
+    written to `snapshot_path` so a restarted orchestrator starts with them.
+    """
+
+    def __init__(self, snapshot_path: Optional[str] = None, default_max_age: float = 300):
+        self.snapshot_path = snapshot_path
+        self.default_max_age = default_max_age
+        self._entries: Dict[str, _CachedCard] = {}
+        self._tracked: set = set()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.fetches = 0
+        self.not_modified = 0
+        self.changes = 0
+        self._load_snapshot()
+
+    @classmethod
+    def from_env(cls) -> "AgentCardCache":
+        return cls(
+            snapshot_path=os.environ.get("AGENT_CARD_SNAPSHOT", ".agent_cards.json") or None,
+            default_max_age=float(os.environ.get("AGENT_CARD_MAX_AGE_SECONDS", "300")),
+        )
+
+    # --- Snapshot ---
+    def _load_snapshot(self) -> None:
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                data = json.load(f)
+            for url, item in data.items():
+                # Snapshot cards count as stale: they are served, then revalidated
+                self._entries[url] = _CachedCard(
+                    AgentCard.model_validate(item["card"]), item.get("etag"), item["fingerprint"], 0.0
+                )
+            logger.info(f"[AgentCardCache] Loaded {len(data)} cards from {self.snapshot_path}")
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"[AgentCardCache] Ignoring unreadable snapshot {self.snapshot_path}: {e}")
+
+    def _save_snapshot(self) -> None:
+        if not self.snapshot_path:
+            return
+        data = {
+            url: {
+                "card": entry.card.model_dump(mode="json", exclude_none=True),
+                "etag": entry.etag,
+                "fingerprint": entry.fingerprint,
+            }
+            for url, entry in self._entries.items()
+        }
+        tmp_path = f"{self.snapshot_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            logger.warning(f"[AgentCardCache] Could not write snapshot: {e}")
+
+    # --- Fetching ---
+    def _max_age(self, response: httpx.Response) -> float:
+        cache_control = response.headers.get("cache-control", "")
+        if "no-cache" in cache_control or "no-store" in cache_control:
+            return 0.0
+        match = _MAX_AGE.search(cache_control)
+        return float(match.group(1)) if match else self.default_max_age
+
+    async def _fetch(self, url: str) -> _CachedCard:
+        async with self._locks.setdefault(url, asyncio.Lock()):
+            entry = self._entries.get(url)
+            if entry and entry.expires_at > time.time():
+                return entry
+
+            headers = {"If-None-Match": entry.etag} if entry and entry.etag else {}
+            response = await stage_client("agent_card", default_timeout=10.0).get(url, headers=headers)
+            self.fetches += 1
+            expires_at = time.time() + self._max_age(response)
+
+            if response.status_code == 304 and entry:
+                self.not_modified += 1
+                entry.expires_at = expires_at
+                return entry
+
+            response.raise_for_status()
+            fingerprint = hashlib.sha256(response.content).hexdigest()
+            if entry and entry.fingerprint == fingerprint:
+                entry.etag = response.headers.get("etag")
+                entry.expires_at = expires_at
+                return entry
+
+            card = AgentCard.model_validate(response.json())
+            if not card.url:
+                raise ValueError(f"Agent card at {url} has no RPC url")
+            if entry:
+                self.changes += 1
+                logger.info(f"[AgentCardCache] Card at {url} changed")
+            entry = _CachedCard(card, response.headers.get("etag"), fingerprint, expires_at)
+            self._entries[url] = entry
+            self._save_snapshot()
+            return entry
+
+    # --- Public API ---
+    def track(self, url: str) -> None:
+        """Registers a card URL for background refresh."""
+        self._tracked.add(url)
+
+    def peek(self, url: str) -> Optional[AgentCard]:
+        """The cached card for `url`, without any I/O."""
+        entry = self._entries.get(url)
+        return entry.card if entry else None
+
+    async def get(self, url: str) -> AgentCard:
+        self._tracked.add(url)
+        entry = self._entries.get(url)
+        if entry is None:
+            entry = await self._fetch(url)
+        return entry.card
+
+    async def refresh_forever(self, interval: float = 30) -> None:
+        """Revalidates expired cards (all tracked cards on the first pass) until cancelled."""
+        while True:
+            for url in list(self._tracked):
+                try:
+                    await self._fetch(url)
+                except Exception as e:
+                    # Keep serving the last good card; the agent may simply not be up yet
+                    logger.info(f"[AgentCardCache] Could not refresh {url}: {e}")
+            await asyncio.sleep(interval)
+
+    def stats(self) -> dict:
+        now = time.time()
+        return {
+            "cards": {
+                url: {"name": entry.card.name, "etag": entry.etag, "fresh": entry.expires_at > now}
+                for url, entry in self._entries.items()
+            },
+            "fetches": self.fetches,
+            "not_modified": self.not_modified,
+            "changes": self.changes,
+            "snapshot_path": self.snapshot_path,
+        }
+
+
+agent_card_cache = AgentCardCache.from_env()
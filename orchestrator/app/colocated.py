@@ -0,0 +1,197 @@
+import importlib
+import logging
+import os
+import sys
+from collections.abc import AsyncGenerator, Callable
+from types import ModuleType
+from typing import Dict
+
+from a2a.client.client import ClientConfig as A2AClientConfig
+from a2a.client.client_factory import ClientFactory as A2AClientFactory
+from a2a.client.errors import A2AClientInvalidStateError
+from a2a.client.middleware import ClientCallContext
+from a2a.client.transports.base import ClientTransport
+from a2a.server.context import ServerCallContext
+from a2a.server.request_handlers import RequestHandler
+from a2a.types import (
+    AgentCard,
+    GetTaskPushNotificationConfigParams,
+    Message,
+    MessageSendParams,
+    Task,
+    TaskArtifactUpdateEvent,
+    TaskIdParams,
+    TaskPushNotificationConfig,
+    TaskQueryParams,
+    TaskStatusUpdateEvent,
+)
+from a2a.types import TransportProtocol as A2ATransport
+
+logger = logging.getLogger(__name__)
+
+# The sibling service directories (researcher/, judge/, content_builder/)
+SERVICES_ROOT = os.environ.get(
+    "COLOCATED_SERVICES_ROOT",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")),
+)
+
+_services: Dict[str, ModuleType] = {}
+
+
+# --- Service Loading ---
+def _is_app_module(name: str) -> bool:
+    return name == "app" or name.startswith("app.")
+
+
+def load_service(name: str) -> ModuleType:
+    """Imports `<SERVICES_ROOT>/<name>/app/server.py` into this process.
+
+    Every service ships its code as a top-level `app` package, so the
+    orchestrator's own `app.*` modules are set aside while the service is
+    imported and put back afterwards. The service modules keep their references
+    to each other and stay reachable under `colocated.<name>.app.*`.
+    """
+    if name in _services:
+        return _services[name]
+
+    service_dir = os.path.join(SERVICES_ROOT, name)
+    if not os.path.isfile(os.path.join(service_dir, "app", "server.py")):
+        raise RuntimeError(f"Cannot co-locate '{name}': no app/server.py under {service_dir}")
+
+    own_modules = {k: sys.modules.pop(k) for k in list(sys.modules) if _is_app_module(k)}
+    sys.path.insert(0, service_dir)
+    try:
+        server = importlib.import_module("app.server")
+        service_modules = {k: sys.modules[k] for k in sys.modules if _is_app_module(k)}
+    finally:
+        sys.path.remove(service_dir)
+        for k in [k for k in sys.modules if _is_app_module(k)]:
+            del sys.modules[k]
+        sys.modules.update(own_modules)
+
+    for k, module in service_modules.items():
+        sys.modules[f"colocated.{name}.{k}"] = module
+    _services[name] = server
+    logger.info(f"[Colocated] Loaded {name} service from {service_dir}")
+    return server
+
+
+# --- In-Process Transport ---
+class InProcessTransport(ClientTransport):
+    """A2A client transport that calls a service's request handler directly.
+
+    Requests and results are deep-copied at the boundary instead of going through
+    JSON-RPC, HTTP and a socket, so the client and server never share mutable
+    objects.
+    """
+
+    def __init__(self, handler: RequestHandler, card: AgentCard):
+        self.handler = handler
+        self.card = card
+
+    async def send_message(
+        self,
+        request: MessageSendParams,
+        *,
+        context: ClientCallContext | None = None,
+        extensions: list[str] | None = None,
+    ) -> Task | Message:
+        result = await self.handler.on_message_send(request.model_copy(deep=True), ServerCallContext())
+        return result.model_copy(deep=True)
+
+    async def send_message_streaming(
+        self,
+        request: MessageSendParams,
+        *,
+        context: ClientCallContext | None = None,
+        extensions: list[str] | None = None,
+    ) -> AsyncGenerator[Message | Task | TaskStatusUpdateEvent | TaskArtifactUpdateEvent]:
+        async for event in self.handler.on_message_send_stream(request.model_copy(deep=True), ServerCallContext()):
+            yield event.model_copy(deep=True)
+
+    async def get_task(
+        self,
+        request: TaskQueryParams,
+        *,
+        context: ClientCallContext | None = None,
+        extensions: list[str] | None = None,
+    ) -> Task:
+        task = await self.handler.on_get_task(request, ServerCallContext())
+        if task is None:
+            raise A2AClientInvalidStateError(f"Task {request.id} not found")
+        return task.model_copy(deep=True)
+
+    async def cancel_task(
+        self,
+        request: TaskIdParams,
+        *,
+        context: ClientCallContext | None = None,
+        extensions: list[str] | None = None,
+    ) -> Task:
+        task = await self.handler.on_cancel_task(request, ServerCallContext())
+        if task is None:
+            raise A2AClientInvalidStateError(f"Task {request.id} not found")
+        return task.model_copy(deep=True)
+
+    async def set_task_callback(
+        self,
+        request: TaskPushNotificationConfig,
+        *,
+        context: ClientCallContext | None = None,
+        extensions: list[str] | None = None,
+    ) -> TaskPushNotificationConfig:
+        return await self.handler.on_set_task_push_notification_config(request, ServerCallContext())
+
+    async def get_task_callback(
+        self,
+        request: GetTaskPushNotificationConfigParams,
+        *,
+        context: ClientCallContext | None = None,
+        extensions: list[str] | None = None,
+    ) -> TaskPushNotificationConfig:
+        return await self.handler.on_get_task_push_notification_config(request, ServerCallContext())
+
+    async def resubscribe(
+        self,
+        request: TaskIdParams,
+        *,
+        context: ClientCallContext | None = None,
+        extensions: list[str] | None = None,
+    ) -> AsyncGenerator[Task | Message | TaskStatusUpdateEvent | TaskArtifactUpdateEvent]:
+        async for event in self.handler.on_resubscribe_to_task(request, ServerCallContext()):
+            yield event.model_copy(deep=True)
+
+    async def get_card(
+        self,
+        *,
+        context: ClientCallContext | None = None,
+        extensions: list[str] | None = None,
+        signature_verifier: Callable[[AgentCard], None] | None = None,
+    ) -> AgentCard:
+        return self.card
+
+    async def close(self) -> None:
+        pass
+
+
+def colocated_connection(name: str, streaming: bool = False) -> dict:
+    """RemoteA2aAgent kwargs that reach the in-process `name` service.
+
+    The service's own agent card is passed directly (no resolution round trip)
+    and the JSON-RPC transport slot is filled with an InProcessTransport, so the
+    remote agent contract is unchanged.
+    """
+    server = load_service(name)
+    card = server.agent_card.model_copy(update={"preferred_transport": A2ATransport.jsonrpc})
+    factory = A2AClientFactory(
+        config=A2AClientConfig(
+            streaming=streaming,
+            polling=False,
+            supported_transports=[A2ATransport.jsonrpc],
+        )
+    )
+    factory.register(
+        A2ATransport.jsonrpc,
+        lambda agent_card, url, config, interceptors: InProcessTransport(server.request_handler, agent_card),
+    )
+    return {"agent_card": card, "a2a_client_factory": factory}
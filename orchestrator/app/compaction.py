@@ -0,0 +1,192 @@
+import json
+import logging
+import os
+import threading
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+
+from app.event_index import session_index
+
+logger = logging.getLogger(__name__)
+
+# Rough prompt size estimate (about four characters per token), applied to every compacted message
+TOKEN_BUDGET = int(os.environ.get("COMPACTION_TOKEN_BUDGET", "8000"))
+
+# Progressively shorter caps for free-text fields, tried in order until a message fits the budget
+_TEXT_LIMITS = (1000, 500, 250, 120, 60)
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4
+
+
+# --- Helpers ---
+def _name(value: Any) -> str:
+    return str(value or "").strip().lower()
+
+
+def _strings(items: Any) -> List[str]:
+    return [str(item) for item in items or [] if item]
+
+
+def _parse(text: str) -> Optional[dict]:
+    text = (text or "").strip()
+    if not text.startswith("{"):
+        return None
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _truncate(value: Any, limit: int) -> Any:
+    if isinstance(value, str):
+        return value if len(value) <= limit else value[:limit].rstrip() + "…"
+    if isinstance(value, list):
+        return [_truncate(item, limit) for item in value]
+    if isinstance(value, dict):
+        # Names tie verdicts to principles; they are never shortened
+        return {k: v if k in ("name", "principle_name") else _truncate(v, limit) for k, v in value.items()}
+    return value
+
+
+def fit_to_budget(payload: dict, budget: int = TOKEN_BUDGET) -> str:
+    """Serializes `payload` compactly, shortening its free-text fields until it fits `budget` tokens.
+
+    Nothing is dropped: a message that is still too large with the shortest
+    cap is sent anyway, with a warning.
+    """
+    text = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    if budget <= 0 or estimate_tokens(text) <= budget:
+        return text
+    for limit in _TEXT_LIMITS:
+        text = json.dumps(_truncate(payload, limit), ensure_ascii=False, separators=(",", ":"))
+        if estimate_tokens(text) <= budget:
+            return text
+    logger.warning(f"[Compaction] Message needs ~{estimate_tokens(text)} tokens, over the budget of {budget}")
+    return text
+
+
+# --- Compaction ---
+def compact_findings(findings: dict) -> dict:
+    """The researcher's findings reduced to the fields the judge rules on."""
+    return {
+        "context_summary": findings.get("context_summary", ""),
+        "applicable_frameworks": _strings(findings.get("applicable_frameworks")),
+        "proposed_principles": [
+            {"name": p.get("name", ""), "source": p.get("source", ""), "definition": p.get("definition", "")}
+            for p in findings.get("proposed_principles", [])
+            if isinstance(p, dict)
+        ],
+        "known_risks": _strings(findings.get("known_risks")),
+    }
+
+
+def compact_feedback(feedback: dict, findings: Optional[dict]) -> dict:
+    """The judge's ruling reduced to what the builder drafts from.
+
+    Rejected principles and every `reasoning` are dropped, and amendments are
+    applied: each surviving principle carries its final wording as `definition`.
+    The bare `verdicts` list keeps the builder's input contract intact.
+    """
+    definitions = {
+        _name(p.get("name")): p
+        for p in (findings or {}).get("proposed_principles", [])
+        if isinstance(p, dict)
+    }
+    principles, verdicts = [], []
+    for verdict in feedback.get("verdicts", []):
+        if not isinstance(verdict, dict) or verdict.get("status") not in ("approved", "amended"):
+            continue
+        name = verdict.get("principle_name", "")
+        proposed = definitions.get(_name(name), {})
+        text = proposed.get("definition") or name
+        if verdict.get("status") == "amended" and verdict.get("amendment_text"):
+            text = verdict["amendment_text"]
+        principles.append({"name": name, "source": proposed.get("source", ""), "definition": text})
+        verdicts.append({"principle_name": name, "status": "approved"})
+
+    return {
+        "context_summary": (findings or {}).get("context_summary", ""),
+        "proposed_principles": principles,
+        "verdicts": verdicts,
+        "mandatory_constraints": _strings(feedback.get("mandatory_constraints")),
+        "interpretive_guidance": feedback.get("interpretive_guidance", ""),
+    }
+
+
+class CompactionStats:
+    """Bytes and (estimated) tokens removed from each stage's outgoing message."""
+
+    def __init__(self) -> None:
+        self._stages: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, original: str, sent: str) -> None:
+        original_bytes, sent_bytes = len(original.encode()), len(sent.encode())
+        with self._lock:
+            totals = self._stages.setdefault(
+                stage, {"messages": 0, "original_bytes": 0, "sent_bytes": 0, "tokens_saved": 0}
+            )
+            totals["messages"] += 1
+            totals["original_bytes"] += original_bytes
+            totals["sent_bytes"] += sent_bytes
+            totals["tokens_saved"] += estimate_tokens(original) - estimate_tokens(sent)
+        logger.info(
+            f"[{stage}] Compacted input {original_bytes} -> {sent_bytes} bytes "
+            f"(~{estimate_tokens(original) - estimate_tokens(sent)} tokens saved)"
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "token_budget": TOKEN_BUDGET,
+                "stages": {
+                    stage: {**totals, "bytes_saved": totals["original_bytes"] - totals["sent_bytes"]}
+                    for stage, totals in self._stages.items()
+                },
+            }
+
+
+compaction_stats = CompactionStats()
+
+
+class ContextCompactor(BaseAgent):
+    """Writes a compacted version of the previous stage's output to `state[output_key]`.
+
+    The next `PipelineRemoteAgent` (with `input_key=output_key`) sends it instead
+    of the session history. `target` selects what is kept: "judge" sends the
+    researcher's latest findings, "builder" the approved principles and the
+    judge's constraints. When the source cannot be parsed the key is cleared
+    and the remote agent falls back to the full history.
+    """
+
+    target: str
+    output_key: str
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        state = ctx.session.state
+        payload = None
+        if self.target == "judge":
+            # The latest output, not the merged state: in delta mode only the replacements are up for review
+            findings = _parse(session_index.last_text(ctx.session, "researcher"))
+            if findings and findings.get("proposed_principles"):
+                payload = compact_findings(findings)
+        elif self.target == "builder":
+            feedback = state.get("judge_feedback")
+            findings = state.get("research_findings")
+            if isinstance(feedback, dict):
+                payload = compact_feedback(feedback, findings if isinstance(findings, dict) else None)
+
+        if payload is None:
+            print(f"[{self.name}] Nothing parsed to compact. Sending the full history.")
+        yield Event(
+            author=self.name,
+            actions=EventActions(state_delta={self.output_key: fit_to_budget(payload) if payload else ""}),
+        )
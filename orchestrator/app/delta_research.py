@@ -0,0 +1,151 @@
+import json
+from typing import Any, AsyncGenerator, Dict, List
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+
+# Marker the researcher's instruction keys off to switch into replacement mode
+REVISION_MARKER = "REVISION REQUEST"
+
+
+# --- Helpers ---
+def _name(value: str) -> str:
+    return value.strip().lower()
+
+
+def _union(*lists: List[str]) -> List[str]:
+    merged: List[str] = []
+    for items in lists:
+        for item in items or []:
+            if item not in merged:
+                merged.append(item)
+    return merged
+
+
+def _verdicts_by_name(feedback: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    return {
+        _name(v.get("principle_name", "")): v
+        for v in feedback.get("verdicts", [])
+        if isinstance(v, dict)
+    }
+
+
+def merge_findings(previous: Any, new: Any, state: Any) -> Any:
+    """Adds the researcher's replacement principles to the already-approved set."""
+    if not isinstance(new, dict):
+        return new
+    previous = previous if isinstance(previous, dict) else {}
+
+    approved = list(state.get("approved_principles") or [])
+    approved_names = {_name(p.get("name", "")) for p in approved}
+    replacements = [
+        p for p in new.get("proposed_principles", [])
+        if _name(p.get("name", "")) not in approved_names
+    ]
+
+    return {
+        "context_summary": previous.get("context_summary") or new.get("context_summary", ""),
+        "applicable_frameworks": _union(previous.get("applicable_frameworks"), new.get("applicable_frameworks")),
+        "proposed_principles": approved + replacements,
+        "known_risks": _union(previous.get("known_risks"), new.get("known_risks")),
+    }
+
+
+def merge_feedback(previous: Any, new: Any, state: Any) -> Any:
+    """Keeps earlier approved/amended verdicts alongside the judge's ruling on replacements."""
+    if not isinstance(new, dict) or not isinstance(previous, dict):
+        return new
+
+    approved_names = {_name(p.get("name", "")) for p in state.get("approved_principles") or []}
+    new_verdicts = _verdicts_by_name(new)
+    kept = [
+        v for name, v in _verdicts_by_name(previous).items()
+        if name in approved_names and name not in new_verdicts
+    ]
+
+    merged = dict(new)
+    merged["verdicts"] = kept + list(new_verdicts.values())
+    merged["mandatory_constraints"] = _union(
+        previous.get("mandatory_constraints"), new.get("mandatory_constraints")
+    )
+    return merged
+
+
+# --- Planner ---
+class DeltaResearchPlanner(BaseAgent):
+    """Turns the judge's verdicts into a replacement-only brief for loop retries.
+
+    On the first iteration of a request it clears the brief, so the researcher
+    gets the user's message as usual. On later iterations it writes the brief to
+    `state['researcher_input']` and records the principles that survived review in
+    `state['approved_principles']`.
+    """
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        state = ctx.session.state
+
+        if state.get("delta_invocation") != ctx.invocation_id:
+            yield Event(
+                author=self.name,
+                actions=EventActions(state_delta={
+                    "delta_invocation": ctx.invocation_id,
+                    "researcher_input": "",
+                    "approved_principles": [],
+                }),
+            )
+            return
+
+        feedback = state.get("judge_feedback")
+        findings = state.get("research_findings")
+        if not isinstance(feedback, dict) or not isinstance(findings, dict):
+            print(f"[{self.name}] No parsed verdicts to work from. Falling back to full research.")
+            yield Event(author=self.name, actions=EventActions(state_delta={"researcher_input": ""}))
+            return
+
+        verdicts = _verdicts_by_name(feedback)
+        kept, rejected, amended = [], [], []
+        for principle in findings.get("proposed_principles", []):
+            verdict = verdicts.get(_name(principle.get("name", "")))
+            status = verdict.get("status") if verdict else "rejected"
+            if status == "approved":
+                kept.append(principle)
+            elif status == "amended":
+                kept.append(principle)
+                amended.append(verdict)
+            else:
+                rejected.append(verdict or {"principle_name": principle.get("name"), "reasoning": "No verdict issued."})
+
+        user_text = ""
+        if ctx.user_content and ctx.user_content.parts:
+            user_text = "".join(p.text or "" for p in ctx.user_content.parts)
+
+        brief = "\n".join([
+            f"{REVISION_MARKER}",
+            f"Original request: {user_text}",
+            "",
+            "These principles were already approved and must NOT be proposed again:",
+            json.dumps([p.get("name") for p in kept]),
+            "",
+            "These principles were amended by the Judge (for context only):",
+            json.dumps([{"name": v.get("principle_name"), "amendment": v.get("amendment_text")} for v in amended]),
+            "",
+            "These principles were REJECTED. Propose one replacement for each that addresses the reasoning:",
+            json.dumps([{"name": v.get("principle_name"), "reasoning": v.get("reasoning")} for v in rejected]),
+            "",
+            "Judge's mandatory constraints:",
+            json.dumps(feedback.get("mandatory_constraints", [])),
+            "",
+            "Return ResearchFindings whose `proposed_principles` contain ONLY the replacement principles.",
+        ])
+
+        print(f"[{self.name}] Requesting {len(rejected)} replacement principles ({len(kept)} kept).")
+        yield Event(
+            author=self.name,
+            actions=EventActions(state_delta={
+                "researcher_input": brief,
+                "approved_principles": kept,
+            }),
+        )
@@ -0,0 +1,139 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+
+SessionKey = Tuple[str, str, str]
+
+
+def event_text(event: Event) -> str:
+    """All non-thought text in the event, joined (streamed replies can span several parts)."""
+    if not event.content or not event.content.parts:
+        return ""
+    return "".join(p.text for p in event.content.parts if p.text and not p.thought)
+
+
+class _Entry:
+    __slots__ = ("by_author", "last_user", "seen")
+
+    def __init__(self) -> None:
+        self.by_author: Dict[str, Event] = {}
+        self.last_user: Optional[Event] = None
+        self.seen = 0
+
+    def record(self, event: Event) -> None:
+        if event.partial or not event_text(event):
+            return
+        self.by_author[event.author] = event
+        if event.author == "user":
+            self.last_user = event
+
+
+class SessionEventIndex:
+    """Per-session pointers to the last text-bearing event of every author.
+
+    Updated as events are appended, so looking up an agent's last output or the
+    last user message costs O(1) however long the session has been running.
+    Each entry remembers how many of the session's events it has seen and only
+    indexes the ones after that, so a session evicted from the LRU (or loaded
+    from a persistent store after a restart) costs one scan on first lookup.
+    """
+
+    def __init__(self, max_sessions: int = 10000):
+        self.max_sessions = max_sessions
+        self._entries: "OrderedDict[SessionKey, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(session: Session) -> SessionKey:
+        return (session.app_name, session.user_id, session.id)
+
+    def _entry(self, session: Session) -> _Entry:
+        key = self._key(session)
+        events = session.events
+        with self._lock:
+            entry = self._entries.get(key)
+            # A shorter event list means a truncated or reset view: start over
+            if entry is None or len(events) < entry.seen:
+                entry = _Entry()
+                self._entries[key] = entry
+                while len(self._entries) > self.max_sessions:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.move_to_end(key)
+            for event in events[entry.seen:]:
+                entry.record(event)
+            entry.seen = len(events)
+            return entry
+
+    def record(self, session: Session) -> None:
+        """Indexes whatever was appended to `session.events` since the last call."""
+        self._entry(session)
+
+    def forget(self, app_name: str, user_id: str, session_id: str) -> None:
+        with self._lock:
+            self._entries.pop((app_name, user_id, session_id), None)
+
+    def last_event(self, session: Session, author: str) -> Optional[Event]:
+        return self._entry(session).by_author.get(author)
+
+    def last_text(self, session: Session, author: str) -> str:
+        event = self.last_event(session, author)
+        return event_text(event) if event else ""
+
+    def last_user_text(self, session: Session) -> str:
+        event = self._entry(session).last_user
+        return event_text(event) if event else ""
+
+
+session_index = SessionEventIndex(max_sessions=int(os.environ.get("SESSION_INDEX_MAX_SESSIONS", "10000")))
+
+
+class IndexedSessionService(BaseSessionService):
+    """Wraps a session service and keeps `session_index` in step with appended events."""
+
+    def __init__(self, inner: BaseSessionService, index: SessionEventIndex = session_index):
+        self.inner = inner
+        self.index = index
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session = await self.inner.create_session(
+            app_name=app_name, user_id=user_id, state=state, session_id=session_id
+        )
+        self.index.forget(app_name, user_id, session.id)
+        return session
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        return await self.inner.get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, config=config
+        )
+
+    async def list_sessions(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        return await self.inner.list_sessions(app_name=app_name, user_id=user_id)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        await self.inner.delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+        self.index.forget(app_name, user_id, session_id)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        event = await self.inner.append_event(session=session, event=event)
+        self.index.record(session)
+        return event
@@ -0,0 +1,168 @@
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+
+from a2a.client import ClientEvent as A2AClientEvent
+from a2a.types import AgentCard
+from a2a.types import Message as A2AMessage
+from a2a.types import Part as A2APart
+from a2a.types import TaskArtifactUpdateEvent, TaskState, TextPart
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.agents.remote_a2a_agent import RemoteA2aAgent
+from google.adk.events import Event
+from google.genai import types as genai_types
+
+from app.card_cache import agent_card_cache
+from app.compaction import compaction_stats
+from app.scheduler import stage_scheduler
+from app.telemetry import span
+from app.transport import TransferStats, transfer_stats
+
+logger = logging.getLogger(__name__)
+
+# Token usage reported by the agent for the call in flight (see UsageReportingQueue on the agent side)
+_reported_usage: ContextVar[Optional[Dict[str, Any]]] = ContextVar("reported_usage", default=None)
+
+# (agent name, events) of a call already made ahead of time; that agent's next call yields them instead
+replay_events: ContextVar[Optional[Tuple[str, List[Event]]]] = ContextVar("replay_events", default=None)
+
+
+def _usage_from(a2a_response: Any) -> Optional[Dict[str, int]]:
+    if isinstance(a2a_response, tuple):
+        task, update = a2a_response
+        metadata = (update.metadata if update is not None else None) or task.metadata
+    else:
+        metadata = getattr(a2a_response, "metadata", None)
+    return (metadata or {}).get("usage")
+
+
+class PipelineRemoteAgent(RemoteA2aAgent):
+    """RemoteA2aAgent whose outgoing message can be overridden from session state.
+
+    By default the remote agent receives every session event since its last reply.
+    When `input_key` is set and the state holds a non-empty string under that key,
+    that string is sent instead, letting local pipeline stages decide exactly what
+    the remote agent sees. The bytes and tokens this saves are recorded in
+    `compaction_stats`.
+
+    It also surfaces streamed artifact chunks (`last_chunk=False`) as partial
+    events, which the stock agent drops.
+
+    Calls of batch runs hold a slot of the stage's concurrency limit (see
+    `StageScheduler`) while in flight, so batch items overlap stage by stage.
+
+    Card URLs are resolved through `agent_card_cache`; when its background
+    refresh replaces a card, the next call rebuilds the client from it.
+
+    Each call is bracketed by partial (never persisted) events whose
+    `custom_metadata["stage_event"]` is a `stage_start` / `stage_end` record; the
+    latter carries elapsed time, the agent's token usage and the bytes moved.
+
+    When `replay_events` names this agent, its events are yielded instead of
+    making the call (see `SpeculativePipeline`).
+    """
+
+    input_key: Optional[str] = None
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        replay = replay_events.get()
+        if replay is not None and replay[0] == self.name:
+            for event in replay[1]:
+                yield event
+            return
+        yield self._stage_event(ctx, {"type": "stage_start", "stage": self.name})
+        started = time.perf_counter()
+        transfer = TransferStats()
+        usage: Dict[str, Any] = {}
+        # Set in this task's context, so the transport and _handle_a2a_response see them
+        transfer_stats.set(transfer)
+        _reported_usage.set(usage)
+        try:
+            # "stage" includes the wait for a slot, "a2a_hop" only the remote call
+            with span("stage", stage=self.name):
+                async with stage_scheduler.for_run(self.name, ctx.session.state):
+                    with span("a2a_hop", stage=self.name):
+                        async for event in super()._run_async_impl(ctx):
+                            yield event
+        finally:
+            transfer_stats.set(None)
+            _reported_usage.set(None)
+        yield self._stage_event(ctx, {
+            "type": "stage_end",
+            "stage": self.name,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            "tokens": usage.get("usage"),
+            "bytes_sent": transfer.sent,
+            "bytes_received": transfer.received,
+        })
+
+    def _stage_event(self, ctx: InvocationContext, data: dict) -> Event:
+        return Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            branch=ctx.branch,
+            partial=True,
+            custom_metadata={"stage_event": data},
+        )
+
+    async def _resolve_agent_card(self) -> AgentCard:
+        if self._agent_card_source.startswith(("http://", "https://")):
+            return await agent_card_cache.get(self._agent_card_source)
+        return await super()._resolve_agent_card()
+
+    async def _ensure_resolved(self) -> None:
+        if self._is_resolved and self._agent_card_source:
+            latest = agent_card_cache.peek(self._agent_card_source)
+            if latest is not None and latest is not self._agent_card:
+                logger.info(f"[{self.name}] Agent card changed, rebuilding client")
+                self._agent_card = latest
+                self._a2a_client = None
+                self._is_resolved = False
+        await super()._ensure_resolved()
+
+    def _construct_message_parts_from_session(
+        self, ctx: InvocationContext
+    ) -> tuple[list[A2APart], Optional[str]]:
+        message_parts, context_id = super()._construct_message_parts_from_session(ctx)
+
+        override = ctx.session.state.get(self.input_key) if self.input_key else None
+        if override:
+            logger.info(f"[{self.name}] Sending state['{self.input_key}'] instead of session history")
+            original = "".join(p.root.text for p in message_parts if isinstance(p.root, TextPart))
+            compaction_stats.record(self.name, original, override)
+            message_parts = [A2APart(root=TextPart(text=override))]
+
+        return message_parts, context_id
+
+    async def _handle_a2a_response(
+        self, a2a_response: A2AClientEvent | A2AMessage, ctx: InvocationContext
+    ) -> Optional[Event]:
+        reported = _reported_usage.get()
+        usage = _usage_from(a2a_response)
+        if reported is not None and usage:
+            reported["usage"] = usage
+        if isinstance(a2a_response, tuple):
+            task, update = a2a_response
+            if isinstance(update, TaskArtifactUpdateEvent) and update.last_chunk is False:
+                text = "".join(
+                    part.root.text for part in update.artifact.parts if isinstance(part.root, TextPart)
+                )
+                if not text:
+                    return None
+                return Event(
+                    author=self.name,
+                    invocation_id=ctx.invocation_id,
+                    branch=ctx.branch,
+                    partial=True,
+                    content=genai_types.Content(
+                        role="model", parts=[genai_types.Part.from_text(text=text)]
+                    ),
+                )
+            # The opening snapshot of a streamed task only echoes our own request
+            if update is None and task.status.state in (TaskState.submitted, TaskState.working) and not task.artifacts:
+                return None
+
+        return await super()._handle_a2a_response(a2a_response, ctx)
@@ -0,0 +1,84 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager, nullcontext
+from typing import Any, AsyncContextManager, AsyncIterator, Dict, Mapping
+
+logger = logging.getLogger(__name__)
+
+# Remote pipeline stages and the env vars that cap their concurrent calls
+STAGE_LIMIT_ENV = {
+    "researcher": "BATCH_RESEARCHER_CONCURRENCY",
+    "judge": "BATCH_JUDGE_CONCURRENCY",
+    "content_builder": "BATCH_BUILDER_CONCURRENCY",
+}
+
+# Session state key the batch runner sets; only runs carrying it queue for stage slots
+BATCH_STATE_KEY = "batch_id"
+
+
+class StageScheduler:
+    """Per-stage concurrency limits shared by every batch item in this process.
+
+    Each remote stage holds a slot only while its own A2A call is in flight, so a
+    batch item waiting on the judge does not block another item's research. With
+    all stages busy, throughput is bounded by the slowest stage rather than the
+    sum of the stages.
+
+    Interactive runs (`/api/chat_stream`) never wait for a slot, so a running
+    batch cannot queue them behind its items; see `for_run`.
+    """
+
+    def __init__(self, limits: Dict[str, int]):
+        self.limits = dict(limits)
+        self._semaphores = {stage: asyncio.Semaphore(limit) for stage, limit in self.limits.items()}
+        self._active = {stage: 0 for stage in self.limits}
+        self._waiting = {stage: 0 for stage in self.limits}
+        self._completed = {stage: 0 for stage in self.limits}
+
+    @classmethod
+    def from_env(cls) -> "StageScheduler":
+        return cls({
+            stage: max(1, int(os.environ.get(env, "4")))
+            for stage, env in STAGE_LIMIT_ENV.items()
+        })
+
+    @asynccontextmanager
+    async def slot(self, stage: str) -> AsyncIterator[None]:
+        """Holds one of `stage`'s slots for the duration of the block."""
+        semaphore = self._semaphores.get(stage)
+        if semaphore is None:
+            yield
+            return
+
+        self._waiting[stage] += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self._waiting[stage] -= 1
+
+        self._active[stage] += 1
+        try:
+            yield
+        finally:
+            self._active[stage] -= 1
+            self._completed[stage] += 1
+            semaphore.release()
+
+    def for_run(self, stage: str, state: Mapping[str, Any]) -> AsyncContextManager[None]:
+        """A slot of `stage` for batch runs (see BATCH_STATE_KEY); no limit for any other run."""
+        return self.slot(stage) if state.get(BATCH_STATE_KEY) else nullcontext()
+
+    def stats(self) -> dict:
+        return {
+            stage: {
+                "limit": self.limits[stage],
+                "active": self._active[stage],
+                "waiting": self._waiting[stage],
+                "completed": self._completed[stage],
+            }
+            for stage in self.limits
+        }
+
+
+stage_scheduler = StageScheduler.from_env()
@@ -1,6 +1,9 @@
+import asyncio
 import logging
 import os
 import json
+import time
+import uuid
 import warnings
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
@@ -15,20 +18,31 @@ logging.getLogger("google.adk.runners").setLevel(logging.ERROR)
 # Suppress Google Auth warnings
 warnings.filterwarnings("ignore", message=".*Your application has authenticated using end user credentials.*")
 
-from fastapi import FastAPI
-from fastapi.responses import StreamingResponse
+from app.startup import FAST_START, discover_project, startup
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from google.adk.artifacts.in_memory_artifact_service import InMemoryArtifactService
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
+from google.adk.sessions.base_session_service import GetSessionConfig
 from google.genai import types as genai_types
-from opentelemetry import trace
-from opentelemetry.sdk.trace import TracerProvider, export
-from opentelemetry.sdk.trace.export import ConsoleSpanExporter
 from pydantic import BaseModel
 
+startup.mark("framework_imports")
+
 from app.agent import app as adk_app
+from app.card_cache import agent_card_cache
+from app.compaction import compaction_stats
+from app.scheduler import BATCH_STATE_KEY, stage_scheduler
+from app.speculation import speculation_stats
+from app.stream_parser import ConstitutionStreamParser
+from app.transport import shared_transport
+from app.event_index import IndexedSessionService
+from app.session_store import create_session_service
+from app.telemetry import metrics, setup_tracing, span, traced_stream
+startup.mark("app_modules")
 
 class Feedback(BaseModel):
     score: float
@@ -39,17 +53,32 @@ class Feedback(BaseModel):
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-provider = TracerProvider()
-processor = export.SimpleSpanProcessor(ConsoleSpanExporter())
-trace.set_tracer_provider(provider)
+tracer_provider = setup_tracing("orchestrator")
 
 runner = Runner(
     app=adk_app,
     artifact_service=InMemoryArtifactService(),
-    session_service=InMemorySessionService(),
+    session_service=IndexedSessionService(create_session_service()),
 )
+startup.mark("runner")
+
+# Lookups that only need a session's state, not its event history
+STATE_ONLY = GetSessionConfig(num_recent_events=1)
 
-app = FastAPI()
+AGENT_CARD_REFRESH_SECONDS = float(os.environ.get("AGENT_CARD_REFRESH_SECONDS", "30"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Warm and keep revalidating agent cards in the background; never block startup on them
+    refresher = asyncio.create_task(agent_card_cache.refresh_forever(AGENT_CARD_REFRESH_SECONDS))
+    if FAST_START:
+        startup.start_warmup({"credentials": discover_project})
+    yield
+    refresher.cancel()
+    # Flush spans still queued in the batch processor
+    tracer_provider.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -63,13 +92,39 @@ class SimpleChatRequest(BaseModel):
     message: str
     user_id: str = "test_user"
     session_id: str = "test_session"
+    # Research/judging budgets for this request (see app.budget); unset uses the server defaults
+    time_budget_seconds: float | None = None
+    token_budget: int | None = None
+
+def budget_state(time_budget_seconds: float | None, token_budget: int | None) -> dict:
+    """State delta carrying a request's loop budgets; always set so earlier turns' budgets do not leak."""
+    return {"time_budget_seconds": time_budget_seconds, "token_budget": token_budget}
+
+# --- Chat Streaming ---
+STAGE_PROGRESS = {
+    "researcher": "🔍 Researcher is gathering information...",
+    "judge": "⚖️ Judge is evaluating findings...",
+    "content_builder": "✍️ Content Builder is writing the content...",
+}
+
+class ProgressCoalescer:
+    """Turns progress texts into NDJSON lines, dropping consecutive repeats."""
+
+    def __init__(self):
+        self.last = None
+
+    def update(self, text: str | None) -> str | None:
+        if not text or text == self.last:
+            return None
+        self.last = text
+        return json.dumps({"type": "progress", "text": text}) + "\n"
 
 @app.post("/api/chat_stream")
 async def chat_stream(request: SimpleChatRequest):
     """Streaming chat endpoint."""
     try:
         session = await runner.session_service.get_session(
-            session_id=request.session_id, app_name=adk_app.name, user_id=request.user_id
+            session_id=request.session_id, app_name=adk_app.name, user_id=request.user_id, config=STATE_ONLY
         )
     except Exception:
         session = None
@@ -87,20 +142,48 @@ async def chat_stream(request: SimpleChatRequest):
     async def event_generator():
         final_text = ""
         content_builder_events = []
+        constitution_parser = ConstitutionStreamParser()
+        progress = ProgressCoalescer()
+        iteration = 0
+        
+        error = None
         
         async for event in runner.run_async(
-            user_id=request.user_id, session_id=session.id, new_message=user_msg
+            user_id=request.user_id,
+            session_id=session.id,
+            new_message=user_msg,
+            state_delta=budget_state(request.time_budget_seconds, request.token_budget),
         ):
-            # Send progress updates based on which agent is active
-            if event.author == "researcher":
-                 yield json.dumps({"type": "progress", "text": "🔍 Researcher is gathering information..."}) + "\n"
-            elif event.author == "judge":
-                 yield json.dumps({"type": "progress", "text": "⚖️ Judge is evaluating findings..."}) + "\n"
-            elif event.author == "content_builder":
-                 yield json.dumps({"type": "progress", "text": "✍️ Content Builder is writing the content..."}) + "\n"
-                 # Collect content_builder events separately
-                 if event.content and event.content.parts:
-                     content_builder_events.append(event)
+            if event.error_message:
+                error = event.error_message
+
+            # Stage timing, token and transfer records from the remote agents
+            stage_event = (event.custom_metadata or {}).get("stage_event")
+            if stage_event:
+                if stage_event["type"] == "stage_start":
+                    if stage_event["stage"] == "researcher":
+                        iteration += 1
+                    line = progress.update(STAGE_PROGRESS.get(stage_event["stage"]))
+                    if line:
+                        yield line
+                yield json.dumps({**stage_event, "iteration": iteration}) + "\n"
+                continue
+
+            # Streamed constitution chunks: emit every completed article right away
+            if event.partial:
+                if event.author == "content_builder" and event.content and event.content.parts:
+                    chunk = "".join(p.text for p in event.content.parts if p.text)
+                    for parsed in constitution_parser.feed(chunk):
+                        yield json.dumps(parsed) + "\n"
+                continue
+
+            # Progress for agents that do not report stages; repeats are dropped
+            line = progress.update(STAGE_PROGRESS.get(event.author))
+            if line:
+                yield line
+            if event.author == "content_builder" and event.content and event.content.parts:
+                # Collect content_builder events separately
+                content_builder_events.append(event)
 
             # Accumulate final text from all events
             if event.content and event.content.parts:
@@ -110,7 +193,7 @@ async def chat_stream(request: SimpleChatRequest):
 
         # Get the final session to access the state
         final_session = await runner.session_service.get_session(
-            session_id=request.session_id, app_name=adk_app.name, user_id=request.user_id
+            session_id=request.session_id, app_name=adk_app.name, user_id=request.user_id, config=STATE_ONLY
         )
         
         # Priority 1: Try to get content from session state (content_output)
@@ -148,7 +231,7 @@ async def chat_stream(request: SimpleChatRequest):
                 # If no obvious content key, convert the whole dict to JSON string
                 result_text = json.dumps(content_output, indent=2)
         else:
-            result_text = content_output if content_output else final_text.strip()
+            result_text = content_output if content_output else (f"Error: {error}" if error else final_text.strip())
         
         # Ensure result_text is a string and handle None case
         if result_text is None:
@@ -164,18 +247,154 @@ async def chat_stream(request: SimpleChatRequest):
         # Send final result
         yield json.dumps({"type": "result", "text": result_text}) + "\n"
 
-    return StreamingResponse(event_generator(), media_type="application/x-ndjson")
+    return StreamingResponse(
+        traced_stream(event_generator(), "pipeline", entry="chat_stream"), media_type="application/x-ndjson"
+    )
+
+# --- Batch Drafting ---
+# Upper bound on batch items running through the pipeline at once; the per-stage
+# limits in app.scheduler decide how their remote calls interleave.
+BATCH_MAX_IN_FLIGHT = int(os.environ.get("BATCH_MAX_IN_FLIGHT", "16"))
+
+class BatchItem(BaseModel):
+    use_case: str
+    id: str | None = None
+
+class BatchRequest(BaseModel):
+    items: list[BatchItem]
+    user_id: str = "batch_user"
+    # Applied to every item
+    time_budget_seconds: float | None = None
+    token_budget: int | None = None
+
+async def _run_batch_item(batch_id: str, item_id: str, use_case: str, user_id: str, budget: dict) -> dict:
+    """Drives one use case through the pipeline in its own session."""
+    started = time.perf_counter()
+    session = await runner.session_service.create_session(
+        app_name=adk_app.name,
+        user_id=user_id,
+        session_id=f"batch-{batch_id}-{item_id}",
+        # Puts the item's remote calls under the per-stage limits
+        state={BATCH_STATE_KEY: batch_id},
+    )
+    user_msg = genai_types.Content(
+        role="user",
+        parts=[genai_types.Part.from_text(text=f"Draft a binding AI Constitution for this use case: {use_case}")],
+    )
+
+    error = None
+    async for event in runner.run_async(
+        user_id=user_id, session_id=session.id, new_message=user_msg, state_delta=budget
+    ):
+        if event.error_message:
+            error = event.error_message
+
+    final_session = await runner.session_service.get_session(
+        session_id=session.id, app_name=adk_app.name, user_id=user_id, config=STATE_ONLY
+    )
+    content_output = final_session.state.get("content_output") if final_session else None
+    elapsed = round(time.perf_counter() - started, 3)
+
+    if not content_output:
+        return {"type": "error", "id": item_id, "error": error or "No content generated", "elapsed_seconds": elapsed}
+    if not isinstance(content_output, str):
+        content_output = json.dumps(content_output)
+    return {"type": "result", "id": item_id, "text": content_output, "elapsed_seconds": elapsed}
+
+@app.post("/api/batch")
+async def batch(request: BatchRequest):
+    """Drafts constitutions for many use cases, streaming each result as it finishes."""
+    item_ids = [item.id or str(index) for index, item in enumerate(request.items)]
+    if len(set(item_ids)) != len(item_ids):
+        raise HTTPException(status_code=400, detail="Batch item ids must be unique")
+
+    batch_id = uuid.uuid4().hex[:8]
+
+    async def event_generator():
+        started = time.perf_counter()
+        yield json.dumps({"type": "batch_start", "batch_id": batch_id, "count": len(item_ids)}) + "\n"
+
+        results: asyncio.Queue = asyncio.Queue()
+        in_flight = asyncio.Semaphore(max(1, BATCH_MAX_IN_FLIGHT))
+
+        async def worker(item_id: str, use_case: str) -> None:
+            async with in_flight:
+                try:
+                    with span("pipeline", current=True, entry="batch"):
+                        result = await _run_batch_item(
+                            batch_id, item_id, use_case, request.user_id,
+                            budget_state(request.time_budget_seconds, request.token_budget),
+                        )
+                except Exception as e:
+                    logger.exception(f"[BATCH {batch_id}] Item {item_id} failed")
+                    result = {"type": "error", "id": item_id, "error": str(e)}
+            await results.put(result)
+
+        tasks = [
+            asyncio.create_task(worker(item_id, item.use_case))
+            for item_id, item in zip(item_ids, request.items)
+        ]
+        succeeded = 0
+        try:
+            for _ in tasks:
+                result = await results.get()
+                succeeded += result["type"] == "result"
+                yield json.dumps(result) + "\n"
+        finally:
+            # Client went away mid-batch: stop the remaining items
+            for task in tasks:
+                task.cancel()
+
+        yield json.dumps({
+            "type": "batch_complete",
+            "batch_id": batch_id,
+            "succeeded": succeeded,
+            "failed": len(tasks) - succeeded,
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
+        }) + "\n"
+
+    return StreamingResponse(traced_stream(event_generator(), "batch"), media_type="application/x-ndjson")
+
+@app.get("/api/batch/stats")
+def batch_stats() -> dict:
+    return {"max_in_flight": BATCH_MAX_IN_FLIGHT, "stages": stage_scheduler.stats()}
+
+@app.get("/agent_cards/stats")
+def agent_card_stats() -> dict:
+    return agent_card_cache.stats()
+
+@app.get("/compaction/stats")
+def context_compaction_stats() -> dict:
+    return compaction_stats.stats()
+
+@app.get("/speculation/stats")
+def speculative_drafting_stats() -> dict:
+    return speculation_stats.stats()
+
+@app.get("/transport/stats")
+def transport_stats() -> dict:
+    return shared_transport.stats()
 
 @app.post("/feedback")
 def collect_feedback(feedback: Feedback) -> dict[str, str]:
     logger.info(f"Feedback received: {feedback.model_dump()}")
     return {"status": "success"}
 
-# Mount frontend from the copied location
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics() -> str:
+    return metrics.render()
+
+@app.get("/startup")
+def startup_report():
+    return startup.stats()
+
+# Mount frontend from the copied location (last, so it does not shadow the routes above)
 frontend_path = os.path.join(os.path.dirname(__file__), "..", "frontend")
 if os.path.exists(frontend_path):
     app.mount("/", StaticFiles(directory=frontend_path, html=True), name="frontend")
 
+startup.mark("app_ready")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
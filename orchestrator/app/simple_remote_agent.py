@@ -7,6 +7,9 @@ from google.adk.agents.invocation_context import InvocationContext
 from google.adk.events import Event
 from google.genai import types as genai_types
 
+from app.event_index import session_index
+from app.transport import stage_client
+
 logger = logging.getLogger(__name__)
 
 from pydantic import PrivateAttr
@@ -27,7 +30,8 @@ class SimpleRemoteAgent(BaseAgent):
     ):
         super().__init__(name=name, description=description, base_url=base_url, **kwargs)
         self.base_url = base_url.rstrip("/")
-        self._client = httpx.AsyncClient(timeout=60.0)
+        # Pooled client shared with the other remote agents; per-stage timeout via A2A_TIMEOUT_<NAME>
+        self._client = stage_client(name, default_timeout=60.0)
 
     @property
     def client(self):
@@ -39,15 +43,7 @@ class SimpleRemoteAgent(BaseAgent):
         """Sends the user message to the remote agent and yields the response."""
         
         # Extract the last user message text
-        user_message = ""
-        for event in reversed(ctx.session.events):
-            if event.content and event.content.parts:
-                for part in event.content.parts:
-                    if part.text:
-                        user_message = part.text
-                        break
-            if user_message:
-                break
+        user_message = session_index.last_user_text(ctx.session)
         
         if not user_message:
             logger.warning(f"[{self.name}] No user message found to send.")
@@ -89,4 +85,5 @@ class SimpleRemoteAgent(BaseAgent):
             )
 
     async def close(self):
-        await self.client.aclose()
+        # The pooled client is shared process-wide and outlives individual agents
+        pass
@@ -0,0 +1,231 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, AsyncGenerator, List, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+
+from app.compaction import compact_feedback, fit_to_budget
+from app.remote_agent import PipelineRemoteAgent, replay_events
+from app.stream_parser import JudgeFeedbackStreamParser
+from app.telemetry import span
+
+logger = logging.getLogger(__name__)
+
+# Start the builder from the judge's streamed ruling instead of waiting for the loop to finish
+SPECULATIVE_DRAFTING = os.environ.get("SPECULATIVE_DRAFTING", "false").lower() == "true"
+# Approved or amended principles the streamed ruling needs before drafting starts
+MIN_APPROVED = int(os.environ.get("SPECULATION_MIN_APPROVED", "1"))
+# Also wait for the tone guidance and require the final one to match (see _draft_basis)
+MATCH_GUIDANCE = os.environ.get("SPECULATION_MATCH_GUIDANCE", "false").lower() == "true"
+
+
+# --- Stats ---
+class SpeculationStats:
+    """Outcomes of speculative drafts and the builder time they took off the critical path."""
+
+    def __init__(self) -> None:
+        self.started = 0
+        self.hits = 0
+        self.discarded = 0
+        self.abandoned = 0
+        self.time_saved_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, outcome: str, saved: float = 0.0) -> None:
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+            self.time_saved_seconds += saved
+
+    def stats(self) -> dict:
+        with self._lock:
+            decided = self.hits + self.discarded
+            return {
+                "enabled": SPECULATIVE_DRAFTING,
+                "min_approved": MIN_APPROVED,
+                "match_guidance": MATCH_GUIDANCE,
+                "started": self.started,
+                "hits": self.hits,
+                "discarded": self.discarded,
+                "abandoned": self.abandoned,
+                "hit_rate": round(self.hits / decided, 3) if decided else None,
+                "time_saved_seconds": round(self.time_saved_seconds, 3),
+            }
+
+
+speculation_stats = SpeculationStats()
+
+
+# --- Judge Stream ---
+class JudgeStreamWatcher:
+    """Follows one streamed judge ruling and tells when it is safe to draft from.
+
+    That is once `overall_status` is "pass", the verdicts and the mandatory
+    constraints are complete and at least `min_approved` principles survived.
+    Only `interpretive_guidance` is still to come at that point, unless
+    `match_guidance` makes the watcher wait for it as well.
+    """
+
+    def __init__(self, min_approved: int = MIN_APPROVED, match_guidance: bool = MATCH_GUIDANCE):
+        self.min_approved = min_approved
+        self.match_guidance = match_guidance
+        self._parser = JudgeFeedbackStreamParser()
+        self._fields: dict = {}
+
+    def feed(self, chunk: str) -> None:
+        for parsed in self._parser.feed(chunk):
+            self._fields[parsed["name"]] = parsed.get("value", parsed.get("items"))
+
+    def snapshot(self) -> Optional[dict]:
+        verdicts = self._fields.get("verdicts")
+        constraints = self._fields.get("mandatory_constraints")
+        if self._fields.get("overall_status") != "pass" or verdicts is None or constraints is None:
+            return None
+        approved = sum(1 for v in verdicts if isinstance(v, dict) and v.get("status") in ("approved", "amended"))
+        if approved < self.min_approved:
+            return None
+        snapshot = {"overall_status": "pass", "verdicts": verdicts, "mandatory_constraints": constraints}
+        if self.match_guidance:
+            guidance = self._fields.get("interpretive_guidance")
+            if guidance is None:
+                return None
+            snapshot["interpretive_guidance"] = guidance
+        return snapshot
+
+
+def _draft_basis(builder_input: str, match_guidance: bool = MATCH_GUIDANCE) -> Optional[dict]:
+    """The part of a compacted builder input a draft depends on.
+
+    By default the tone guidance is left out, so a draft can be accepted even
+    though the guidance it was written without differs from the final one. The
+    judge streams guidance last, so requiring it would leave nothing to draft
+    ahead of; what the draft must honour (verdicts, amendments and red lines)
+    is compared in full, and the builder's own instruction fixes the formal
+    register. With `match_guidance` the guidance is compared too, and the
+    watcher waits for it before drafting.
+    """
+    try:
+        data = json.loads(builder_input)
+    except (TypeError, json.JSONDecodeError):
+        return None
+    if not isinstance(data, dict):
+        return None
+    if not match_guidance:
+        data.pop("interpretive_guidance", None)
+    return data
+
+
+class _Draft:
+    """A builder call running ahead of the loop on a snapshot of the ruling."""
+
+    def __init__(self, builder: PipelineRemoteAgent, ctx: InvocationContext, builder_input: str):
+        self.builder_input = builder_input
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        session = ctx.session.model_copy(update={"state": {**ctx.session.state, builder.input_key: builder_input}})
+        self._ctx = ctx.model_copy(update={"agent": builder, "session": session})
+        self._builder = builder
+        self.task = asyncio.create_task(self._run())
+
+    async def _run(self) -> List[Event]:
+        try:
+            with span("speculative_draft", stage=self._builder.name):
+                return [event async for event in self._builder._run_async_impl(self._ctx)]
+        finally:
+            self.finished = time.perf_counter()
+
+    async def cancel(self) -> None:
+        if not self.task.done():
+            self.task.cancel()
+        try:
+            await self.task
+        except BaseException:
+            pass
+
+
+# --- Pipeline ---
+class SpeculativePipeline(BaseAgent):
+    """Runs `[governance_loop, builder_compactor, content_builder]` like a SequentialAgent, drafting early.
+
+    While the loop runs, the judge's streamed ruling is watched; once it looks
+    like a pass (see `JudgeStreamWatcher`) the builder is called in the
+    background with the compacted snapshot. After the loop, the snapshot is
+    checked against the compacted final ruling: if the draft depends on nothing
+    that changed, its events are replayed through the builder (so callbacks and
+    state updates happen as usual); otherwise it is discarded and the builder
+    runs normally. A new judge round abandons the draft in flight.
+    """
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        loop, compactor, builder = self.sub_agents
+        watcher: Optional[JudgeStreamWatcher] = None
+        draft: Optional[_Draft] = None
+        try:
+            async for event in loop.run_async(ctx):
+                yield event
+                if event.author != "judge":
+                    continue
+                stage_event = (event.custom_metadata or {}).get("stage_event")
+                if stage_event and stage_event["type"] == "stage_start":
+                    if draft is not None:
+                        await draft.cancel()
+                        speculation_stats.record("abandoned")
+                        draft = None
+                    # Delta retries merge the ruling with earlier ones; only full rulings are drafted from
+                    watcher = None if ctx.session.state.get("researcher_input") else JudgeStreamWatcher()
+                elif event.partial and watcher is not None and draft is None and event.content and event.content.parts:
+                    watcher.feed("".join(p.text for p in event.content.parts if p.text))
+                    draft = self._start(ctx, builder, watcher)
+
+            async for event in compactor.run_async(ctx):
+                yield event
+
+            replay = await self._settle(draft, ctx.session.state.get(builder.input_key))
+            draft = None
+            token = replay_events.set((builder.name, replay) if replay is not None else None)
+            try:
+                async for event in builder.run_async(ctx):
+                    yield event
+            finally:
+                replay_events.reset(token)
+        finally:
+            if draft is not None:
+                await draft.cancel()
+
+    def _start(self, ctx: InvocationContext, builder: PipelineRemoteAgent, watcher: JudgeStreamWatcher) -> Optional[_Draft]:
+        snapshot = watcher.snapshot()
+        if snapshot is None:
+            return None
+        findings = ctx.session.state.get("research_findings")
+        builder_input = fit_to_budget(compact_feedback(snapshot, findings if isinstance(findings, dict) else None))
+        logger.info(f"[{self.name}] Judge ruling looks like a pass, drafting speculatively")
+        speculation_stats.record("started")
+        return _Draft(builder, ctx, builder_input)
+
+    async def _settle(self, draft: Optional[_Draft], final_input: Any) -> Optional[List[Event]]:
+        """Returns the draft's events if it can stand in for the builder call, else discards it."""
+        if draft is None:
+            return None
+        if _draft_basis(draft.builder_input) != _draft_basis(final_input):
+            await draft.cancel()
+            speculation_stats.record("discarded")
+            logger.info(f"[{self.name}] Final ruling differs from the snapshot, speculative draft discarded")
+            return None
+        decided = time.perf_counter()
+        try:
+            events = await draft.task
+        except Exception as e:
+            speculation_stats.record("discarded")
+            logger.warning(f"[{self.name}] Speculative draft failed ({e}), drafting again")
+            return None
+        saved = (draft.finished if draft.finished < decided else decided) - draft.started
+        speculation_stats.record("hits", saved)
+        logger.info(f"[{self.name}] Speculative draft used, {saved:.2f}s taken off the critical path")
+        return events
@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+# Skip slow work at import time (credential discovery, model clients) and do it
+# in a background warmup thread instead; the first request waits for it.
+FAST_START = os.environ.get("FAST_START", "false").lower() == "true"
+
+
+def discover_project() -> None:
+    """Fills GOOGLE_CLOUD_PROJECT from Application Default Credentials.
+
+    This can block for seconds (it may probe the metadata server), which is why
+    fast-start mode runs it off the import path.
+    """
+    if os.environ.get("GOOGLE_CLOUD_PROJECT"):
+        return
+    try:
+        import google.auth
+
+        _, project_id = google.auth.default()
+        if project_id:
+            os.environ.setdefault("GOOGLE_CLOUD_PROJECT", project_id)
+    except Exception:
+        pass
+
+
+def warm_model_clients(agent) -> None:
+    """Builds the model client of every LLM agent in the tree rooted at `agent`."""
+    model = getattr(agent, "canonical_model", None)
+    if model is not None:
+        # Gemini creates its genai client lazily on first use
+        getattr(model, "api_client", None)
+    for sub_agent in agent.sub_agents:
+        warm_model_clients(sub_agent)
+
+
+class StartupReport:
+    """Import-phase and warmup timings for the `/startup` endpoint.
+
+    `mark(phase)` records seconds elapsed since this module was imported, so the
+    difference between consecutive marks is what that phase cost.
+    """
+
+    def __init__(self):
+        self._t0 = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.warmup: Dict[str, float] = {}
+        self.warmup_errors: Dict[str, str] = {}
+        self._ready = threading.Event()
+        self._started = False
+
+    def mark(self, phase: str) -> None:
+        self.phases[phase] = round(time.perf_counter() - self._t0, 4)
+
+    def start_warmup(self, steps: Dict[str, Callable[[], object]]) -> None:
+        """Runs `steps` once, in order, on a daemon thread."""
+        if self._started:
+            return
+        self._started = True
+
+        def run() -> None:
+            for name, step in steps.items():
+                started = time.perf_counter()
+                try:
+                    step()
+                except Exception as e:
+                    self.warmup_errors[name] = str(e)
+                    logger.warning(f"[Startup] Warmup step '{name}' failed: {e}")
+                self.warmup[name] = round(time.perf_counter() - started, 4)
+            self._ready.set()
+            logger.info(f"[Startup] Warmup finished: {self.warmup}")
+
+        threading.Thread(target=run, name="warmup", daemon=True).start()
+
+    async def wait_ready(self) -> None:
+        if self._started and not self._ready.is_set():
+            await asyncio.to_thread(self._ready.wait)
+
+    def stats(self) -> dict:
+        return {
+            "fast_start": FAST_START,
+            "phases": self.phases,
+            "warmup": self.warmup,
+            "warmup_errors": self.warmup_errors,
+            "ready": self._ready.is_set() or not self._started,
+        }
+
+
+startup = StartupReport()
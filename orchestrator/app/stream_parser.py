@@ -0,0 +1,122 @@
+import json
+from typing import Any, Dict, List, Optional
+
+
+class ConstitutionStreamParser:
+    """Incremental JSON scanner for a streamed AIConstitution.
+
+    Feed it the builder's output chunk by chunk; it returns NDJSON-ready events as
+    soon as a top-level field, an article or the axiom list is complete:
+
+        {"type": "field", "name": "title", "value": "..."}
+        {"type": "article", "index": 0, "article": {"title": "...", "content": "..."}}
+        {"type": "axioms", "items": ["IF ... THEN ..."]}
+
+    Only structural characters outside strings are tracked, so each chunk is
+    scanned exactly once regardless of how the stream is split.
+    """
+
+    TOP_LEVEL_FIELDS = ("title", "preamble")
+
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._pos = 0
+        self._stack: List[Dict[str, Any]] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self.article_count = 0
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        events: List[Dict[str, Any]] = []
+        self._buffer += chunk
+        buffer = self._buffer
+
+        for i in range(self._pos, len(buffer)):
+            c = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._on_string(buffer[self._string_start : i + 1], events)
+            elif c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c == "{":
+                self._stack.append({"type": "object", "start": i, "key": None, "expect_key": True})
+            elif c == "[":
+                self._stack.append({"type": "array", "start": i})
+            elif c in "}]":
+                if self._stack:
+                    frame = self._stack.pop()
+                    self._on_close(frame, buffer[frame["start"] : i + 1], events)
+            elif c == ":" and self._top_is_object():
+                self._stack[-1]["expect_key"] = False
+            elif c == "," and self._top_is_object():
+                self._stack[-1]["expect_key"] = True
+
+        self._pos = len(buffer)
+        return events
+
+    # --- Internals ---
+    def _top_is_object(self) -> bool:
+        return bool(self._stack) and self._stack[-1]["type"] == "object"
+
+    def _root_key(self) -> Optional[str]:
+        return self._stack[0].get("key") if self._stack else None
+
+    def _on_string(self, raw: str, events: List[Dict[str, Any]]) -> None:
+        if not self._top_is_object():
+            return
+        frame = self._stack[-1]
+        value = json.loads(raw)
+        if frame["expect_key"]:
+            frame["key"] = value
+        elif len(self._stack) == 1 and frame["key"] in self.TOP_LEVEL_FIELDS:
+            events.append({"type": "field", "name": frame["key"], "value": value})
+
+    def _on_close(self, frame: Dict[str, Any], raw: str, events: List[Dict[str, Any]]) -> None:
+        depth = len(self._stack)
+        # An object directly inside the root's "articles" array
+        if (
+            frame["type"] == "object"
+            and depth == 2
+            and self._stack[1]["type"] == "array"
+            and self._root_key() == "articles"
+        ):
+            try:
+                article = json.loads(raw)
+            except json.JSONDecodeError:
+                return
+            events.append({"type": "article", "index": self.article_count, "article": article})
+            self.article_count += 1
+        elif frame["type"] == "array" and depth == 1 and self._root_key() == "citable_axioms":
+            try:
+                events.append({"type": "axioms", "items": json.loads(raw)})
+            except json.JSONDecodeError:
+                return
+
+
+class JudgeFeedbackStreamParser(ConstitutionStreamParser):
+    """Incremental JSON scanner for a streamed JudgeFeedback.
+
+    Uses the same scanning as `ConstitutionStreamParser` and returns each
+    top-level field and list as soon as it is complete:
+
+        {"type": "field", "name": "overall_status", "value": "pass"}
+        {"type": "list", "name": "verdicts", "items": [{"principle_name": "...", ...}]}
+        {"type": "list", "name": "mandatory_constraints", "items": ["..."]}
+    """
+
+    TOP_LEVEL_FIELDS = ("overall_status", "interpretive_guidance")
+    TOP_LEVEL_LISTS = ("verdicts", "mandatory_constraints")
+
+    def _on_close(self, frame: Dict[str, Any], raw: str, events: List[Dict[str, Any]]) -> None:
+        if frame["type"] == "array" and len(self._stack) == 1 and self._root_key() in self.TOP_LEVEL_LISTS:
+            try:
+                events.append({"type": "list", "name": self._root_key(), "items": json.loads(raw)})
+            except json.JSONDecodeError:
+                return
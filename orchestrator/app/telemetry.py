@@ -0,0 +1,253 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Sequence, Tuple, TypeVar
+
+from opentelemetry import trace
+from opentelemetry.context import Context
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SpanExporter,
+    SpanExportResult,
+)
+
+logger = logging.getLogger(__name__)
+
+# otlp (OTEL_EXPORTER_OTLP_* settings), gcp (Cloud Trace), file (JSON lines), console or none.
+# Spans are always exported off the request path by a BatchSpanProcessor (OTEL_BSP_* settings).
+TRACES_EXPORTER = os.environ.get("OTEL_TRACES_EXPORTER", "none").lower()
+TRACES_FILE = os.environ.get("OTEL_TRACES_FILE", "traces.jsonl")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+T = TypeVar("T")
+
+
+# --- Tracing ---
+class JsonLinesSpanExporter(SpanExporter):
+    """Appends every finished span to a file, one JSON object per line."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = "".join(json.dumps(json.loads(span.to_json())) + "\n" for span in spans)
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+        except OSError as e:
+            logger.warning(f"[Telemetry] Could not write spans to {self.path}: {e}")
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+
+def _exporter() -> Optional[SpanExporter]:
+    if TRACES_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        return OTLPSpanExporter()
+    if TRACES_EXPORTER == "gcp":
+        from opentelemetry.exporter.cloud_trace import CloudTraceSpanExporter
+
+        return CloudTraceSpanExporter()
+    if TRACES_EXPORTER == "file":
+        return JsonLinesSpanExporter(TRACES_FILE)
+    if TRACES_EXPORTER == "console":
+        return ConsoleSpanExporter()
+    return None
+
+
+def setup_tracing(service_name: str) -> TracerProvider:
+    """Installs the global tracer provider; ADK's own agent and LLM spans go through it too."""
+    current = trace.get_tracer_provider()
+    if isinstance(current, TracerProvider):
+        # Co-located services share the orchestrator's provider
+        return current
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    exporter = _exporter()
+    if exporter is not None:
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+        logger.info(f"[Telemetry] Exporting traces via '{TRACES_EXPORTER}'")
+    trace.set_tracer_provider(provider)
+    return provider
+
+
+tracer = trace.get_tracer("ai-constitution-drafter")
+
+
+# --- Metrics ---
+class _Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self) -> None:
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+        self.total += seconds
+        self.count += 1
+
+
+class Metrics:
+    """Latency histograms and in-flight gauges per (operation, labels), in Prometheus text format."""
+
+    def __init__(self) -> None:
+        self._histograms: Dict[Tuple[str, Labels], _Histogram] = {}
+        self._in_flight: Dict[Tuple[str, Labels], int] = {}
+        self._errors: Dict[Tuple[str, Labels], int] = {}
+        self._lock = threading.Lock()
+
+    def start(self, key: Tuple[str, Labels]) -> None:
+        with self._lock:
+            self._in_flight[key] = self._in_flight.get(key, 0) + 1
+
+    def finish(self, key: Tuple[str, Labels], seconds: float, failed: bool) -> None:
+        with self._lock:
+            self._in_flight[key] -= 1
+            self._histograms.setdefault(key, _Histogram()).observe(seconds)
+            if failed:
+                self._errors[key] = self._errors.get(key, 0) + 1
+
+    @staticmethod
+    def _labels(operation: str, labels: Labels, extra: str = "") -> str:
+        pairs = [f'operation="{operation}"'] + [f'{k}="{v}"' for k, v in labels]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}"
+
+    def render(self) -> str:
+        lines = [
+            "# HELP operation_duration_seconds Latency of pipeline operations.",
+            "# TYPE operation_duration_seconds histogram",
+        ]
+        with self._lock:
+            for (operation, labels), hist in sorted(self._histograms.items()):
+                for bound, count in zip(LATENCY_BUCKETS, hist.counts):
+                    le = f'le="{bound}"'
+                    lines.append(f"operation_duration_seconds_bucket{self._labels(operation, labels, le)} {count}")
+                le = 'le="+Inf"'
+                lines.append(f"operation_duration_seconds_bucket{self._labels(operation, labels, le)} {hist.count}")
+                lines.append(f"operation_duration_seconds_sum{self._labels(operation, labels)} {hist.total:.6f}")
+                lines.append(f"operation_duration_seconds_count{self._labels(operation, labels)} {hist.count}")
+            lines += ["# HELP operations_in_flight Operations currently running.", "# TYPE operations_in_flight gauge"]
+            for (operation, labels), value in sorted(self._in_flight.items()):
+                lines.append(f"operations_in_flight{self._labels(operation, labels)} {value}")
+            lines += ["# HELP operation_errors_total Operations that raised.", "# TYPE operation_errors_total counter"]
+            for (operation, labels), value in sorted(self._errors.items()):
+                lines.append(f"operation_errors_total{self._labels(operation, labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+@contextmanager
+def span(
+    operation: str, current: bool = False, parent: Optional[Context] = None, **labels: str
+) -> Iterator[trace.Span]:
+    """Times `operation` as a span plus a histogram sample, and counts it as in flight meanwhile.
+
+    `labels` become span attributes and metric labels, so keep them low-cardinality.
+    The span is a child of `parent` (default: the active span). `current=True` also makes it the active
+    span for the block, so spans started inside (ADK's included) nest under it;
+    leave it off for blocks that yield from an async generator mid-span.
+    """
+    key = (operation, tuple(sorted(labels.items())))
+    otel_span = tracer.start_span(operation, context=parent, attributes=labels)
+    metrics.start(key)
+    started = time.perf_counter()
+    failed = False
+    try:
+        if current:
+            with trace.use_span(otel_span, end_on_exit=False, record_exception=False, set_status_on_exception=False):
+                yield otel_span
+        else:
+            yield otel_span
+    except BaseException as e:
+        failed = not isinstance(e, GeneratorExit)
+        if failed:
+            otel_span.record_exception(e)
+            otel_span.set_status(trace.Status(trace.StatusCode.ERROR, str(e)))
+        raise
+    finally:
+        metrics.finish(key, time.perf_counter() - started, failed)
+        otel_span.end()
+
+
+async def traced_stream(stream: AsyncIterator[T], operation: str, **labels: str) -> AsyncIterator[T]:
+    """Wraps an async iterator (e.g. a streaming response body) in a `span` that lasts until it is exhausted."""
+    with span(operation, current=True, **labels):
+        async for item in stream:
+            yield item
+
+
+# --- Token Usage ---
+class TokenUsage:
+    """Model calls and tokens spent while serving one request."""
+
+    __slots__ = ("calls", "prompt_tokens", "output_tokens")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {"calls": self.calls, "prompt_tokens": self.prompt_tokens, "output_tokens": self.output_tokens}
+
+
+_token_usage: ContextVar[Optional[TokenUsage]] = ContextVar("token_usage", default=None)
+
+
+@contextmanager
+def track_usage() -> Iterator[TokenUsage]:
+    """Collects `record_usage` calls made in this context (and tasks spawned from it)."""
+    usage = TokenUsage()
+    token = _token_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _token_usage.reset(token)
+
+
+def record_usage(usage_metadata: Any) -> None:
+    """Adds a genai `usage_metadata` to the usage being tracked, if any."""
+    usage = _token_usage.get()
+    if usage is None or usage_metadata is None:
+        return
+    usage.calls += 1
+    usage.prompt_tokens += usage_metadata.prompt_token_count or 0
+    usage.output_tokens += usage_metadata.candidates_token_count or 0
+
+
+class UsageReportingQueue:
+    """Event queue proxy that stamps the usage so far into every outgoing A2A event's metadata.
+
+    The caller keeps the value from the last event it receives, which covers the
+    whole request.
+    """
+
+    def __init__(self, inner: Any, usage: TokenUsage):
+        self._inner = inner
+        self._usage = usage
+
+    async def enqueue_event(self, event: Any) -> None:
+        if hasattr(event, "metadata"):
+            event.metadata = {**(event.metadata or {}), "usage": self._usage.as_dict()}
+        await self._inner.enqueue_event(event)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._inner, name)
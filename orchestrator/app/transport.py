@@ -0,0 +1,278 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import AsyncIterator, Deque, Dict, Optional, Tuple
+
+import httpx
+from opentelemetry import propagate
+
+logger = logging.getLogger(__name__)
+
+# Failures where the request never reached the agent, so a retry cannot duplicate work
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+# Refusals issued before the agent took the request on
+RETRYABLE_STATUS = {429, 503}
+# Failures that can happen after the agent received the request (a dropped
+# connection mid-response, a gateway giving up on a busy upstream); retrying
+# these is only safe for idempotent requests. A2A `message/send` POSTs are not:
+# a repeat runs the model again and adds its messages to the remote session twice.
+IDEMPOTENT_RETRYABLE_ERRORS = RETRYABLE_ERRORS + (httpx.RemoteProtocolError,)
+IDEMPOTENT_RETRYABLE_STATUS = RETRYABLE_STATUS | {502, 504}
+_IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def _env_float(name: str, default: Optional[float]) -> Optional[float]:
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+class TransferStats:
+    """Request and response body bytes of the A2A calls made in one context."""
+
+    __slots__ = ("sent", "received")
+
+    def __init__(self) -> None:
+        self.sent = 0
+        self.received = 0
+
+
+# Set by a pipeline stage around its remote call; None means "not counted"
+transfer_stats: ContextVar[Optional[TransferStats]] = ContextVar("transfer_stats", default=None)
+
+
+class _CountingStream(httpx.AsyncByteStream):
+    def __init__(self, inner: httpx.AsyncByteStream, stats: TransferStats):
+        self.inner = inner
+        self.stats = stats
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self.inner:
+            self.stats.received += len(chunk)
+            yield chunk
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+class LatencyTracker:
+    """Rolling window of response latencies per (host, path)."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[Tuple[str, str], Deque[float]] = {}
+
+    def record(self, key: Tuple[str, str], seconds: float) -> None:
+        self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, key: Tuple[str, str], pct: float, min_samples: int) -> Optional[float]:
+        samples = self._samples.get(key)
+        if not samples or len(samples) < min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def stats(self) -> dict:
+        return {
+            f"{host}{path}": {
+                "samples": len(samples),
+                "p50": self.percentile((host, path), 50, 1),
+                "p95": self.percentile((host, path), 95, 1),
+            }
+            for (host, path), samples in self._samples.items()
+        }
+
+
+class ResilientTransport(httpx.AsyncBaseTransport):
+    """Wraps a pooled transport with backoff retries and optional request hedging.
+
+    Retries of non-idempotent requests (every A2A JSON-RPC POST) only cover
+    failures where the agent cannot have started work: connection errors, 429
+    and 503. Idempotent requests (agent card GETs) are also retried on dropped
+    connections and 502/504.
+
+    When `hedge_percentile` is set, an idempotent, non-streaming request that is
+    still outstanding after that percentile of recent latencies to the same
+    endpoint gets a duplicate; whichever answers first wins and the other is
+    cancelled. `hedge_non_idempotent` extends this to agent calls, at the cost
+    of running the duplicate's model work too (it is not cancelled server-side)
+    and leaving its messages in the remote agent's session.
+    """
+
+    def __init__(
+        self,
+        inner: httpx.AsyncBaseTransport,
+        retries: int = 2,
+        backoff_base: float = 0.25,
+        backoff_max: float = 4.0,
+        hedge_percentile: Optional[float] = None,
+        hedge_min_samples: int = 20,
+        hedge_non_idempotent: bool = False,
+    ):
+        self.inner = inner
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_non_idempotent = hedge_non_idempotent
+        self.latencies = LatencyTracker()
+        self.retried = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    # --- Retries ---
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _send_with_retries(self, request: httpx.Request) -> httpx.Response:
+        idempotent = request.method in _IDEMPOTENT_METHODS
+        retryable_errors = IDEMPOTENT_RETRYABLE_ERRORS if idempotent else RETRYABLE_ERRORS
+        retryable_status = IDEMPOTENT_RETRYABLE_STATUS if idempotent else RETRYABLE_STATUS
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            try:
+                response = await self.inner.handle_async_request(request)
+            except retryable_errors as e:
+                if last_attempt:
+                    raise
+                logger.warning(f"[Transport] {request.url} failed ({type(e).__name__}), retrying")
+            else:
+                if response.status_code not in retryable_status or last_attempt:
+                    return response
+                await response.aclose()
+                logger.warning(f"[Transport] {request.url} returned {response.status_code}, retrying")
+            self.retried += 1
+            await asyncio.sleep(self._backoff(attempt))
+        raise RuntimeError("unreachable")
+
+    # --- Hedging ---
+    def _hedge_delay(self, request: httpx.Request, key: Tuple[str, str]) -> Optional[float]:
+        if self.hedge_percentile is None:
+            return None
+        if request.method not in _IDEMPOTENT_METHODS and not self.hedge_non_idempotent:
+            return None
+        # Streams (SSE) are consumed after the headers arrive; duplicating them is not worth it
+        if "text/event-stream" in request.headers.get("accept", ""):
+            return None
+        return self.latencies.percentile(key, self.hedge_percentile, self.hedge_min_samples)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        # W3C trace context, so the agent's spans join the pipeline's trace
+        propagate.inject(request.headers)
+        await request.aread()
+        response = await self._send(request)
+        stats = transfer_stats.get()
+        if stats is not None:
+            stats.sent += len(request.content)
+            response.stream = _CountingStream(response.stream, stats)
+        return response
+
+    async def _send(self, request: httpx.Request) -> httpx.Response:
+        key = (request.url.host, request.url.path)
+        started = time.perf_counter()
+        delay = self._hedge_delay(request, key)
+
+        if delay is None:
+            response = await self._send_with_retries(request)
+            self.latencies.record(key, time.perf_counter() - started)
+            return response
+
+        primary = asyncio.create_task(self._send_with_retries(request))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            response = primary.result()
+            self.latencies.record(key, time.perf_counter() - started)
+            return response
+
+        self.hedged += 1
+        hedge = asyncio.create_task(self._send_with_retries(request))
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    if task is hedge:
+                        self.hedge_wins += 1
+                    self.latencies.record(key, time.perf_counter() - started)
+                    return task.result()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+                task.add_done_callback(_close_abandoned)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "retries": self.retried,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "latency": self.latencies.stats(),
+        }
+
+
+def _close_abandoned(task: "asyncio.Task[httpx.Response]") -> None:
+    """Releases the connection of a request that lost the hedge race but still completed."""
+    if task.cancelled() or task.exception() is not None:
+        return
+    asyncio.ensure_future(task.result().aclose())
+
+
+# --- Shared Pool ---
+def _http2_enabled() -> bool:
+    if os.environ.get("A2A_HTTP2", "false").lower() != "true":
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("[Transport] A2A_HTTP2=true but the 'h2' package is not installed; using HTTP/1.1")
+        return False
+    return True
+
+
+_pool = httpx.AsyncHTTPTransport(
+    http2=_http2_enabled(),
+    limits=httpx.Limits(
+        max_connections=int(os.environ.get("A2A_POOL_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(os.environ.get("A2A_POOL_MAX_KEEPALIVE", "20")),
+        keepalive_expiry=float(os.environ.get("A2A_POOL_KEEPALIVE_SECONDS", "30")),
+    ),
+)
+
+shared_transport = ResilientTransport(
+    _pool,
+    retries=int(os.environ.get("A2A_RETRIES", "2")),
+    backoff_base=float(os.environ.get("A2A_RETRY_BACKOFF_SECONDS", "0.25")),
+    hedge_percentile=_env_float("A2A_HEDGE_PERCENTILE", None),
+    hedge_min_samples=int(os.environ.get("A2A_HEDGE_MIN_SAMPLES", "20")),
+    # Duplicated agent calls run the model twice and leave both exchanges in the remote session
+    hedge_non_idempotent=os.environ.get("A2A_HEDGE_AGENT_CALLS", "false").lower() == "true",
+)
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def stage_client(stage: str, default_timeout: float = 600.0) -> httpx.AsyncClient:
+    """An HTTP client for one pipeline stage, sharing the process-wide pool.
+
+    The timeout comes from A2A_TIMEOUT_<STAGE> (e.g. A2A_TIMEOUT_JUDGE), then
+    A2A_TIMEOUT_SECONDS, then `default_timeout`.
+    """
+    if stage not in _clients:
+        timeout = _env_float(
+            f"A2A_TIMEOUT_{stage.upper()}",
+            _env_float("A2A_TIMEOUT_SECONDS", default_timeout),
+        )
+        _clients[stage] = httpx.AsyncClient(transport=shared_transport, timeout=httpx.Timeout(timeout))
+    return _clients[stage]
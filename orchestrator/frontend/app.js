@@ -3,6 +3,13 @@ const topicInput = document.getElementById('topic-input');
 const createButton = document.getElementById('create-button');
 const progressContainer = document.getElementById('progress-container');
 const statusText = document.getElementById('status-text');
+const livePreview = document.getElementById('live-preview');
+const previewTitle = document.getElementById('preview-title');
+const previewPreamble = document.getElementById('preview-preamble');
+const previewArticles = document.getElementById('preview-articles');
+const stageTimings = document.getElementById('stage-timings');
+
+const STAGE_LABELS = { researcher: 'Legal Research', judge: 'Supreme Court', content_builder: 'Drafting' };
 
 const sessionId = 'session-' + Math.random().toString(36).substring(2, 15);
 
@@ -28,6 +35,37 @@ function updateStatus(text) {
     }
 }
 
+// Render constitution pieces as the orchestrator streams them in
+function renderStreamEvent(data) {
+    livePreview.classList.remove('hidden');
+    if (data.type === 'field') {
+        if (data.name === 'title') previewTitle.textContent = data.value;
+        if (data.name === 'preamble') previewPreamble.textContent = data.value;
+    } else if (data.type === 'article') {
+        updateStatus(`✍️ Drafted ${data.article.title}`);
+        const article = document.createElement('div');
+        article.className = 'preview-article';
+        const heading = document.createElement('h4');
+        heading.textContent = data.article.title;
+        const body = document.createElement('p');
+        body.textContent = data.article.content;
+        article.append(heading, body);
+        previewArticles.appendChild(article);
+    }
+}
+
+// One line per finished stage: which agent, which loop iteration, how long, how many tokens
+function renderStageEnd(data) {
+    stageTimings.classList.remove('hidden');
+    const item = document.createElement('li');
+    let text = `${STAGE_LABELS[data.stage] || data.stage} (round ${data.iteration}): ${(data.elapsed_ms / 1000).toFixed(1)}s`;
+    if (data.tokens) {
+        text += ` · ${(data.tokens.prompt_tokens + data.tokens.output_tokens).toLocaleString()} tokens`;
+    }
+    item.textContent = text;
+    stageTimings.appendChild(item);
+}
+
 createForm.addEventListener('submit', async (e) => {
     e.preventDefault();
     const topic = topicInput.value.trim();
@@ -66,6 +104,10 @@ createForm.addEventListener('submit', async (e) => {
                     const data = JSON.parse(line);
                     if (data.type === 'progress') {
                         updateStatus(data.text);
+                    } else if (data.type === 'stage_end') {
+                        renderStageEnd(data);
+                    } else if (data.type === 'field' || data.type === 'article') {
+                        renderStreamEvent(data);
                     } else if (data.type === 'result') {
                         // Backend returns a JSON string, so we save it directly
                         localStorage.setItem('currentConstitution', data.text);
@@ -0,0 +1,118 @@
+import asyncio
+from typing import AsyncGenerator, List
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from app.budget import BudgetedLoop, approved_count, judge_passed
+
+
+class ScriptedRound(BaseAgent):
+    """Stands in for the research and judge stages: each run plays the next scripted round."""
+
+    rounds: List[dict]
+    tokens: int = 100
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        iteration = len([e for e in ctx.session.events if e.author == self.name]) + 1
+        script = self.rounds[min(iteration, len(self.rounds)) - 1]
+        approved, passed = script["approved"], script.get("pass", False)
+        yield Event(
+            author=self.name,
+            custom_metadata={"stage_event": {
+                "type": "stage_end",
+                "stage": self.name,
+                "tokens": {"prompt_tokens": self.tokens // 2, "output_tokens": self.tokens - self.tokens // 2},
+            }},
+            actions=EventActions(state_delta={
+                "research_findings": f"findings {iteration}",
+                "judge_feedback": {
+                    "overall_status": "pass" if passed else "fail",
+                    "verdicts": [{"status": "approved"}] * approved + [{"status": "rejected"}],
+                },
+            }),
+        )
+
+
+def _run(loop: BudgetedLoop, state: dict = None):
+    runner = InMemoryRunner(agent=loop, app_name="budget_test")
+
+    async def run():
+        session = await runner.session_service.create_session(
+            app_name="budget_test", user_id="u", state=state or {}
+        )
+        events = [
+            event async for event in runner.run_async(
+                user_id="u",
+                session_id=session.id,
+                new_message=types.Content(role="user", parts=[types.Part(text="go")]),
+            )
+        ]
+        session = await runner.session_service.get_session(
+            app_name="budget_test", user_id="u", session_id=session.id
+        )
+        return events, session.state
+
+    events, final_state = asyncio.run(run())
+    decisions = [
+        e.custom_metadata["stage_event"] for e in events
+        if (e.custom_metadata or {}).get("stage_event", {}).get("type") == "loop_decision"
+    ]
+    return events, decisions, final_state
+
+
+def _loop(rounds: List[dict], **kwargs) -> BudgetedLoop:
+    kwargs.setdefault("time_budget_seconds", 0)
+    kwargs.setdefault("token_budget", 0)
+    return BudgetedLoop(name="loop", sub_agents=[ScriptedRound(name="stage", rounds=rounds)], **kwargs)
+
+
+def test_pass_ends_the_loop_and_counts_tokens():
+    _, decisions, _ = _run(_loop([{"approved": 1, "pass": True}]))
+    assert [d["decision"] for d in decisions] == ["pass"]
+    assert decisions[0]["round_tokens"] == 100
+    assert decisions[0]["tokens_spent"] == 100
+
+
+def test_retries_while_the_budget_covers_the_costliest_round():
+    # 100 tokens a round: after round 1, 150 left covers another; after round 2, 50 does not
+    _, decisions, _ = _run(_loop([{"approved": 1}], token_budget=250))
+    assert [d["decision"] for d in decisions] == ["retry", "partial_pass"]
+    assert [d["tokens_spent"] for d in decisions] == [100, 200]
+
+
+def test_request_budget_overrides_the_default():
+    _, decisions, _ = _run(_loop([{"approved": 1}], token_budget=1000), {"token_budget": 150})
+    assert [d["decision"] for d in decisions] == ["partial_pass"]
+
+
+def test_partial_pass_drafts_from_the_best_round():
+    _, decisions, state = _run(_loop([{"approved": 2}, {"approved": 0}], token_budget=250))
+    assert [d["approved"] for d in decisions] == [2, 0]
+    assert decisions[-1]["decision"] == "partial_pass"
+    assert state["research_findings"] == "findings 1"
+    assert approved_count(state["judge_feedback"]) == 2
+
+
+def test_stops_when_too_few_principles_survive_the_budget():
+    events, decisions, state = _run(_loop([{"approved": 0}], token_budget=150, min_approved=1))
+    assert [d["decision"] for d in decisions] == ["stop"]
+    assert events[-1].error_code == "BUDGET_EXHAUSTED"
+    assert state["content_output"] == ""
+
+
+def test_max_iterations_drafts_from_the_best_round():
+    _, decisions, state = _run(_loop([{"approved": 1}, {"approved": 3}, {"approved": 2}], max_iterations=3))
+    assert [d["decision"] for d in decisions] == ["retry", "retry", "max_iterations"]
+    assert state["research_findings"] == "findings 2"
+
+
+def test_judge_passed_accepts_parsed_and_raw_feedback():
+    assert judge_passed({"overall_status": "pass"})
+    assert judge_passed({"status": "pass"})
+    assert judge_passed('{"overall_status": "pass", "verdicts": []}')
+    assert not judge_passed({"overall_status": "fail"})
+    assert not judge_passed(None)
@@ -0,0 +1,63 @@
+from app.delta_research import merge_feedback, merge_findings
+
+
+def _principle(name: str) -> dict:
+    return {"name": name, "description": f"{name} description"}
+
+
+PREVIOUS = {
+    "context_summary": "Hiring model for loan officers",
+    "applicable_frameworks": ["EU AI Act", "GDPR"],
+    "proposed_principles": [_principle("Fairness"), _principle("Transparency")],
+    "known_risks": ["bias"],
+}
+
+
+def test_replacements_are_added_to_the_approved_principles():
+    new = {
+        "context_summary": "Replacement brief",
+        "applicable_frameworks": ["GDPR", "ISO 42001"],
+        "proposed_principles": [_principle("Accountability")],
+        "known_risks": ["bias", "drift"],
+    }
+    merged = merge_findings(PREVIOUS, new, {"approved_principles": [_principle("Fairness")]})
+    assert [p["name"] for p in merged["proposed_principles"]] == ["Fairness", "Accountability"]
+    assert merged["context_summary"] == "Hiring model for loan officers"
+    assert merged["applicable_frameworks"] == ["EU AI Act", "GDPR", "ISO 42001"]
+    assert merged["known_risks"] == ["bias", "drift"]
+
+
+def test_reproposed_approved_principles_are_not_duplicated():
+    new = {"proposed_principles": [_principle(" fairness "), _principle("Privacy")]}
+    merged = merge_findings(PREVIOUS, new, {"approved_principles": [_principle("Fairness")]})
+    assert [p["name"] for p in merged["proposed_principles"]] == ["Fairness", "Privacy"]
+
+
+def test_first_round_passes_findings_through():
+    new = dict(PREVIOUS)
+    merged = merge_findings(None, new, {})
+    assert merged["proposed_principles"] == PREVIOUS["proposed_principles"]
+    assert merged["context_summary"] == PREVIOUS["context_summary"]
+
+
+def test_unparsed_findings_are_returned_unchanged():
+    assert merge_findings(PREVIOUS, "not json", {}) == "not json"
+
+
+def test_feedback_keeps_approved_verdicts_the_judge_did_not_revisit():
+    previous = {
+        "verdicts": [
+            {"principle_name": "Fairness", "status": "approved"},
+            {"principle_name": "Transparency", "status": "rejected"},
+        ],
+        "mandatory_constraints": ["log decisions"],
+    }
+    new = {
+        "overall_status": "pass",
+        "verdicts": [{"principle_name": "Accountability", "status": "approved"}],
+        "mandatory_constraints": ["log decisions", "human review"],
+    }
+    merged = merge_feedback(previous, new, {"approved_principles": [_principle("Fairness")]})
+    assert [v["principle_name"] for v in merged["verdicts"]] == ["Fairness", "Accountability"]
+    assert merged["mandatory_constraints"] == ["log decisions", "human review"]
+    assert merged["overall_status"] == "pass"
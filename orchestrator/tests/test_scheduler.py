@@ -0,0 +1,40 @@
+import asyncio
+
+from app.scheduler import BATCH_STATE_KEY, StageScheduler
+
+
+async def _peak(scheduler: StageScheduler, state: dict, runs: int) -> int:
+    active = peak = 0
+
+    async def call():
+        nonlocal active, peak
+        async with scheduler.for_run("judge", state):
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    await asyncio.gather(*(call() for _ in range(runs)))
+    return peak
+
+
+def test_batch_runs_share_the_stage_limit():
+    scheduler = StageScheduler({"judge": 2})
+    assert asyncio.run(_peak(scheduler, {BATCH_STATE_KEY: "b1"}, 6)) == 2
+    assert scheduler.stats()["judge"] == {"limit": 2, "active": 0, "waiting": 0, "completed": 6}
+
+
+def test_interactive_runs_bypass_the_stage_limit():
+    scheduler = StageScheduler({"judge": 1})
+    assert asyncio.run(_peak(scheduler, {}, 4)) == 4
+    assert scheduler.stats()["judge"]["completed"] == 0
+
+
+def test_unknown_stage_is_not_limited():
+    scheduler = StageScheduler({"judge": 1})
+
+    async def run():
+        async with scheduler.for_run("researcher", {BATCH_STATE_KEY: "b1"}):
+            return True
+
+    assert asyncio.run(run())
@@ -0,0 +1,108 @@
+import json
+import os
+import subprocess
+import sys
+
+from app.speculation import JudgeStreamWatcher, _draft_basis
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RULING = json.dumps({
+    "overall_status": "pass",
+    "verdicts": [
+        {"principle_name": "Transparency", "status": "approved"},
+        {"principle_name": "Privacy", "status": "rejected"},
+    ],
+    "mandatory_constraints": ["Disclose automated decisions"],
+    "interpretive_guidance": "Plain language.",
+})
+
+
+def _feed(watcher: JudgeStreamWatcher, text: str, chunk_size: int) -> None:
+    for start in range(0, len(text), chunk_size):
+        watcher.feed(text[start : start + chunk_size])
+
+
+def test_watcher_waits_for_verdicts_and_constraints():
+    watcher = JudgeStreamWatcher(min_approved=1)
+    cut = RULING.index('"mandatory_constraints"')
+    _feed(watcher, RULING[:cut], 7)
+    assert watcher.snapshot() is None
+
+    _feed(watcher, RULING[cut:], 7)
+    snapshot = watcher.snapshot()
+    assert snapshot["mandatory_constraints"] == ["Disclose automated decisions"]
+    assert [v["principle_name"] for v in snapshot["verdicts"]] == ["Transparency", "Privacy"]
+
+
+def test_watcher_needs_enough_approved_principles():
+    watcher = JudgeStreamWatcher(min_approved=2)
+    _feed(watcher, RULING, 5)
+    assert watcher.snapshot() is None
+
+
+def test_watcher_ignores_failing_ruling():
+    watcher = JudgeStreamWatcher(min_approved=1)
+    _feed(watcher, RULING.replace('"pass"', '"fail"'), 11)
+    assert watcher.snapshot() is None
+
+
+def test_watcher_can_wait_for_the_guidance():
+    watcher = JudgeStreamWatcher(min_approved=1, match_guidance=True)
+    cut = RULING.index('"interpretive_guidance"')
+    _feed(watcher, RULING[:cut], 9)
+    assert watcher.snapshot() is None
+
+    _feed(watcher, RULING[cut:], 9)
+    assert watcher.snapshot()["interpretive_guidance"] == "Plain language."
+
+
+def test_basis_compares_guidance_only_when_asked():
+    draft = json.dumps({"verdicts": [], "mandatory_constraints": ["A"], "interpretive_guidance": ""})
+    final = json.dumps({"verdicts": [], "mandatory_constraints": ["A"], "interpretive_guidance": "Formal."})
+    assert _draft_basis(draft, match_guidance=False) == _draft_basis(final, match_guidance=False)
+    assert _draft_basis(draft, match_guidance=True) != _draft_basis(final, match_guidance=True)
+
+    changed = json.dumps({"verdicts": [], "mandatory_constraints": ["B"], "interpretive_guidance": ""})
+    assert _draft_basis(draft, match_guidance=False) != _draft_basis(changed, match_guidance=False)
+
+
+# Runs the co-located pipeline in its own interpreter: configuration is read at import time
+_PIPELINE = """
+import asyncio, json
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+from app.agent import app
+from app.speculation import speculation_stats
+
+async def main():
+    runner = Runner(app=app, session_service=InMemorySessionService())
+    session = await runner.session_service.create_session(app_name=app.name, user_id="test")
+    message = types.Content(role="user", parts=[types.Part.from_text(text="Use case: drone delivery")])
+    async for _ in runner.run_async(user_id="test", session_id=session.id, new_message=message):
+        pass
+    print(json.dumps(speculation_stats.stats()))
+
+asyncio.run(main())
+"""
+
+
+def test_draft_starts_with_default_judge_settings(tmp_path):
+    # Verdict memoization and judge streaming keep their defaults
+    env = {
+        **os.environ,
+        "DEPLOYMENT_MODE": "colocated",
+        "MODEL_BACKEND": "fake",
+        "SPECULATIVE_DRAFTING": "true",
+        "JUDGE_VERDICT_DB": str(tmp_path / "verdicts.sqlite3"),
+        "SESSION_DB": str(tmp_path / "sessions.sqlite3"),
+    }
+    for name in ("JUDGE_VERDICT_MEMO_ENABLED", "JUDGE_STREAMING", "CONTEXT_COMPACTION"):
+        env.pop(name, None)
+    result = subprocess.run(
+        [sys.executable, "-c", _PIPELINE], cwd=SERVICE_DIR, env=env, capture_output=True, text=True, timeout=300
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    stats = json.loads(result.stdout.strip().splitlines()[-1])
+    assert stats["started"] >= 1
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from app.stream_parser import ConstitutionStreamParser, JudgeFeedbackStreamParser
+
+CONSTITUTION = json.dumps({
+    "title": "Drone {Delivery} Charter",
+    "preamble": 'We, the "operators", agree:\n',
+    "articles": [
+        {"title": "Article I", "content": "Humans [always] decide."},
+        {"title": "Article II", "content": "Escape \\ characters survive."},
+    ],
+    "citable_axioms": ["IF weather is severe THEN ground the fleet"],
+})
+
+
+def _events(parser, text: str, chunk_size: int) -> list:
+    events = []
+    for start in range(0, len(text), chunk_size):
+        events.extend(parser.feed(text[start : start + chunk_size]))
+    return events
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 17, len(CONSTITUTION)])
+def test_constitution_events_do_not_depend_on_chunking(chunk_size):
+    events = _events(ConstitutionStreamParser(), CONSTITUTION, chunk_size)
+    assert events == [
+        {"type": "field", "name": "title", "value": "Drone {Delivery} Charter"},
+        {"type": "field", "name": "preamble", "value": 'We, the "operators", agree:\n'},
+        {"type": "article", "index": 0, "article": {"title": "Article I", "content": "Humans [always] decide."}},
+        {"type": "article", "index": 1, "article": {"title": "Article II", "content": "Escape \\ characters survive."}},
+        {"type": "axioms", "items": ["IF weather is severe THEN ground the fleet"]},
+    ]
+
+
+def test_article_is_reported_only_once_complete():
+    parser = ConstitutionStreamParser()
+    cut = CONSTITUTION.index("Article II")
+    first = parser.feed(CONSTITUTION[:cut])
+    assert [e["type"] for e in first] == ["field", "field", "article"]
+    assert parser.article_count == 1
+
+
+def test_nested_strings_are_not_taken_for_top_level_fields():
+    text = json.dumps({"articles": [{"title": "not the document title", "content": "x"}], "title": "Real"})
+    events = _events(ConstitutionStreamParser(), text, 4)
+    assert [e for e in events if e["type"] == "field"] == [{"type": "field", "name": "title", "value": "Real"}]
+
+
+def test_judge_feedback_lists_and_fields():
+    ruling = json.dumps({
+        "overall_status": "pass",
+        "verdicts": [{"principle_name": "A", "status": "approved", "reasoning": "[fine]"}],
+        "mandatory_constraints": ["No night flights"],
+        "interpretive_guidance": "Formal.",
+    })
+    events = _events(JudgeFeedbackStreamParser(), ruling, 5)
+    assert events == [
+        {"type": "field", "name": "overall_status", "value": "pass"},
+        {"type": "list", "name": "verdicts", "items": [{"principle_name": "A", "status": "approved", "reasoning": "[fine]"}]},
+        {"type": "list", "name": "mandatory_constraints", "items": ["No night flights"]},
+        {"type": "field", "name": "interpretive_guidance", "value": "Formal."},
+    ]
@@ -0,0 +1,135 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.transport import ResilientTransport
+
+URL = "http://judge:8002/"
+
+
+def _transport(handler, **kwargs) -> ResilientTransport:
+    kwargs.setdefault("backoff_base", 0)
+    return ResilientTransport(httpx.MockTransport(handler), **kwargs)
+
+
+def _send(transport: ResilientTransport, method: str, headers=None) -> httpx.Response:
+    async def run():
+        return await transport.handle_async_request(httpx.Request(method, URL, headers=headers))
+
+    return asyncio.run(run())
+
+
+def _replies(*outcomes):
+    """Handler returning each status (or raising each exception) in turn."""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        outcome = outcomes[min(len(calls), len(outcomes) - 1)]
+        calls.append(request.method)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return httpx.Response(outcome)
+
+    return handler, calls
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_refusals_are_retried_for_agent_calls(status):
+    handler, calls = _replies(status, 200)
+    transport = _transport(handler)
+    assert _send(transport, "POST").status_code == 200
+    assert len(calls) == 2
+    assert transport.stats()["retries"] == 1
+
+
+def test_connect_errors_are_retried_for_agent_calls():
+    handler, calls = _replies(httpx.ConnectError("refused"), 200)
+    assert _send(_transport(handler), "POST").status_code == 200
+    assert len(calls) == 2
+
+
+def test_agent_calls_are_not_retried_once_the_agent_may_have_started():
+    handler, calls = _replies(httpx.RemoteProtocolError("dropped"), 200)
+    with pytest.raises(httpx.RemoteProtocolError):
+        _send(_transport(handler), "POST")
+    assert len(calls) == 1
+
+    for status in (502, 504):
+        handler, calls = _replies(status, 200)
+        assert _send(_transport(handler), "POST").status_code == status
+        assert len(calls) == 1
+
+
+def test_idempotent_requests_are_retried_on_dropped_connections_and_gateway_errors():
+    handler, calls = _replies(httpx.RemoteProtocolError("dropped"), 502, 504, 200)
+    assert _send(_transport(handler, retries=3), "GET").status_code == 200
+    assert len(calls) == 4
+
+
+def test_last_attempt_returns_the_refusal():
+    handler, calls = _replies(503)
+    assert _send(_transport(handler, retries=2), "POST").status_code == 503
+    assert len(calls) == 3
+
+
+def _slow_then_fast():
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.method)
+        if len(calls) == 1:
+            await asyncio.sleep(0.5)
+            return httpx.Response(200, text="primary")
+        return httpx.Response(200, text="hedge")
+
+    return handler, calls
+
+
+def _hedging_transport(handler, **kwargs) -> ResilientTransport:
+    transport = _transport(handler, hedge_percentile=95, hedge_min_samples=1, **kwargs)
+    transport.latencies.record(("judge", "/"), 0.0)
+    return transport
+
+
+def _body(response: httpx.Response) -> str:
+    return asyncio.run(response.aread()).decode()
+
+
+def test_slow_idempotent_request_is_hedged():
+    handler, calls = _slow_then_fast()
+    transport = _hedging_transport(handler)
+    assert _body(_send(transport, "GET")) == "hedge"
+    assert len(calls) == 2
+    assert transport.stats()["hedged"] == 1
+    assert transport.stats()["hedge_wins"] == 1
+
+
+def test_agent_calls_are_not_hedged_by_default():
+    handler, calls = _slow_then_fast()
+    transport = _hedging_transport(handler)
+    assert _body(_send(transport, "POST")) == "primary"
+    assert len(calls) == 1
+    assert transport.stats()["hedged"] == 0
+
+
+def test_agent_calls_are_hedged_when_opted_in():
+    handler, calls = _slow_then_fast()
+    transport = _hedging_transport(handler, hedge_non_idempotent=True)
+    assert _body(_send(transport, "POST")) == "hedge"
+    assert len(calls) == 2
+
+
+def test_streams_are_not_hedged():
+    handler, calls = _slow_then_fast()
+    transport = _hedging_transport(handler)
+    _send(transport, "GET", headers={"accept": "text/event-stream"})
+    assert len(calls) == 1
+
+
+def test_no_hedging_until_enough_samples():
+    handler, calls = _slow_then_fast()
+    transport = _transport(handler, hedge_percentile=95, hedge_min_samples=20)
+    _send(transport, "GET")
+    assert len(calls) == 1
+    assert transport.stats()["latency"]["judge/"]["samples"] == 1
@@ -1,22 +1,36 @@
 import os
-from typing import List
-import google.auth
+from typing import Any, Dict, List, Optional
 from google.adk.agents import Agent
 from google.adk.apps.app import App
 from google.adk.tools import google_search
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.google_search_agent_tool import create_google_search_agent
+from google.adk.tools.google_search_tool import GoogleSearchTool
+from google.adk.tools.tool_context import ToolContext
 from pydantic import BaseModel, Field
 
+from app.startup import FAST_START, discover_project
+from app.cache import instruction_version
+from app.knowledge_base import KnowledgeBase
+from app.model_backend import MODEL_BACKEND, resolve_model
+from app.search_cache import CachedSearchTool, SearchCache
+
 # --- Configuration ---
-try:
-    _, project_id = google.auth.default()
-    os.environ.setdefault("GOOGLE_CLOUD_PROJECT", project_id)
-except Exception:
-    pass
+# Fast-start defers this (it can block on the metadata server) to the warmup thread
+if not FAST_START:
+    discover_project()
 
-os.environ.setdefault("GOOGLE_CLOUD_LOCATION", "europe-west1")
+# Passed to the model client rather than set process-wide, which co-located services share
+LOCATION = os.environ.get("RESEARCHER_LOCATION") or os.environ.get("GOOGLE_CLOUD_LOCATION") or "europe-west1"
 os.environ.setdefault("GOOGLE_GENAI_USE_VERTEXAI", "True")
 
 MODEL = "gemini-2.5-pro"
+# Cheaper model that researches first; its answer is re-run on MODEL only when it does not hold up
+FAST_MODEL = os.environ.get("RESEARCHER_FAST_MODEL", "")
+# Look frameworks up in the local knowledge base first and search the web only when it falls short
+KNOWLEDGE_BASE_ENABLED = os.environ.get("KNOWLEDGE_BASE_ENABLED", "true").lower() == "true"
+# Share web search results across research runs and loop retries
+SEARCH_CACHE_ENABLED = os.environ.get("SEARCH_CACHE_ENABLED", "true").lower() == "true"
 
 # --- Data Models (The New "Contract") ---
 class GovernancePrinciple(BaseModel):
@@ -31,29 +45,126 @@ class ResearchFindings(BaseModel):
     proposed_principles: List[GovernancePrinciple] = Field(..., description="The specific rules extracted from search.")
     known_risks: List[str] = Field(..., description="List of specific failure modes or risks for this use case.")
 
+# --- Cascade Checks ---
+def review_findings(schema: type, prompt: str, answer: dict) -> Optional[str]:
+    """Why fast-model findings are not usable, or None."""
+    if schema is not ResearchFindings:
+        return None
+    findings = ResearchFindings.model_validate(answer)
+    if not findings.proposed_principles:
+        return "no principles proposed"
+    unsourced = [p.name for p in findings.proposed_principles if not p.source.strip() or not p.definition.strip()]
+    if unsourced:
+        return f"principles without a source or definition: {unsourced}"
+    return None
+
+# --- Knowledge Base ---
+knowledge_base = KnowledgeBase.from_env() if KNOWLEDGE_BASE_ENABLED else None
+
+# Name of the sub-agent ADK wraps google_search in when it shares the agent with other tools
+_SEARCH_TOOL = "google_search_agent"
+_RECALL_KEY = "temp:knowledge_recall"
+
+
+def lookup_frameworks(query: str, tool_context: ToolContext) -> Dict[str, Any]:
+    """Searches the local knowledge base of legal and ethical AI frameworks.
+
+    Args:
+        query: The use case or domain to look up, e.g. "medical diagnosis" or "military drone targeting".
+
+    Returns:
+        The best matching framework sections with their principles, and whether
+        they are sufficient on their own (if not, web search may fill the gaps).
+    """
+    hits, sufficient = knowledge_base.recall(query)
+    tool_context.state[_RECALL_KEY] = {"invocation_id": tool_context.invocation_id, "sufficient": sufficient}
+    return {
+        "sufficient": sufficient,
+        "results": [
+            {
+                "framework": hit.framework,
+                "section": hit.title,
+                "score": hit.score,
+                "text": hit.text,
+                "principles": [{"source": hit.framework, **p} for p in hit.principles],
+            }
+            for hit in hits
+        ],
+    }
+
+
+def gate_search(tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext) -> Optional[Dict[str, Any]]:
+    """Lets a web search through only after the knowledge base came up short in this invocation."""
+    if tool.name != _SEARCH_TOOL:
+        return None
+    recall = tool_context.state.get(_RECALL_KEY) or {}
+    if recall.get("invocation_id") != tool_context.invocation_id:
+        knowledge_base.record_search(allowed=False)
+        return {"error": "Call lookup_frameworks first; search the web only if it is not sufficient."}
+    if recall.get("sufficient"):
+        knowledge_base.record_search(allowed=False)
+        return {"error": "The knowledge base already covers this use case. Use the lookup_frameworks results."}
+    knowledge_base.record_search(allowed=True)
+    return None
+
+
 # --- Researcher Agent ---
+model = resolve_model(MODEL, fast=FAST_MODEL, location=LOCATION, check=review_findings)
+
+search_cache = None
+if SEARCH_CACHE_ENABLED:
+    # Built-in search runs inside Gemini, out of reach of a cache; as a sub-agent tool its results can be reused
+    search_agent = create_google_search_agent(model)
+    search_cache = SearchCache.from_env(
+        version=instruction_version(f"{MODEL_BACKEND}:{MODEL}", search_agent.instruction)
+    )
+    search_tool = CachedSearchTool(search_agent, search_cache)
+elif KNOWLEDGE_BASE_ENABLED:
+    search_tool = GoogleSearchTool(bypass_multi_tools_limit=True)
+else:
+    search_tool = google_search
+
+if knowledge_base:
+    TOOLS = [lookup_frameworks, search_tool]
+    SOURCING = (
+        "Call `lookup_frameworks` first. It searches a local library of real-world frameworks "
+        "(e.g., HIPAA for med, Geneva Convention for military, EU AI Act for general) and returns their principles. "
+        "Only if it reports `sufficient: false`, use Google Search for what is missing."
+    )
+else:
+    TOOLS = [search_tool]
+    SOURCING = (
+        "Use Google Search to find relevant real-world frameworks "
+        "(e.g., HIPAA for med, Geneva Convention for military, EU AI Act for general)."
+    )
+
 researcher = Agent(
     name="researcher",
-    model=MODEL,
+    model=model,
     description="Specialist that gathers governance principles and legal frameworks.",
     
     # Updated Instruction for the Constitution Use Case
-    instruction="""
+    instruction=f"""
     You are an AI Governance Research Specialist.
     The user will provide a specific "AI Use Case" (e.g., "A Medical Diagnosis Bot" or "A Military Drone").
 
     **Your Task:**
-    1.  **Identify Frameworks:** Use Google Search to find relevant real-world frameworks (e.g., HIPAA for med, Geneva Convention for military, EU AI Act for general).
+    1.  **Identify Frameworks:** {SOURCING}
     2.  **Extract Principles:** Find the core ethical and legal rules that apply to this domain.
     3.  **Identify Risks:** What are the specific worst-case scenarios? (e.g., "Misdiagnosis leading to death").
 
     **Constraint:**
     Do not write the constitution. Just gather the raw "Legal Ingredients" for the Judge to review.
+
+    **Revision Requests:**
+    If the message starts with "REVISION REQUEST", the Judge has already reviewed your earlier findings.
+    Propose ONLY replacements for the rejected principles listed there, and never repeat an approved one.
     """,
     
     # This enforces the Python object return type
     output_schema=ResearchFindings,
-    tools=[google_search],
+    tools=TOOLS,
+    before_tool_callback=gate_search if knowledge_base else None,
 )
 
 app = App(root_agent=researcher, name="researcher")
\ No newline at end of file
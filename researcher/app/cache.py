@@ -0,0 +1,141 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Lowercases and collapses whitespace so trivial edits map to the same key."""
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def instruction_version(model: str, instruction: str) -> str:
+    """Short fingerprint of the model + prompt, so prompt edits invalidate old entries."""
+    return hashlib.sha256(f"{model}\n{instruction}".encode("utf-8")).hexdigest()[:16]
+
+
+class ResearchCache:
+    """Content-addressed LRU/TTL cache of serialized ResearchFindings.
+
+    Entries live in memory (bounded by `max_entries`) and, when `disk_dir` is set,
+    are also written through to one JSON file per key so they survive restarts.
+    """
+
+    def __init__(
+        self,
+        version: str,
+        max_entries: int = 256,
+        ttl_seconds: float = 24 * 3600,
+        disk_dir: Optional[str] = None,
+    ):
+        self.version = version
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self._entries: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls, version: str) -> "ResearchCache":
+        return cls(
+            version=version,
+            max_entries=int(os.environ.get("RESEARCH_CACHE_MAX_ENTRIES", "256")),
+            ttl_seconds=float(os.environ.get("RESEARCH_CACHE_TTL_SECONDS", str(24 * 3600))),
+            disk_dir=os.environ.get("RESEARCH_CACHE_DIR") or None,
+        )
+
+    def key_for(self, text: str) -> str:
+        payload = f"{self.version}\n{normalize_text(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, text: str) -> Optional[str]:
+        key = self.key_for(text)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._read_disk(key)
+            if entry is not None:
+                self._store(key, entry)
+
+        if entry is not None and time.time() - entry[0] > self.ttl_seconds:
+            self._drop(key)
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, text: str, findings_json: str) -> None:
+        key = self.key_for(text)
+        entry = (time.time(), findings_json)
+        self._store(key, entry)
+        self._write_disk(key, entry)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "version": self.version,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "disk_dir": self.disk_dir,
+        }
+
+    # --- Internals ---
+    def _store(self, key: str, entry: tuple[float, str]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        self._entries.pop(key, None)
+        if self.disk_dir:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[tuple[float, str]]:
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return (float(data["stored_at"]), data["value"])
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"[ResearchCache] Ignoring unreadable entry {key}: {e}")
+            return None
+
+    def _write_disk(self, key: str, entry: tuple[float, str]) -> None:
+        if not self.disk_dir:
+            return
+        tmp_path = self._path(key) + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"stored_at": entry[0], "value": entry[1]}, f)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning(f"[ResearchCache] Failed to persist entry {key}: {e}")
@@ -0,0 +1,288 @@
+import hashlib
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+_DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+# Bump when the tokenizer or the file layout changes, so existing index files are rebuilt
+_FORMAT_VERSION = 1
+_MAGIC = b"KBIDX\0\0\1"
+_HEADER_LENGTH = struct.Struct("<Q")
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+_STOP_WORDS = {
+    "a", "an", "the", "for", "of", "and", "or", "to", "in", "on", "with", "by", "as", "at",
+    "be", "is", "are", "it", "its", "that", "this", "from", "must", "may", "not", "no",
+    "ai", "bot", "assistant", "agent", "system", "tool", "app", "use", "case",
+}
+
+
+def _stem(word: str) -> str:
+    """Folds plurals so 'drones' matches 'drone'; nothing more aggressive."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    return [_stem(word) for word in re.findall(r"[a-z0-9]+", text.lower()) if word not in _STOP_WORDS]
+
+
+def _document_terms(doc: dict) -> Counter:
+    # Titles, framework names and keywords describe the whole section; they count twice
+    emphasized = " ".join([doc.get("framework", ""), doc.get("title", ""), " ".join(doc.get("keywords", []))])
+    body = " ".join(
+        [doc.get("text", "")]
+        + [f"{p.get('name', '')} {p.get('definition', '')}" for p in doc.get("principles", [])]
+    )
+    counts = Counter(tokenize(body))
+    for term in tokenize(emphasized):
+        counts[term] += 2
+    return counts
+
+
+class KnowledgeHit(BaseModel):
+    score: float
+    id: str
+    framework: str
+    title: str
+    text: str
+    principles: List[Dict[str, str]]
+
+
+# --- Index File ---
+def build_index(documents: List[dict], source_hash: str) -> bytes:
+    """Serializes an inverted index over `documents`.
+
+    Layout: magic, header length, JSON header (documents, their lengths and each
+    term's postings offset and document frequency), padding to 8 bytes, then
+    every posting's document id (uint32) followed by every posting's term
+    frequency (uint16). Postings of one term are contiguous and sorted by id.
+    """
+    postings: Dict[str, List[Tuple[int, int]]] = {}
+    lengths = []
+    for doc_id, doc in enumerate(documents):
+        counts = _document_terms(doc)
+        lengths.append(sum(counts.values()))
+        for term, tf in counts.items():
+            postings.setdefault(term, []).append((doc_id, min(tf, 0xFFFF)))
+
+    terms, doc_ids, tfs = {}, [], []
+    for term in sorted(postings):
+        terms[term] = [len(doc_ids), len(postings[term])]
+        for doc_id, tf in postings[term]:
+            doc_ids.append(doc_id)
+            tfs.append(tf)
+
+    header = json.dumps({
+        "source_hash": source_hash,
+        "documents": documents,
+        "doc_lengths": lengths,
+        "terms": terms,
+        "postings": len(doc_ids),
+    }, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    prefix = _MAGIC + _HEADER_LENGTH.pack(len(header)) + header
+    prefix += b"\0" * (-len(prefix) % 8)
+    return (
+        prefix
+        + np.asarray(doc_ids, dtype="<u4").tobytes()
+        + np.asarray(tfs, dtype="<u2").tobytes()
+    )
+
+
+def _read_header(buffer) -> Tuple[dict, int]:
+    if bytes(buffer[: len(_MAGIC)]) != _MAGIC:
+        raise ValueError("not a knowledge base index")
+    start = len(_MAGIC) + _HEADER_LENGTH.size
+    (length,) = _HEADER_LENGTH.unpack(bytes(buffer[len(_MAGIC) : start]))
+    header = json.loads(bytes(buffer[start : start + length]))
+    end = start + length
+    return header, end + (-end % 8)
+
+
+# --- Knowledge Base ---
+class KnowledgeBase:
+    """Offline BM25 retriever over framework texts and their pre-extracted principles.
+
+    The corpus is a JSON list of sections (`framework`, `title`, `keywords`,
+    `text`, `principles`). Its inverted index is built once into `index_path`
+    and memory-mapped on open; it is rebuilt only when the corpus or the index
+    format changes. Postings are read straight from the mapping with NumPy.
+
+    `recall(query)` counts as sufficient when at least `min_hits` sections score
+    `min_score` or more; the researcher only searches the web otherwise.
+    """
+
+    def __init__(
+        self,
+        corpus_path: str,
+        index_path: str,
+        top_k: int = 5,
+        min_score: float = 4.0,
+        min_hits: int = 2,
+    ):
+        self.corpus_path = corpus_path
+        self.index_path = index_path
+        self.top_k = top_k
+        self.min_score = min_score
+        self.min_hits = min_hits
+        self.lookups = 0
+        self.sufficient = 0
+        self.searches_allowed = 0
+        self.searches_blocked = 0
+        self._lock = threading.Lock()
+        self._mmap: Optional[mmap.mmap] = None
+        self._open()
+
+    @classmethod
+    def from_env(cls) -> "KnowledgeBase":
+        return cls(
+            corpus_path=os.environ.get("KNOWLEDGE_CORPUS_PATH") or os.path.join(_DATA_DIR, "frameworks.json"),
+            index_path=os.environ.get("KNOWLEDGE_INDEX_PATH") or os.path.join(_DATA_DIR, "frameworks.idx"),
+            top_k=int(os.environ.get("KNOWLEDGE_TOP_K", "5")),
+            min_score=float(os.environ.get("KNOWLEDGE_MIN_SCORE", "4.0")),
+            min_hits=int(os.environ.get("KNOWLEDGE_MIN_HITS", "2")),
+        )
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    # --- Public API ---
+    @property
+    def version(self) -> str:
+        """Fingerprint of the corpus, for caches of answers drawn from it."""
+        return self._source_hash[:16]
+
+    def search(self, query: str, k: Optional[int] = None) -> List[KnowledgeHit]:
+        scores = np.zeros(len(self._documents), dtype=np.float32)
+        n = len(self._documents)
+        for term in set(tokenize(query)):
+            entry = self._terms.get(term)
+            if entry is None:
+                continue
+            start, df = entry
+            ids = self._doc_ids[start : start + df]
+            tf = self._tfs[start : start + df].astype(np.float32)
+            idf = math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+            scores[ids] += idf * tf * (K1 + 1.0) / (tf + self._length_norm[ids])
+
+        ranked = np.argsort(-scores)[: k or self.top_k]
+        return [
+            KnowledgeHit(
+                score=round(float(scores[i]), 3),
+                id=self._documents[i]["id"],
+                framework=self._documents[i]["framework"],
+                title=self._documents[i]["title"],
+                text=self._documents[i]["text"],
+                principles=self._documents[i].get("principles", []),
+            )
+            for i in ranked
+            if scores[i] > 0
+        ]
+
+    def recall(self, query: str) -> Tuple[List[KnowledgeHit], bool]:
+        """Top hits for `query` and whether they are enough to skip web search."""
+        hits = self.search(query)
+        sufficient = sum(1 for hit in hits if hit.score >= self.min_score) >= self.min_hits
+        with self._lock:
+            self.lookups += 1
+            self.sufficient += sufficient
+        return hits, sufficient
+
+    def record_search(self, allowed: bool) -> None:
+        with self._lock:
+            if allowed:
+                self.searches_allowed += 1
+            else:
+                self.searches_blocked += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "documents": len(self._documents),
+                "terms": len(self._terms),
+                "index_bytes": self._index_bytes,
+                "memory_mapped": self._mmap is not None,
+                "version": self.version,
+                "min_score": self.min_score,
+                "min_hits": self.min_hits,
+                "lookups": self.lookups,
+                "sufficient": self.sufficient,
+                "recall_rate": round(self.sufficient / self.lookups, 4) if self.lookups else 0.0,
+                "searches_allowed": self.searches_allowed,
+                "searches_blocked": self.searches_blocked,
+            }
+
+    # --- Storage ---
+    def _open(self) -> None:
+        with open(self.corpus_path, "rb") as f:
+            corpus = f.read()
+        self._source_hash = hashlib.sha256(corpus + f"\n{_FORMAT_VERSION}".encode()).hexdigest()
+
+        buffer = self._map()
+        if buffer is None:
+            data = build_index(json.loads(corpus), self._source_hash)
+            try:
+                tmp_path = self.index_path + ".tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, self.index_path)
+                logger.info(f"[KnowledgeBase] Built index {self.index_path} ({len(data)} bytes)")
+                buffer = self._map()
+            except OSError as e:
+                logger.warning(f"[KnowledgeBase] Failed to write index, keeping it in memory: {e}")
+            if buffer is None:
+                buffer = memoryview(data)
+
+        header, offset = _read_header(buffer)
+        count = header["postings"]
+        self._documents: List[dict] = header["documents"]
+        self._terms: Dict[str, List[int]] = header["terms"]
+        self._doc_ids = np.frombuffer(buffer, dtype="<u4", count=count, offset=offset)
+        self._tfs = np.frombuffer(buffer, dtype="<u2", count=count, offset=offset + 4 * count)
+        lengths = np.asarray(header["doc_lengths"], dtype=np.float32)
+        avg_length = float(lengths.mean()) if len(lengths) else 1.0
+        self._length_norm = K1 * (1.0 - B + B * lengths / avg_length)
+        self._index_bytes = len(buffer)
+
+    def _map(self) -> Optional[mmap.mmap]:
+        """Maps the index file read-only if it exists and matches the corpus."""
+        if not os.path.exists(self.index_path):
+            return None
+        try:
+            with open(self.index_path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            header, _ = _read_header(mapped)
+        except (OSError, ValueError) as e:
+            logger.warning(f"[KnowledgeBase] Ignoring unreadable index {self.index_path}: {e}")
+            return None
+        if header.get("source_hash") != self._source_hash:
+            mapped.close()
+            logger.info(f"[KnowledgeBase] Index {self.index_path} is stale, rebuilding")
+            return None
+        self._mmap = mapped
+        return mapped
+
+
+if __name__ == "__main__":
+    # Builds the index ahead of time (the Dockerfile runs this), so startup only maps it
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(KnowledgeBase.from_env().stats()))
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from google.adk.tools.google_search_agent_tool import GoogleSearchAgentTool
+from google.adk.tools.tool_context import ToolContext
+
+from app.cache import ResearchCache
+from app.telemetry import span
+
+logger = logging.getLogger(__name__)
+
+# Words that change how a query reads but not what a search engine returns for it
+_FILLER_WORDS = {"a", "an", "the", "for", "of", "and", "to", "in", "on", "with", "what", "are", "is", "about"}
+
+
+def normalize_query(query: str) -> str:
+    """Case, punctuation, filler words and word order removed, so rephrasings share a key."""
+    words = {word for word in re.findall(r"[a-z0-9]+", query.lower()) if word not in _FILLER_WORDS}
+    return " ".join(sorted(words))
+
+
+def _hit_rate(counts: Dict[str, float]) -> float:
+    reused = counts["hits"] + counts["coalesced"]
+    lookups = reused + counts["misses"]
+    return round(reused / lookups, 4) if lookups else 0.0
+
+
+class SearchCache:
+    """Cache of web search results shared by every research run in the process.
+
+    Results are stored by normalized query in a `ResearchCache` (LRU/TTL in
+    memory, optionally written through to `disk_dir`), so loop retries and
+    later runs reuse earlier searches. Identical queries issued while one is
+    still running wait for it instead of searching again (single-flight).
+
+    Per query it counts hits, misses and coalesced waits; every hit or wait is
+    credited with the duration of the search that produced the result.
+    """
+
+    def __init__(
+        self,
+        version: str,
+        max_entries: int = 1024,
+        ttl_seconds: float = 24 * 3600,
+        disk_dir: Optional[str] = None,
+    ):
+        self._store = ResearchCache(version, max_entries=max_entries, ttl_seconds=ttl_seconds, disk_dir=disk_dir)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._durations: Dict[str, float] = {}
+        self._queries: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+
+    @classmethod
+    def from_env(cls, version: str) -> "SearchCache":
+        return cls(
+            version=version,
+            max_entries=int(os.environ.get("SEARCH_CACHE_MAX_ENTRIES", "1024")),
+            ttl_seconds=float(os.environ.get("SEARCH_CACHE_TTL_SECONDS", str(24 * 3600))),
+            disk_dir=os.environ.get("SEARCH_CACHE_DIR") or None,
+        )
+
+    # --- Public API ---
+    async def fetch(self, query: str, search: Callable[[], Awaitable[Any]]) -> Any:
+        """Returns the cached result for `query`, or runs `search` (at most once at a time per query)."""
+        key = normalize_query(query)
+        cached = self._store.get(key)
+        if cached is not None:
+            self._record(key, "hits")
+            return cached
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            try:
+                result = await asyncio.shield(inflight)
+                self._record(key, "coalesced")
+                return result
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # The leading call was cancelled, not this one: search ourselves
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        started = time.perf_counter()
+        try:
+            with span("web_search"):
+                result = await search()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters see the error; don't warn about it when there are none
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        self._durations[key] = time.perf_counter() - started
+        self._record(key, "misses")
+        if isinstance(result, str) and result.strip():
+            self._store.put(key, result)
+        future.set_result(result)
+        return result
+
+    def stats(self, top: int = 20) -> dict:
+        """Totals plus the `top` queries with the most reuse."""
+        totals = {"hits": 0, "misses": 0, "coalesced": 0, "seconds_saved": 0.0}
+        for counts in self._queries.values():
+            for name in totals:
+                totals[name] += counts[name]
+        store = self._store.stats()
+        busiest = sorted(self._queries.items(), key=lambda item: item[1]["hits"] + item[1]["coalesced"], reverse=True)
+        return {
+            **{name: store[name] for name in ("version", "entries", "max_entries", "evictions", "disk_dir")},
+            **{name: int(totals[name]) for name in ("hits", "misses", "coalesced")},
+            "hit_rate": _hit_rate(totals),
+            "time_saved_seconds": round(totals["seconds_saved"], 3),
+            "queries": {
+                query: {
+                    **{name: int(counts[name]) for name in ("hits", "misses", "coalesced")},
+                    "hit_rate": _hit_rate(counts),
+                    "seconds_saved": round(counts["seconds_saved"], 3),
+                }
+                for query, counts in busiest[:top]
+            },
+        }
+
+    # --- Internals ---
+    def _record(self, key: str, outcome: str) -> None:
+        counts = self._queries.setdefault(key, {"hits": 0, "misses": 0, "coalesced": 0, "seconds_saved": 0.0})
+        counts[outcome] += 1
+        if outcome != "misses":
+            # Unknown after a restart (the result came from disk)
+            counts["seconds_saved"] += self._durations.get(key, 0.0)
+        self._queries.move_to_end(key)
+        while len(self._queries) > self._store.max_entries:
+            evicted, _ = self._queries.popitem(last=False)
+            self._durations.pop(evicted, None)
+
+
+class CachedSearchTool(GoogleSearchAgentTool):
+    """ADK's Google Search sub-agent tool with its results served through a `SearchCache`."""
+
+    def __init__(self, agent, cache: SearchCache):
+        super().__init__(agent)
+        self.cache = cache
+
+    async def run_async(self, *, args: Dict[str, Any], tool_context: ToolContext) -> Any:
+        return await self.cache.fetch(
+            str(args.get("request", "")),
+            lambda: super(CachedSearchTool, self).run_async(args=args, tool_context=tool_context),
+        )
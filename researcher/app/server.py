@@ -15,50 +15,80 @@ logging.getLogger("google.adk.runners").setLevel(logging.ERROR)
 # Suppress Google Auth warnings
 warnings.filterwarnings("ignore", message=".*Your application has authenticated using end user credentials.*")
 
+from app.startup import FAST_START, discover_project, startup, warm_model_clients
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from google.adk.artifacts.in_memory_artifact_service import InMemoryArtifactService
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
+from google.adk.sessions.base_session_service import GetSessionConfig
 from google.genai import types as genai_types
-from opentelemetry import trace
-from opentelemetry.sdk.trace import TracerProvider, export
-from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+from opentelemetry import propagate
 
 # A2A Imports
 from a2a.server.apps.jsonrpc.fastapi_app import A2AFastAPIApplication
 from a2a.server.request_handlers.default_request_handler import DefaultRequestHandler
-from a2a.server.tasks.inmemory_task_store import InMemoryTaskStore
 from a2a.types import AgentCard
 from a2a.server.agent_execution.agent_executor import AgentExecutor
 from a2a.server.events.event_queue import EventQueue
 from a2a.server.agent_execution.context import RequestContext
 from a2a.types import Message, TextPart
 
-from app.agent import app as adk_app
+startup.mark("framework_imports")
+
+from app.model_backend import MODEL_BACKEND, cascade_stats
+from app.agent import FAST_MODEL, MODEL, ResearchFindings, app as adk_app, knowledge_base, researcher, search_cache
+from app.cache import ResearchCache, instruction_version
+from app.similarity import SimilarityIndex, is_fresh_request
+from app.session_store import create_session_service
+from app.task_store import BoundedTaskStore
+from app.telemetry import UsageReportingQueue, metrics, setup_tracing, span, track_usage
+startup.mark("app_modules")
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Telemetry
-provider = TracerProvider()
-processor = export.SimpleSpanProcessor(ConsoleSpanExporter())
-trace.set_tracer_provider(provider)
+tracer_provider = setup_tracing("researcher")
 
 # Runner Setup
 runner = Runner(
     app=adk_app,
     artifact_service=InMemoryArtifactService(),
-    session_service=InMemorySessionService(),
+    session_service=create_session_service(),
 )
+startup.mark("runner")
+
+# Lookups that only need a session's state, not its event history
+STATE_ONLY = GetSessionConfig(num_recent_events=1)
 
 # --- Custom Executor ---
 class AdkToA2aExecutor(AgentExecutor):
-    def __init__(self, runner, app_name):
+    def __init__(
+        self,
+        runner,
+        app_name,
+        cache: ResearchCache | None = None,
+        similarity: SimilarityIndex | None = None,
+        similarity_mode: str = "seed",
+    ):
         self.runner = runner
         self.app_name = app_name
+        self.cache = cache
+        self.similarity = similarity
+        self.similarity_mode = similarity_mode
 
     async def execute(self, context: RequestContext, event_queue: EventQueue) -> None:
+        # Server side of the A2A hop, joined to the caller's trace; the runner's
+        # agent and model spans nest under it
+        headers = context.call_context.state.get("headers", {}) if context.call_context else {}
+        with span("a2a_execute", current=True, parent=propagate.extract(headers), agent=self.app_name), track_usage() as usage:
+            # Replies carry the tokens spent on them (see UsageReportingQueue)
+            await self._execute(context, UsageReportingQueue(event_queue, usage))
+
+    async def _execute(self, context: RequestContext, event_queue: EventQueue) -> None:
+        await startup.wait_ready()
         # 1. Extract User/Session
         user_id = "default_user"
         # Fix: ServerCallContext does not have raw_headers. Check user object or state.
@@ -94,8 +124,53 @@ class AdkToA2aExecutor(AgentExecutor):
                     except Exception as e:
                         logger.error(f"[{self.app_name}] Error extracting text: {e}")
         
+        # Loop retries (judge context or a revision brief) are always researched
+        # again: neither the cache nor the similarity index may answer them with
+        # findings the judge has just rejected
+        fresh = is_fresh_request(user_text)
+
+        # Serve repeat use cases straight from the research cache
+        if self.cache and fresh:
+            cached = self.cache.get(user_text)
+            if cached is not None:
+                logger.info(f"[{self.app_name}] Research cache hit for session={session_id}")
+                await event_queue.enqueue_event(
+                    Message(
+                        messageId=str(uuid.uuid4()),
+                        role="agent",
+                        parts=[TextPart(text=cached)]
+                    )
+                )
+                return
+
+        # Near-duplicate lookup
+        research_text = user_text
+        use_similarity = self.similarity is not None and fresh
+        if use_similarity:
+            match = self.similarity.nearest(user_text)
+            if match and self.similarity_mode == "reuse":
+                logger.info(f"[{self.app_name}] Reusing findings for similar use case '{match.prompt}' (score={match.score:.2f})")
+                if self.cache:
+                    self.cache.put(user_text, match.findings_json)
+                await event_queue.enqueue_event(
+                    Message(
+                        messageId=str(uuid.uuid4()),
+                        role="agent",
+                        parts=[TextPart(text=match.findings_json)]
+                    )
+                )
+                return
+            if match and self.similarity_mode == "seed":
+                logger.info(f"[{self.app_name}] Seeding research from similar use case '{match.prompt}' (score={match.score:.2f})")
+                research_text = (
+                    f"{user_text}\n\n"
+                    f"Prior research for the closely related use case \"{match.prompt}\" is below. "
+                    f"Verify and adapt it to this use case instead of starting from scratch:\n"
+                    f"{match.findings_json}"
+                )
+
         adk_msg = genai_types.Content(
-            role="user", parts=[genai_types.Part.from_text(text=user_text)]
+            role="user", parts=[genai_types.Part.from_text(text=research_text)]
         )
 
         logger.info(f"[{self.app_name}] Executing task for user={user_id} session={session_id}")
@@ -103,7 +178,7 @@ class AdkToA2aExecutor(AgentExecutor):
         # 3. Get/Create Session
         try:
             session = await self.runner.session_service.get_session(
-                session_id=session_id, app_name=self.app_name, user_id=user_id
+                session_id=session_id, app_name=self.app_name, user_id=user_id, config=STATE_ONLY
             )
         except Exception:
             session = None
@@ -114,6 +189,7 @@ class AdkToA2aExecutor(AgentExecutor):
             )
 
         # 4. Run Agent & Handle STRUCTURED OUTPUT
+        findings_json = None
         async for event in self.runner.run_async(
             user_id=user_id, session_id=session.id, new_message=adk_msg
         ):
@@ -138,6 +214,13 @@ class AdkToA2aExecutor(AgentExecutor):
                              text_content += str(p.function_call.args)
 
                  if text_content:
+                    if self.cache or self.similarity:
+                        try:
+                            ResearchFindings.model_validate_json(text_content)
+                            findings_json = text_content
+                        except ValueError:
+                            pass
+
                     a2a_msg = Message(
                         messageId=str(uuid.uuid4()),
                         role="agent",
@@ -145,13 +228,39 @@ class AdkToA2aExecutor(AgentExecutor):
                     )
                     await event_queue.enqueue_event(a2a_msg)
 
+        if self.cache and fresh and findings_json:
+            self.cache.put(user_text, findings_json)
+        if use_similarity and findings_json:
+            self.similarity.add(user_text, findings_json)
+
     async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
         pass
 
 # --- A2A Setup ---
 PORT = 8001
-task_store = InMemoryTaskStore()
-executor = AdkToA2aExecutor(runner, adk_app.name)
+# Public base URL advertised in the agent card (run_locally.sh sets it)
+APP_URL = os.environ.get("APP_URL", f"http://localhost:{PORT}")
+task_store = BoundedTaskStore.from_env()
+research_cache = None
+if os.environ.get("RESEARCH_CACHE_ENABLED", "true").lower() == "true":
+    # Synthetic answers must never be served as (or mixed with) real research, nor
+    # cascade answers as pro-only ones, nor answers drawn from an older knowledge base
+    model_version = f"{MODEL_BACKEND}:{FAST_MODEL}>{MODEL}" if FAST_MODEL else f"{MODEL_BACKEND}:{MODEL}"
+    if knowledge_base:
+        model_version += f"+kb:{knowledge_base.version}"
+    research_cache = ResearchCache.from_env(version=instruction_version(model_version, researcher.instruction))
+similarity_index = None
+# "seed" only hints the model with a similar use case's findings; "reuse" returns them as they are
+similarity_mode = os.environ.get("RESEARCH_SIMILARITY_MODE", "seed").lower()
+if similarity_mode in ("reuse", "seed"):
+    similarity_index = SimilarityIndex.from_env()
+executor = AdkToA2aExecutor(
+    runner,
+    adk_app.name,
+    cache=research_cache,
+    similarity=similarity_index,
+    similarity_mode=similarity_mode,
+)
 request_handler = DefaultRequestHandler(agent_executor=executor, task_store=task_store)
 
 agent_card_data = {
@@ -159,7 +268,7 @@ agent_card_data = {
     "description": "AI Governance Specialist. Returns structured legal principles and risk frameworks based on a use case.",
     "version": "0.2.0", 
     "protocolVersion": "0.1.0",
-    "url": f"http://localhost:{PORT}/a2a/{adk_app.name}",
+    "url": f"{APP_URL}/a2a/{adk_app.name}",
     "capabilities": {},
     "security": [],
     "defaultInputModes": ["text"],
@@ -171,7 +280,18 @@ agent_card = AgentCard(**agent_card_data)
 a2a_app = A2AFastAPIApplication(agent_card=agent_card, http_handler=request_handler)
 
 # --- FastAPI App ---
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if FAST_START:
+        startup.start_warmup({
+            "credentials": discover_project,
+            "model_clients": lambda: warm_model_clients(adk_app.root_agent),
+        })
+    yield
+    # Flush spans still queued in the batch processor
+    tracer_provider.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -190,7 +310,41 @@ a2a_app.add_routes_to_app(
 
 @app.get("/")
 def root():
-    return {"status": "ok", "service": "researcher", "agent": adk_app.name, "a2a_card": f"http://localhost:{PORT}/.well-known/agent.json"}
+    return {"status": "ok", "service": "researcher", "agent": adk_app.name, "a2a_card": f"{APP_URL}/.well-known/agent.json"}
+
+@app.get("/cache/stats")
+def cache_stats():
+    stats = {"enabled": False}
+    if research_cache:
+        stats = {"enabled": True, **research_cache.stats()}
+    if similarity_index:
+        stats["similarity"] = {"mode": similarity_mode, **similarity_index.stats()}
+    stats["search"] = {"enabled": search_cache is not None, **(search_cache.stats() if search_cache else {})}
+    return stats
+
+@app.get("/knowledge/stats")
+def knowledge_stats():
+    if knowledge_base is None:
+        return {"enabled": False}
+    return {"enabled": True, **knowledge_base.stats()}
+
+@app.get("/models/stats")
+def model_stats():
+    return cascade_stats.stats()
+
+@app.get("/tasks/stats")
+def task_stats():
+    return task_store.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics() -> str:
+    return metrics.render()
+
+@app.get("/startup")
+def startup_report():
+    return startup.stats()
+
+startup.mark("app_ready")
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,315 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Optional
+
+from google.adk.errors.already_exists_error import AlreadyExistsError
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, InMemorySessionService, Session, State
+from google.adk.sessions._session_util import extract_state_delta
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+
+from app.telemetry import span
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    create_time REAL NOT NULL,
+    update_time REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, id)
+);
+CREATE INDEX IF NOT EXISTS sessions_update_time ON sessions (update_time);
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_session ON events (app_name, user_id, session_id, seq);
+CREATE TABLE IF NOT EXISTS app_states (
+    app_name TEXT PRIMARY KEY,
+    state TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS user_states (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id)
+);
+"""
+
+
+# Next to the service's `app` package rather than in the working directory
+_DEFAULT_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sessions.sqlite3")
+
+
+class SqliteSessionService(BaseSessionService):
+    """Session service backed by a single SQLite file.
+
+    Events are written append-only, one row each, and session state is kept as a
+    separate snapshot row that is only read when a session is fetched. Listing
+    sessions never touches events or state. Each session keeps at most its
+    `max_events` most recent events (0 = all), so long-lived sessions stay
+    bounded; state is unaffected. Sessions idle for longer than `ttl_seconds`
+    are swept out (with their events) at most once per `sweep_interval` seconds.
+
+    Database work runs on a worker thread so it never blocks the event loop.
+    """
+
+    def __init__(
+        self,
+        path: str = _DEFAULT_DB,
+        ttl_seconds: float = 86400,
+        sweep_interval: float = 60,
+        max_events: int = 500,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self.max_events = max_events
+        self._last_sweep = 0.0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    # --- Internals ---
+    def _load_states(self, app_name: str, user_id: str) -> dict[str, Any]:
+        merged: dict[str, Any] = {}
+        row = self._conn.execute("SELECT state FROM app_states WHERE app_name = ?", (app_name,)).fetchone()
+        if row:
+            merged.update({State.APP_PREFIX + k: v for k, v in json.loads(row[0]).items()})
+        row = self._conn.execute(
+            "SELECT state FROM user_states WHERE app_name = ? AND user_id = ?", (app_name, user_id)
+        ).fetchone()
+        if row:
+            merged.update({State.USER_PREFIX + k: v for k, v in json.loads(row[0]).items()})
+        return merged
+
+    def _apply_shared_deltas(self, app_name: str, user_id: str, deltas: dict[str, dict[str, Any]]) -> None:
+        if deltas["app"]:
+            row = self._conn.execute("SELECT state FROM app_states WHERE app_name = ?", (app_name,)).fetchone()
+            state = json.loads(row[0]) if row else {}
+            state.update(deltas["app"])
+            self._conn.execute(
+                "INSERT OR REPLACE INTO app_states (app_name, state) VALUES (?, ?)", (app_name, json.dumps(state))
+            )
+        if deltas["user"]:
+            row = self._conn.execute(
+                "SELECT state FROM user_states WHERE app_name = ? AND user_id = ?", (app_name, user_id)
+            ).fetchone()
+            state = json.loads(row[0]) if row else {}
+            state.update(deltas["user"])
+            self._conn.execute(
+                "INSERT OR REPLACE INTO user_states (app_name, user_id, state) VALUES (?, ?, ?)",
+                (app_name, user_id, json.dumps(state)),
+            )
+
+    def _maybe_sweep(self) -> None:
+        now = time.time()
+        if self.ttl_seconds <= 0 or now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        cutoff = now - self.ttl_seconds
+        expired = self._conn.execute(
+            "SELECT app_name, user_id, id FROM sessions WHERE update_time < ?", (cutoff,)
+        ).fetchall()
+        if not expired:
+            return
+        self._conn.execute("BEGIN")
+        self._conn.executemany(
+            "DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?", expired
+        )
+        self._conn.execute("DELETE FROM sessions WHERE update_time < ?", (cutoff,))
+        self._conn.execute("COMMIT")
+        logger.info(f"[SessionStore] Evicted {len(expired)} sessions idle for more than {self.ttl_seconds}s")
+
+    def _trim_events(self, app_name: str, user_id: str, session_id: str) -> None:
+        """Drops the session's events older than its `max_events` most recent ones."""
+        if self.max_events <= 0:
+            return
+        row = self._conn.execute(
+            "SELECT seq FROM events WHERE app_name = ? AND user_id = ? AND session_id = ? "
+            "ORDER BY seq DESC LIMIT 1 OFFSET ?",
+            (app_name, user_id, session_id, self.max_events),
+        ).fetchone()
+        if row:
+            self._conn.execute(
+                "DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ? AND seq <= ?",
+                (app_name, user_id, session_id, row[0]),
+            )
+
+    def _create(self, app_name: str, user_id: str, session_id: str, deltas: dict[str, dict[str, Any]], now: float) -> dict[str, Any]:
+        with self._lock:
+            self._maybe_sweep()
+            try:
+                self._conn.execute("BEGIN")
+                self._conn.execute(
+                    "INSERT INTO sessions (app_name, user_id, id, state, create_time, update_time) VALUES (?, ?, ?, ?, ?, ?)",
+                    (app_name, user_id, session_id, json.dumps(deltas["session"]), now, now),
+                )
+                self._apply_shared_deltas(app_name, user_id, deltas)
+                self._conn.execute("COMMIT")
+            except sqlite3.IntegrityError:
+                self._conn.execute("ROLLBACK")
+                raise AlreadyExistsError(f"Session with id {session_id} already exists.")
+            return {**deltas["session"], **self._load_states(app_name, user_id)}
+
+    def _get(self, app_name: str, user_id: str, session_id: str, config: Optional[GetSessionConfig]) -> Optional[Session]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state, update_time FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+                (app_name, user_id, session_id),
+            ).fetchone()
+            if not row:
+                return None
+            state, update_time = row
+
+            query = "SELECT data FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?"
+            params: list[Any] = [app_name, user_id, session_id]
+            if config and config.after_timestamp:
+                query += " AND timestamp >= ?"
+                params.append(config.after_timestamp)
+            limit = config.num_recent_events if config and config.num_recent_events else self.max_events
+            if limit > 0:
+                params.append(limit)
+                rows = self._conn.execute(query + " ORDER BY seq DESC LIMIT ?", params).fetchall()[::-1]
+            else:
+                rows = self._conn.execute(query + " ORDER BY seq", params).fetchall()
+            shared = self._load_states(app_name, user_id)
+
+        return Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=session_id,
+            state={**json.loads(state), **shared},
+            events=[Event.model_validate_json(data) for (data,) in rows],
+            last_update_time=update_time,
+        )
+
+    def _list(self, app_name: str, user_id: Optional[str]) -> list[tuple]:
+        query = "SELECT user_id, id, update_time FROM sessions WHERE app_name = ?"
+        params: list[Any] = [app_name]
+        if user_id is not None:
+            query += " AND user_id = ?"
+            params.append(user_id)
+        with self._lock:
+            return self._conn.execute(query, params).fetchall()
+
+    def _delete(self, app_name: str, user_id: str, session_id: str) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                "DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                (app_name, user_id, session_id),
+            )
+            self._conn.execute(
+                "DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+                (app_name, user_id, session_id),
+            )
+            self._conn.execute("COMMIT")
+
+    def _append(self, session: Session, event: Event, deltas: dict[str, dict[str, Any]]) -> None:
+        data = event.model_dump_json(exclude_none=True)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                "INSERT INTO events (app_name, user_id, session_id, timestamp, data) VALUES (?, ?, ?, ?, ?)",
+                (session.app_name, session.user_id, session.id, event.timestamp, data),
+            )
+            if deltas["session"]:
+                row = self._conn.execute(
+                    "SELECT state FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+                    (session.app_name, session.user_id, session.id),
+                ).fetchone()
+                state = json.loads(row[0]) if row else {}
+                state.update(deltas["session"])
+                self._conn.execute(
+                    "UPDATE sessions SET state = ?, update_time = ? WHERE app_name = ? AND user_id = ? AND id = ?",
+                    (json.dumps(state), event.timestamp, session.app_name, session.user_id, session.id),
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE sessions SET update_time = ? WHERE app_name = ? AND user_id = ? AND id = ?",
+                    (event.timestamp, session.app_name, session.user_id, session.id),
+                )
+            self._apply_shared_deltas(session.app_name, session.user_id, deltas)
+            self._trim_events(session.app_name, session.user_id, session.id)
+            self._conn.execute("COMMIT")
+
+    # --- BaseSessionService ---
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session_id = session_id.strip() if session_id and session_id.strip() else str(uuid.uuid4())
+        deltas = extract_state_delta(state)
+        now = time.time()
+        with span("session", op="create"):
+            merged = await asyncio.to_thread(self._create, app_name, user_id, session_id, deltas, now)
+        return Session(app_name=app_name, user_id=user_id, id=session_id, state=merged, last_update_time=now)
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        with span("session", op="get"):
+            return await asyncio.to_thread(self._get, app_name, user_id, session_id, config)
+
+    async def list_sessions(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        rows = await asyncio.to_thread(self._list, app_name, user_id)
+        return ListSessionsResponse(
+            sessions=[
+                Session(app_name=app_name, user_id=uid, id=sid, last_update_time=update_time)
+                for uid, sid, update_time in rows
+            ]
+        )
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        await asyncio.to_thread(self._delete, app_name, user_id, session_id)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        event = await super().append_event(session=session, event=event)
+        session.last_update_time = event.timestamp
+
+        deltas = extract_state_delta(event.actions.state_delta if event.actions else None)
+        with span("session", op="append"):
+            await asyncio.to_thread(self._append, session, event, deltas)
+        return event
+
+
+def create_session_service() -> BaseSessionService:
+    """Builds the session service selected by SESSION_STORE ("sqlite" or "memory")."""
+    backend = os.environ.get("SESSION_STORE", "sqlite").lower()
+    if backend == "memory":
+        return InMemorySessionService()
+    return SqliteSessionService(
+        path=os.environ.get("SESSION_DB") or _DEFAULT_DB,
+        ttl_seconds=float(os.environ.get("SESSION_TTL_SECONDS", "86400")),
+        max_events=int(os.environ.get("SESSION_MAX_EVENTS", "500")),
+    )
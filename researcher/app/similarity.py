@@ -0,0 +1,235 @@
+import json
+import logging
+import math
+import os
+import re
+import zlib
+from collections import Counter, deque
+from typing import Deque, Dict, List, Optional
+
+import numpy as np
+from pydantic import BaseModel
+
+from app.cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# The frontend wraps every submission in the same boilerplate sentence; only the
+# use case itself should drive similarity.
+_USE_CASE_PATTERN = re.compile(r"use case:\s*(.+)", re.IGNORECASE)
+
+# Words that appear in nearly every submission and say nothing about the domain.
+_STOP_WORDS = {
+    "a", "an", "the", "for", "of", "and", "or", "to", "in", "on", "with",
+    "ai", "bot", "assistant", "agent", "system", "tool", "app",
+}
+
+
+def is_fresh_request(text: str) -> bool:
+    """False for loop retries, which carry judge context or a revision brief."""
+    return "For context:" not in text and "REVISION REQUEST" not in text
+
+
+def extract_use_case(text: str) -> str:
+    match = _USE_CASE_PATTERN.search(text)
+    if match:
+        return match.group(1).splitlines()[0]
+    return text
+
+
+class SimilarMatch(BaseModel):
+    score: float
+    prompt: str
+    findings_json: str
+
+
+class SimilarityIndex:
+    """Local near-duplicate index over past use cases and their ResearchFindings.
+
+    Prompts are embedded as hashed word + character-trigram TF-IDF vectors and
+    compared with cosine similarity in NumPy. No external service is involved.
+
+    Vectors live in a preallocated matrix that doubles in capacity up to
+    `max_entries`; once full, the oldest entry's row is reused. The optional
+    JSON-lines file is append-only (later lines win on load) and is rewritten
+    only when it has grown to twice the live entries.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        dims: int = 2**12,
+        max_entries: int = 2048,
+        path: Optional[str] = None,
+    ):
+        self.threshold = threshold
+        self.dims = dims
+        self.max_entries = max_entries
+        self.path = path
+        # Indexed by matrix row; `_order` lists rows from oldest to newest
+        self._prompts: List[str] = []
+        self._findings: List[str] = []
+        self._features: List[Dict[int, float]] = []
+        self._rows: Dict[str, int] = {}
+        self._order: Deque[int] = deque()
+        self._tf = np.zeros((min(16, max_entries), dims), dtype=np.float32)
+        self._df = np.zeros(dims, dtype=np.float32)
+        self._file_lines = 0
+        self._weighted: Optional[np.ndarray] = None
+        self.lookups = 0
+        self.matches = 0
+        if path:
+            self._load()
+
+    @classmethod
+    def from_env(cls) -> "SimilarityIndex":
+        return cls(
+            threshold=float(os.environ.get("RESEARCH_SIMILARITY_THRESHOLD", "0.8")),
+            max_entries=int(os.environ.get("RESEARCH_SIMILARITY_MAX_ENTRIES", "2048")),
+            path=os.environ.get("RESEARCH_SIMILARITY_PATH") or None,
+        )
+
+    def __len__(self) -> int:
+        return len(self._prompts)
+
+    # --- Public API ---
+    def add(self, prompt: str, findings_json: str) -> None:
+        use_case = normalize_text(extract_use_case(prompt))
+        self._put(use_case, findings_json)
+        self._save(use_case, findings_json)
+
+    def nearest(self, prompt: str) -> Optional[SimilarMatch]:
+        """Returns the closest prior use case if it clears the similarity threshold."""
+        self.lookups += 1
+        if not self._prompts:
+            return None
+
+        query = self._dense(self._featurize(normalize_text(extract_use_case(prompt))))
+        idf = self._idf()
+        query *= idf
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return None
+
+        scores = self._weighted_matrix(idf) @ (query / norm)
+        best = int(np.argmax(scores))
+        score = float(scores[best])
+        if score < self.threshold:
+            return None
+
+        self.matches += 1
+        return SimilarMatch(
+            score=score, prompt=self._prompts[best], findings_json=self._findings[best]
+        )
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._prompts),
+            "threshold": self.threshold,
+            "lookups": self.lookups,
+            "matches": self.matches,
+            "match_rate": round(self.matches / self.lookups, 4) if self.lookups else 0.0,
+        }
+
+    # --- Vectorization ---
+    def _bucket(self, token: str) -> int:
+        # crc32 rather than hash() so buckets are stable across processes
+        return zlib.crc32(token.encode("utf-8")) % self.dims
+
+    def _featurize(self, text: str) -> Dict[int, float]:
+        counts: Counter = Counter()
+        for word in re.findall(r"[a-z0-9]+", text):
+            if word in _STOP_WORDS:
+                continue
+            counts[self._bucket(f"w:{word}")] += 1
+            padded = f"#{word}#"
+            for i in range(len(padded) - 2):
+                counts[self._bucket(f"c:{padded[i:i + 3]}")] += 1
+        # Sublinear term frequency
+        return {bucket: 1.0 + math.log(count) for bucket, count in counts.items()}
+
+    def _dense(self, features: Dict[int, float]) -> np.ndarray:
+        vector = np.zeros(self.dims, dtype=np.float32)
+        for bucket, weight in features.items():
+            vector[bucket] = weight
+        return vector
+
+    def _idf(self) -> np.ndarray:
+        n = len(self._prompts)
+        return (np.log((1.0 + n) / (1.0 + self._df)) + 1.0).astype(np.float32)
+
+    def _weighted_matrix(self, idf: np.ndarray) -> np.ndarray:
+        if self._weighted is None:
+            weighted = self._tf[: len(self._prompts)] * idf
+            norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self._weighted = weighted / norms
+        return self._weighted
+
+    # --- Storage ---
+    def _put(self, prompt: str, findings_json: str) -> None:
+        row = self._rows.get(prompt)
+        if row is not None:
+            self._findings[row] = findings_json
+            return
+
+        features = self._featurize(prompt)
+        if len(self._prompts) >= self.max_entries:
+            # Full: the oldest entry's row takes the new one
+            row = self._order.popleft()
+            for bucket in self._features[row]:
+                self._df[bucket] -= 1
+            del self._rows[self._prompts[row]]
+            self._prompts[row], self._findings[row], self._features[row] = prompt, findings_json, features
+        else:
+            row = len(self._prompts)
+            if row == len(self._tf):
+                grown = np.zeros((min(2 * len(self._tf), self.max_entries), self.dims), dtype=np.float32)
+                grown[:row] = self._tf
+                self._tf = grown
+            self._prompts.append(prompt)
+            self._findings.append(findings_json)
+            self._features.append(features)
+        self._tf[row] = self._dense(features)
+        for bucket in features:
+            self._df[bucket] += 1
+        self._rows[prompt] = row
+        self._order.append(row)
+        self._weighted = None
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    self._put(entry["prompt"], entry["findings"])
+                    self._file_lines += 1
+            logger.info(f"[SimilarityIndex] Loaded {len(self)} prior use cases from {self.path}")
+        except Exception as e:
+            logger.warning(f"[SimilarityIndex] Failed to load {self.path}: {e}")
+
+    def _save(self, prompt: str, findings_json: str) -> None:
+        """Appends one entry, or compacts the file once most of its lines are stale."""
+        if not self.path:
+            return
+        try:
+            if self._file_lines >= 2 * max(len(self._prompts), 1):
+                self._rewrite()
+                return
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"prompt": prompt, "findings": findings_json}) + "\n")
+            self._file_lines += 1
+        except OSError as e:
+            logger.warning(f"[SimilarityIndex] Failed to persist index: {e}")
+
+    def _rewrite(self) -> None:
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for row in self._order:
+                f.write(json.dumps({"prompt": self._prompts[row], "findings": self._findings[row]}) + "\n")
+        os.replace(tmp_path, self.path)
+        self._file_lines = len(self._order)
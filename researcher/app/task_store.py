@@ -0,0 +1,222 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from a2a.server.context import ServerCallContext
+from a2a.server.tasks.task_store import TaskStore
+from a2a.types import Task, TaskState
+
+logger = logging.getLogger(__name__)
+
+# Tasks in these states will not be touched by the executor again
+TERMINAL_STATES = {TaskState.completed, TaskState.canceled, TaskState.failed, TaskState.rejected}
+
+
+# How often spill files are checked against the TTL
+SPILL_SWEEP_SECONDS = 60
+
+
+def _json_size(model: Any, exclude: Optional[set] = None) -> int:
+    return len(model.model_dump_json(exclude_none=True, exclude=exclude).encode("utf-8"))
+
+
+def _list_overhead(name: str, items: Optional[list]) -> int:
+    """Bytes a list field adds around its items: `,"name":[]` and the commas between them."""
+    if items is None:
+        return 0
+    return len(name) + 6 + max(len(items) - 1, 0)
+
+
+class _Slot:
+    __slots__ = ("task", "size", "touched", "parts")
+
+    def __init__(self, task: Task, size: int, touched: float, parts: Dict[int, Tuple[Any, int]]):
+        self.task = task
+        self.size = size
+        self.touched = touched
+        # Serialized size of each history message and artifact part, by identity
+        self.parts = parts
+
+
+class BoundedTaskStore(TaskStore):
+    """In-memory A2A task store with LRU/TTL eviction of finished tasks.
+
+    Only tasks in a terminal state are ever evicted; in-flight tasks stay resident
+    regardless of the limits. Finished tasks leave memory once they are older than
+    `ttl_seconds`, or least-recently-used first when the store holds more than
+    `max_tasks` tasks or `max_bytes` of serialized task JSON. With `spill_dir` set,
+    tasks evicted for capacity are written there and transparently read back by
+    `get`; expired tasks are dropped, and spill files are deleted once read back
+    or older than `ttl_seconds`.
+
+    Sizes are measured incrementally: a task saved again (as it is for every
+    streamed chunk) only has its new messages and artifact parts serialized.
+    """
+
+    def __init__(
+        self,
+        max_tasks: int = 1000,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: float = 3600,
+        spill_dir: Optional[str] = None,
+    ):
+        self.max_tasks = max_tasks
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.spill_dir = spill_dir
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+        self._tasks: "OrderedDict[str, _Slot]" = OrderedDict()
+        self._bytes = 0
+        self._next_sweep = 0.0
+        self._lock = asyncio.Lock()
+        self.evictions = 0
+        self.spilled = 0
+        self.disk_hits = 0
+
+    @classmethod
+    def from_env(cls) -> "BoundedTaskStore":
+        return cls(
+            max_tasks=int(os.environ.get("A2A_TASK_STORE_MAX_TASKS", "1000")),
+            max_bytes=int(os.environ.get("A2A_TASK_STORE_MAX_BYTES", str(64 * 1024 * 1024))),
+            ttl_seconds=float(os.environ.get("A2A_TASK_STORE_TTL_SECONDS", "3600")),
+            spill_dir=os.environ.get("A2A_TASK_STORE_SPILL_DIR") or None,
+        )
+
+    # --- Internals ---
+    def _spill_path(self, task_id: str) -> str:
+        # Task ids are server-generated UUIDs, but never trust them as file names
+        safe_id = "".join(c for c in task_id if c.isalnum() or c in "-_")
+        return os.path.join(self.spill_dir, f"{safe_id}.json")
+
+    def _remove_spilled(self, task_id: str) -> None:
+        try:
+            os.remove(self._spill_path(task_id))
+        except FileNotFoundError:
+            pass
+
+    def _measure(self, task: Task, known: Dict[int, Tuple[Any, int]]) -> Tuple[int, Dict[int, Tuple[Any, int]]]:
+        """Approximate serialized size, reusing the sizes of parts measured on earlier saves."""
+        parts: Dict[int, Tuple[Any, int]] = {}
+
+        def measure(item: Any) -> int:
+            cached = known.get(id(item))
+            size = cached[1] if cached and cached[0] is item else _json_size(item)
+            parts[id(item)] = (item, size)
+            return size
+
+        size = _json_size(task, exclude={"history", "artifacts"})
+        size += _list_overhead("history", task.history) + _list_overhead("artifacts", task.artifacts)
+        for message in task.history or []:
+            size += measure(message)
+        for artifact in task.artifacts or []:
+            size += _json_size(artifact, exclude={"parts"}) + _list_overhead("parts", artifact.parts)
+            size += sum(measure(part) for part in artifact.parts)
+        return size, parts
+
+    def _put(self, task: Task, payload: Optional[str] = None) -> None:
+        old = self._tasks.pop(task.id, None)
+        if old:
+            self._bytes -= old.size
+        if payload is not None:
+            size, parts = len(payload.encode("utf-8")), {}
+        else:
+            size, parts = self._measure(task, old.parts if old else {})
+        self._tasks[task.id] = _Slot(task, size, time.time(), parts)
+        self._bytes += size
+
+    def _evict(self, task_id: str, spill: bool) -> None:
+        slot = self._tasks.pop(task_id)
+        self._bytes -= slot.size
+        self.evictions += 1
+        if spill and self.spill_dir:
+            try:
+                with open(self._spill_path(task_id), "w", encoding="utf-8") as f:
+                    f.write(slot.task.model_dump_json(exclude_none=True))
+                self.spilled += 1
+            except OSError as e:
+                logger.warning(f"[TaskStore] Could not spill task {task_id}: {e}")
+
+    def _enforce_limits(self) -> None:
+        now = time.time()
+        # Oldest-touched first; in-flight tasks are skipped, never evicted
+        for task_id, slot in list(self._tasks.items()):
+            over_capacity = len(self._tasks) > self.max_tasks or self._bytes > self.max_bytes
+            expired = self.ttl_seconds > 0 and now - slot.touched > self.ttl_seconds
+            if not over_capacity and not expired:
+                break
+            if slot.task.status.state in TERMINAL_STATES:
+                self._evict(task_id, spill=not expired)
+        if self.spill_dir and self.ttl_seconds > 0 and now >= self._next_sweep:
+            self._next_sweep = now + SPILL_SWEEP_SECONDS
+            self._sweep_spilled(now)
+
+    def _sweep_spilled(self, now: float) -> None:
+        """Deletes spill files of tasks that have outlived the TTL."""
+        try:
+            names = os.listdir(self.spill_dir)
+        except OSError as e:
+            logger.warning(f"[TaskStore] Could not list {self.spill_dir}: {e}")
+            return
+        for name in names:
+            path = os.path.join(self.spill_dir, name)
+            try:
+                if name.endswith(".json") and now - os.path.getmtime(path) > self.ttl_seconds:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    # --- TaskStore ---
+    async def save(self, task: Task, context: ServerCallContext | None = None) -> None:
+        async with self._lock:
+            self._put(task)
+            self._enforce_limits()
+
+    async def get(self, task_id: str, context: ServerCallContext | None = None) -> Task | None:
+        async with self._lock:
+            slot = self._tasks.get(task_id)
+            if slot:
+                self._tasks.move_to_end(task_id)
+                slot.touched = time.time()
+                return slot.task
+            if not self.spill_dir:
+                return None
+            try:
+                with open(self._spill_path(task_id), encoding="utf-8") as f:
+                    payload = f.read()
+            except FileNotFoundError:
+                return None
+            task = Task.model_validate_json(payload)
+            self.disk_hits += 1
+            # Resident again; spilled anew if it is evicted again
+            self._remove_spilled(task_id)
+            self._put(task, payload)
+            self._enforce_limits()
+            return task
+
+    async def delete(self, task_id: str, context: ServerCallContext | None = None) -> None:
+        async with self._lock:
+            slot = self._tasks.pop(task_id, None)
+            if slot:
+                self._bytes -= slot.size
+            if self.spill_dir:
+                self._remove_spilled(task_id)
+
+    def stats(self) -> dict:
+        active = sum(1 for slot in self._tasks.values() if slot.task.status.state not in TERMINAL_STATES)
+        return {
+            "tasks": len(self._tasks),
+            "active": active,
+            "finished": len(self._tasks) - active,
+            "bytes": self._bytes,
+            "evictions": self.evictions,
+            "spilled": self.spilled,
+            "disk_hits": self.disk_hits,
+            "max_tasks": self.max_tasks,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "spill_dir": self.spill_dir,
+        }
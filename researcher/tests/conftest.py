@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# Set before any app module is imported: the server opens its session store at import time
+os.environ.setdefault("MODEL_BACKEND", "fake")
+os.environ.setdefault("SESSION_DB", os.path.join(tempfile.mkdtemp(prefix="researcher-tests-"), "sessions.sqlite3"))
@@ -0,0 +1,62 @@
+import asyncio
+import uuid
+
+from a2a.server.agent_execution import RequestContext
+from a2a.server.events import EventQueue
+from a2a.types import Message, MessageSendParams, Part, TextPart
+from google.adk.events import Event
+from google.adk.sessions import InMemorySessionService
+from google.genai import types as genai_types
+
+import app.server as server
+from app.agent import GovernancePrinciple, ResearchFindings
+from app.cache import ResearchCache
+
+FINDINGS = ResearchFindings(
+    context_summary="Drone delivery",
+    applicable_frameworks=["EU AI Act"],
+    proposed_principles=[GovernancePrinciple(name="Human Oversight", source="EU AI Act", definition="Pilots on call.")],
+    known_risks=["Collisions"],
+).model_dump_json()
+
+
+class CountingRunner:
+    """Stands in for the ADK runner and answers every request with the same findings."""
+
+    def __init__(self):
+        self.session_service = InMemorySessionService()
+        self.calls = 0
+
+    async def run_async(self, **kwargs):
+        self.calls += 1
+        yield Event(
+            author="researcher",
+            content=genai_types.Content(role="model", parts=[genai_types.Part.from_text(text=FINDINGS)]),
+        )
+
+
+def _ask(executor, text: str) -> None:
+    message = Message(
+        role="user", parts=[Part(root=TextPart(text=text))], message_id=str(uuid.uuid4()), context_id="c1"
+    )
+    asyncio.run(executor._execute(RequestContext(request=MessageSendParams(message=message)), EventQueue()))
+
+
+def _executor(monkeypatch) -> server.AdkToA2aExecutor:
+    monkeypatch.setattr(server.startup, "wait_ready", lambda: asyncio.sleep(0))
+    return server.AdkToA2aExecutor(CountingRunner(), "researcher", cache=ResearchCache("test"))
+
+
+def test_repeat_request_is_served_from_the_cache(monkeypatch):
+    executor = _executor(monkeypatch)
+    _ask(executor, "Use case: drone delivery")
+    _ask(executor, "Use case: drone delivery")
+    assert executor.runner.calls == 1
+
+
+def test_loop_retries_are_always_researched_again(monkeypatch):
+    executor = _executor(monkeypatch)
+    retry = "Use case: drone delivery\nFor context: the judge rejected every principle."
+    _ask(executor, retry)
+    _ask(executor, retry)
+    assert executor.runner.calls == 2
@@ -0,0 +1,108 @@
+import asyncio
+import os
+import time
+
+from a2a.types import Artifact, Part, Task, TaskArtifactUpdateEvent, TaskState, TaskStatus, TextPart
+from a2a.utils.helpers import append_artifact_to_task
+
+import app.task_store as task_store
+from app.task_store import BoundedTaskStore
+
+
+def _task(task_id: str, state: TaskState = TaskState.completed) -> Task:
+    return Task(id=task_id, context_id="ctx", status=TaskStatus(state=state))
+
+
+def test_finished_tasks_are_evicted_least_recently_used_first():
+    async def run():
+        store = BoundedTaskStore(max_tasks=2, ttl_seconds=0)
+        for task_id in ("a", "b"):
+            await store.save(_task(task_id))
+        await store.get("a")
+        await store.save(_task("c"))
+        return store
+
+    store = asyncio.run(run())
+    assert list(store._tasks) == ["a", "c"]
+    assert store.stats()["evictions"] == 1
+
+
+def test_in_flight_tasks_are_never_evicted():
+    async def run():
+        store = BoundedTaskStore(max_tasks=1, ttl_seconds=0)
+        await store.save(_task("a", TaskState.working))
+        await store.save(_task("b", TaskState.working))
+        return store
+
+    store = asyncio.run(run())
+    assert store.stats()["tasks"] == 2
+    assert store.stats()["active"] == 2
+
+
+def test_spilled_tasks_are_read_back_and_their_files_removed(tmp_path):
+    spill_dir = str(tmp_path)
+
+    async def run():
+        store = BoundedTaskStore(max_tasks=1, ttl_seconds=0, spill_dir=spill_dir)
+        await store.save(_task("a"))
+        await store.save(_task("b"))
+        assert os.listdir(spill_dir) == ["a.json"]
+        task = await store.get("a")
+        return store, task
+
+    store, task = asyncio.run(run())
+    assert task.id == "a"
+    assert store.stats()["disk_hits"] == 1
+    # "a" is resident again and "b" took its place on disk
+    assert os.listdir(spill_dir) == ["b.json"]
+
+
+def test_expired_tasks_are_dropped_and_old_spill_files_swept(tmp_path, monkeypatch):
+    spill_dir = str(tmp_path)
+    stale = os.path.join(spill_dir, "old.json")
+    with open(stale, "w") as f:
+        f.write("{}")
+    os.utime(stale, (time.time() - 120, time.time() - 120))
+
+    async def run():
+        store = BoundedTaskStore(max_tasks=10, ttl_seconds=60, spill_dir=spill_dir)
+        await store.save(_task("a"))
+        later = time.time() + 120
+        monkeypatch.setattr(task_store.time, "time", lambda: later)
+        await store.save(_task("b", TaskState.working))
+        return store
+
+    store = asyncio.run(run())
+    assert list(store._tasks) == ["b"]
+    assert os.listdir(spill_dir) == []
+
+
+def test_resaving_a_streamed_task_only_measures_new_parts(monkeypatch):
+    measured = []
+    json_size = task_store._json_size
+
+    def counting(model, exclude=None):
+        measured.append(type(model).__name__)
+        return json_size(model, exclude)
+
+    monkeypatch.setattr(task_store, "_json_size", counting)
+    task = _task("a", TaskState.working)
+
+    async def run():
+        store = BoundedTaskStore()
+        for i in range(20):
+            append_artifact_to_task(task, TaskArtifactUpdateEvent(
+                task_id="a",
+                context_id="ctx",
+                append=i > 0,
+                artifact=Artifact(artifact_id="art", parts=[Part(root=TextPart(text=f"chunk {i} "))]),
+            ))
+            measured.clear()
+            await store.save(task)
+        return store
+
+    store = asyncio.run(run())
+    # The task envelope, the artifact envelope and the one new part
+    assert measured == ["Task", "Artifact", "Part"]
+    actual = len(task.model_dump_json(exclude_none=True))
+    assert store.stats()["bytes"] == actual
@@ -28,8 +28,8 @@ APP_URL=http://localhost:8003 uv run uvicorn app.server:app --host 0.0.0.0 --por
 CONTENT_BUILDER_PID=$!
 cd ..
 
-# Wait a bit for them to start up
-sleep 5
+# No need to wait for them: the orchestrator resolves agent cards lazily and
+# keeps refreshing them in the background
 
 echo "Starting Orchestrator Agent on port 8000..."
 cd orchestrator